@@ -2,37 +2,162 @@
 """
 API Bridge for Energy Prediction
 This script is called from Node.js to get predictions from the ML model
+
+Usage:
+    python api_bridge.py '<json>'               One-shot prediction (legacy mode)
+    python api_bridge.py --worker               Serve NDJSON requests over stdin/stdout
+    python api_bridge.py --socket /tmp/ml.sock  Serve NDJSON requests over a Unix socket
+
+In worker mode every input line is a JSON object such as
+{"id": "42", "op": "predict", "data": {...}} and every output line is
+{"id": "42", "result": {...}}. Use "op": "predict_batch" with a list of
+records as data to score many records in one call, "op": "forecast" with
+{"start", "horizon", ...} for an hourly forecast, or "op": "reload" to
+load the bundle in models/CURRENT now. Requests are processed concurrently, so
+responses may come back in a different order than they were sent; the
+caller matches them up by id.
 """
 
 import sys
 import json
 import os
+import argparse
+import threading
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the current directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from predict import predictor
+from inference import get_predictor, reloader
 
-def main():
+def handle_request(message):
+    """Run a single worker request and return the response envelope"""
+    request_id = message.get('id') if isinstance(message, dict) else None
     try:
-        # Get input data from command line arguments
-        if len(sys.argv) < 2:
-            result = {
-                'success': False,
-                'error': 'No input data provided'
-            }
-            print(json.dumps(result))
-            return
+        if not isinstance(message, dict):
+            raise ValueError('Request must be a JSON object')
+
+        op = message.get('op', 'predict')
+        predictor = get_predictor()
+        if op == 'predict':
+            result = predictor.predict(message.get('data', {}))
+        elif op == 'predict_batch':
+            result = predictor.predict_many(message.get('data', []))
+        elif op == 'forecast':
+            result = predictor.forecast(message.get('data', {}))
+        elif op == 'ping':
+            result = {'success': True, 'model_loaded': predictor.is_loaded,
+                      'bundle_id': predictor.bundle_id, 'pid': os.getpid()}
+        elif op == 'reload':
+            status = reloader.reload(reason='bridge')
+            result = {'success': status['status'] == 'swapped', **status}
+        else:
+            result = {'success': False, 'error': f'Unknown operation: {op}'}
+
+    except Exception as e:
+        result = {
+            'success': False,
+            'error': f'Prediction failed: {str(e)}'
+        }
+
+    return {'id': request_id, 'result': result}
+
+def _parse_line(line):
+    """Decode one NDJSON request line, returning an error envelope on bad JSON"""
+    try:
+        return json.loads(line), None
+    except json.JSONDecodeError as e:
+        return None, {'id': None, 'result': {'success': False, 'error': f'Invalid JSON: {str(e)}'}}
+
+def serve_stdio(threads=4):
+    """Serve newline-delimited JSON requests from stdin, writing responses to stdout"""
+    write_lock = threading.Lock()
+
+    def respond(envelope):
+        line = json.dumps(envelope)
+        with write_lock:
+            sys.stdout.write(line + '\n')
+            sys.stdout.flush()
+
+    def run(message):
+        respond(handle_request(message))
+
+    # Tell the parent process that the model is loaded and requests can flow
+    respond({'id': None, 'ready': True, 'model_loaded': get_predictor().is_loaded, 'pid': os.getpid()})
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            message, error = _parse_line(line)
+            if error is not None:
+                respond(error)
+                continue
+            executor.submit(run, message)
+
+class _BridgeRequestHandler(socketserver.StreamRequestHandler):
+    """Serve NDJSON requests for one socket connection"""
+
+    def handle(self):
+        write_lock = threading.Lock()
 
+        def respond(envelope):
+            data = (json.dumps(envelope) + '\n').encode('utf-8')
+            with write_lock:
+                self.wfile.write(data)
+                self.wfile.flush()
+
+        def run(message):
+            try:
+                respond(handle_request(message))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        with ThreadPoolExecutor(max_workers=self.server.threads) as executor:
+            for raw in self.rfile:
+                line = raw.decode('utf-8').strip()
+                if not line:
+                    continue
+                message, error = _parse_line(line)
+                if error is not None:
+                    respond(error)
+                    continue
+                executor.submit(run, message)
+
+def serve_socket(socket_path, threads=4):
+    """Serve newline-delimited JSON requests on a Unix domain socket"""
+    if not hasattr(socketserver, 'ThreadingUnixStreamServer'):
+        raise RuntimeError('Unix sockets are not supported on this platform, use --worker instead')
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    with Server(socket_path, _BridgeRequestHandler) as server:
+        server.threads = threads
+        print(json.dumps({'ready': True, 'socket': socket_path, 'pid': os.getpid()}), flush=True)
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+def run_once(raw):
+    """Legacy one-shot mode: predict for a single JSON argument"""
+    try:
         # Parse input data
-        input_data = json.loads(sys.argv[1])
-        
-        # Make prediction using the global predictor instance
-        result = predictor.predict(input_data)
-        
+        input_data = json.loads(raw)
+
+        # Make prediction using the predictor currently being served
+        result = get_predictor().predict(input_data)
+
         # Output result as JSON
         print(json.dumps(result))
-        
+
     except Exception as e:
         error_result = {
             'success': False,
@@ -40,5 +165,33 @@ def main():
         }
         print(json.dumps(error_result))
 
+def main():
+    parser = argparse.ArgumentParser(description='Energy prediction bridge for the Node.js server')
+    parser.add_argument('payload', nargs='?', help='JSON input for a one-shot prediction')
+    parser.add_argument('--worker', action='store_true', help='serve NDJSON requests over stdin/stdout')
+    parser.add_argument('--socket', help='serve NDJSON requests over this Unix socket path')
+    parser.add_argument('--threads', type=int, default=4, help='concurrent requests per worker')
+    parser.add_argument('--watch-interval', type=float, default=float(os.environ.get('MODEL_WATCH_INTERVAL', 5)),
+                        help='seconds between checks of models/CURRENT for a new model (0 disables)')
+    args = parser.parse_args()
+
+    if args.socket or args.worker:
+        # Long-lived modes pick up newly trained bundles without a restart
+        reloader.start_watching(args.watch_interval)
+
+    if args.socket:
+        serve_socket(args.socket, threads=args.threads)
+    elif args.worker:
+        serve_stdio(threads=args.threads)
+    elif args.payload:
+        run_once(args.payload)
+    else:
+        # Get input data from command line arguments
+        result = {
+            'success': False,
+            'error': 'No input data provided'
+        }
+        print(json.dumps(result))
+
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
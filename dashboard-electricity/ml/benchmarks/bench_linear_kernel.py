@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark the folded linear kernel against the sklearn scaler -> model -> scaler path
+
+Usage:
+    python benchmarks/bench_linear_kernel.py
+"""
+
+import sys
+import os
+import time
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference import EnergyPredictor
+
+def make_records(n, seed=0):
+    """Random request dicts shaped like dashboard predictions"""
+    rng = np.random.default_rng(seed)
+    return [{
+        'temperature': float(rng.uniform(10, 35)),
+        'humidity': float(rng.uniform(30, 80)),
+        'squareFootage': float(rng.uniform(800, 2000)),
+        'occupancy': int(rng.integers(0, 10)),
+        'hvacUsage': bool(rng.integers(0, 2)),
+        'lightingUsage': bool(rng.integers(0, 2)),
+        'hour': int(rng.integers(0, 24)),
+        'dayOfWeek': int(rng.integers(0, 7)),
+        'month': int(rng.integers(1, 13)),
+    } for _ in range(n)]
+
+def best_of(fn, number, repeat=5):
+    """Best mean seconds per call over ``repeat`` runs of ``number`` calls"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+def main():
+    predictor = EnergyPredictor()
+    # Time the model path, not cache hits
+    predictor.cache = None
+    if predictor.linear_kernel is None:
+        print("Loaded model is not linear; nothing to compare.")
+        return
+
+    kernel = predictor.linear_kernel
+    record = make_records(1)[0]
+    row = predictor.create_feature_row(record)
+
+    print("=" * 60)
+    print(f"Model: {type(predictor.model).__name__}, features: {len(predictor.feature_cols)}")
+    print("=" * 60)
+    print(f"{'case':<28}{'sklearn':>12}{'kernel':>12}{'speedup':>10}")
+
+    def compare(label, fn, number):
+        predictor.linear_kernel = None
+        generic = best_of(fn, number)
+        predictor.linear_kernel = kernel
+        folded = best_of(fn, number)
+        print(f"{label:<28}{generic * 1e6:>10.1f}us{folded * 1e6:>10.1f}us{generic / folded:>9.1f}x")
+
+    compare('score 1 row', lambda: predictor._predict_matrix(row), 2000)
+    compare('predict() 1 row', lambda: predictor.predict(record), 2000)
+
+    for n in (1000, 100000):
+        X = predictor.create_feature_matrix(make_records(n))
+        compare(f'score {n} rows', lambda: predictor._predict_matrix(X), 20)
+
+    records = make_records(10000)
+    compare('predict_many() 10000 rows', lambda: predictor.predict_many(records), 5)
+
+if __name__ == '__main__':
+    main()
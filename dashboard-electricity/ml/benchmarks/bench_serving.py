@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark the production server (serve.py) against the Flask debug server
+
+Each server is started in a subprocess and loaded with concurrent clients.
+Every client POSTs /predict over its own connection, keeping it open where
+the server allows. The "mixed" run adds one client that keeps sending large
+/predict/batch requests, to show how slow requests affect the others.
+Reports /predict throughput and p50/p99 latency.
+
+Usage:
+    python benchmarks/bench_serving.py [--clients 8] [--duration 10] [--workers N] [--threads 4]
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import subprocess
+import http.client
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the ml directory to the path
+sys.path.insert(0, ML_DIR)
+
+from bench_linear_kernel import make_records
+
+DEBUG_SERVER = ("from predict import app; "
+                "app.run(host='127.0.0.1', port={port}, debug=True, threaded=True)")
+
+def start_server(mode, port, workers, threads):
+    if mode == 'debug':
+        cmd = [sys.executable, '-c', DEBUG_SERVER.format(port=port)]
+    else:
+        cmd = [sys.executable, 'serve.py', '--bind', f'127.0.0.1:{port}',
+               '--workers', str(workers), '--threads', str(threads)]
+    # Without the cache every request runs the model
+    env = dict(os.environ, PREDICTION_CACHE_SIZE='0')
+    # A new session, so the debug server's reloader child is stopped too
+    return subprocess.Popen(cmd, cwd=ML_DIR, env=env, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, start_new_session=True)
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+def wait_ready(port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f'server on port {port} did not start')
+
+def client(port, path, bodies, stop, latencies, errors):
+    """Send ``bodies`` round-robin until ``stop`` is set, recording seconds per request"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    headers = {'Content-Type': 'application/json'}
+    i = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            conn.request('POST', path, body=bodies[i % len(bodies)], headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(repr(e))
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - start)
+        i += 1
+    conn.close()
+
+def run_load(port, clients, duration, batch_size=0):
+    bodies = [json.dumps(record) for record in make_records(1000)]
+    stop = threading.Event()
+    latencies, errors = [], []
+    threads = [threading.Thread(target=client, args=(port, '/predict', bodies, stop, latencies, errors))
+               for _ in range(clients)]
+    if batch_size:
+        batch = [json.dumps({'records': make_records(batch_size, seed=1)})]
+        threads.append(threading.Thread(target=client, args=(port, '/predict/batch', batch, stop, [], errors)))
+
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    ms = np.array(latencies) * 1e3
+    return {
+        'requests': len(ms),
+        'throughput': len(ms) / duration,
+        'p50': float(np.percentile(ms, 50)) if len(ms) else float('nan'),
+        'p99': float(np.percentile(ms, 99)) if len(ms) else float('nan'),
+        'errors': len(errors),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the prediction API servers')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=len(os.sched_getaffinity(0)))
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=5000, help='records per slow request in the mixed run')
+    parser.add_argument('--port', type=int, default=5097)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, {args.duration:.0f}s per run, "
+          f"serve.py with {args.workers} workers x {args.threads} threads\n")
+    print(f"{'server':<8} {'load':<7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for mode in ('debug', 'serve'):
+        process = start_server(mode, args.port, args.workers, args.threads)
+        try:
+            wait_ready(args.port)
+            run_load(args.port, args.clients, 1)  # warm up
+            for load, batch_size in (('predict', 0), ('mixed', args.batch_size)):
+                r = run_load(args.port, args.clients, args.duration, batch_size)
+                print(f"{mode:<8} {load:<7} {r['throughput']:>8.0f} {r['p50']:>8.2f} {r['p99']:>8.2f} {r['errors']:>7}")
+        finally:
+            stop_server(process)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the prediction and training hot paths
+
+Every benchmark runs in its own process, so its peak RSS is not inflated by
+the ones before it. Each one reports p50/p99 latency per call, throughput
+(items per second, where an item is a record, row or window) and peak RSS.
+Results can be saved as JSON and compared against an earlier run. The
+comparison fails when a benchmark's p50 got slower by more than
+``--threshold``.
+
+Benchmarks:
+    create_features       EnergyPredictor.create_features, one request
+    prepare_features      EnergyPredictor.prepare_features, one feature dict
+    predict               EnergyPredictor.predict, cache off
+    predict_cached        EnergyPredictor.predict, cache hits
+    predict_batch         EnergyPredictor.predict_many, 1000 records per call
+    model_load            EnergyPredictor() from the current bundle
+    bridge_oneshot        `python api_bridge.py '<json>'`, process start to result
+    bridge_worker         request/response round trip to `api_bridge.py --worker`
+    train_features_<n>    train.create_features on <n> synthetic raw rows
+    train_features_lean_<n>  the same with lean=True (float32/int8, no duplicates)
+    lstm_windows          all LSTM training batches from 100k rows
+
+Usage:
+    python benchmarks/bench_suite.py [--only predict] [--sizes 1000,100000,10000000]
+                                     [--save benchmarks/results/mine.json]
+                                     [--compare benchmarks/results/baseline.json] [--threshold 1.25]
+"""
+
+import os
+import sys
+import json
+import time
+import fnmatch
+import platform
+import argparse
+import resource
+import subprocess
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ML_DIR = os.path.dirname(BENCH_DIR)
+
+# Add the ml directory to the path
+sys.path.insert(0, ML_DIR)
+
+DEFAULT_SIZES = (1000, 100_000)
+
+def make_records(n, seed=0):
+    """Request dicts shaped like dashboard predictions (imported lazily: it loads the model)"""
+    from bench_linear_kernel import make_records
+    return make_records(n, seed)
+
+def peak_rss_mb():
+    """High-water mark of this process's resident memory"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+def measure(fn, items=1, min_time=2.0, min_calls=5, max_calls=100_000):
+    """Call ``fn`` until ``min_time`` seconds have passed, timing each call"""
+    fn()  # warm up
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_calls and (len(latencies) < min_calls or time.perf_counter() - started < min_time):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies)
+    return {
+        'calls': len(latencies),
+        'items_per_call': items,
+        'p50_ms': float(np.percentile(latencies, 50) * 1e3),
+        'p99_ms': float(np.percentile(latencies, 99) * 1e3),
+        'mean_ms': float(latencies.mean() * 1e3),
+        'throughput': float(items * len(latencies) / latencies.sum()),
+    }
+
+def make_energy_frame(n, seed=0):
+    """``n`` hourly rows shaped like data/Energy_consumption.csv, from the synthetic generator"""
+    from synthetic import synthetic_frame
+    df = synthetic_frame(n, seed=seed)
+    # Plain strings, as pd.read_csv returns them
+    return df.astype({col: str for col in df.select_dtypes('category')}).assign(Timestamp=df['Timestamp'].astype(str))
+
+def _predictor(cache=False):
+    from inference import EnergyPredictor
+    predictor = EnergyPredictor()
+    if not cache:
+        predictor.cache = None
+    return predictor
+
+def _cycle(values):
+    """Function returning the next item of ``values`` on every call"""
+    state = {'i': -1}
+    def next_value():
+        state['i'] = (state['i'] + 1) % len(values)
+        return values[state['i']]
+    return next_value
+
+def bench_create_features():
+    predictor, record = _predictor(), _cycle(make_records(1000))
+    return measure(lambda: predictor.create_features(record()))
+
+def bench_prepare_features():
+    predictor = _predictor()
+    features = _cycle([predictor.create_features(r) for r in make_records(1000)])
+    return measure(lambda: predictor.prepare_features(features()))
+
+def bench_predict():
+    predictor, record = _predictor(), _cycle(make_records(1000))
+    return measure(lambda: predictor.predict(record()))
+
+def bench_predict_cached():
+    predictor, record = _predictor(cache=True), _cycle(make_records(100))
+    return measure(lambda: predictor.predict(record()))
+
+def bench_predict_batch():
+    predictor, records = _predictor(), make_records(1000)
+    return measure(lambda: predictor.predict_many(records), items=len(records))
+
+def bench_model_load():
+    from inference import EnergyPredictor
+    return measure(EnergyPredictor, min_time=3.0)
+
+def bench_bridge_oneshot():
+    payload = json.dumps(make_records(1)[0])
+    cmd = [sys.executable, os.path.join(ML_DIR, 'api_bridge.py'), payload]
+
+    def run():
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        assert json.loads(result.stdout)['success']
+    return measure(run, min_time=5.0, min_calls=10)
+
+def bench_bridge_worker():
+    worker = subprocess.Popen([sys.executable, os.path.join(ML_DIR, 'api_bridge.py'), '--worker', '--watch-interval', '0'],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        assert json.loads(worker.stdout.readline())['ready']
+        messages = _cycle([json.dumps({'id': str(i), 'op': 'predict', 'data': r}) + '\n'
+                           for i, r in enumerate(make_records(1000))])
+
+        def round_trip():
+            worker.stdin.write(messages())
+            worker.stdin.flush()
+            assert json.loads(worker.stdout.readline())['result']['success']
+        return measure(round_trip)
+    finally:
+        worker.stdin.close()
+        worker.wait()
+
+def bench_train_features(n, lean=False):
+    from train import create_features
+    raw = make_energy_frame(n)
+    return measure(lambda: create_features(raw, lean=lean), items=n, min_time=5.0 if n <= 100_000 else 0.0, min_calls=3)
+
+def bench_lstm_windows():
+    from windowing import iter_window_batches, window_count
+    rng = np.random.default_rng(0)
+    X, y, length = rng.random((100_000, 70)), rng.random(100_000), 24
+
+    def all_batches():
+        for _ in iter_window_batches(X, y, length, batch_size=256, shuffle=True, rng=np.random.default_rng(0)):
+            pass
+    return measure(all_batches, items=window_count(len(X), length), min_calls=3)
+
+def benchmarks(sizes):
+    """Benchmark name -> zero-argument function"""
+    cases = {
+        'create_features': bench_create_features,
+        'prepare_features': bench_prepare_features,
+        'predict': bench_predict,
+        'predict_cached': bench_predict_cached,
+        'predict_batch': bench_predict_batch,
+        'model_load': bench_model_load,
+        'bridge_oneshot': bench_bridge_oneshot,
+        'bridge_worker': bench_bridge_worker,
+    }
+    for n in sizes:
+        cases[f'train_features_{n}'] = lambda n=n: bench_train_features(n)
+        cases[f'train_features_lean_{n}'] = lambda n=n: bench_train_features(n, lean=True)
+    cases['lstm_windows'] = bench_lstm_windows
+    return cases
+
+def run_case(name, sizes):
+    """Run one benchmark in this process and print its result as JSON"""
+    # Quiet model loading and TensorFlow start-up
+    import logging
+    logging.disable(logging.INFO)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    result = benchmarks(sizes)[name]()
+    result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    print(json.dumps(result))
+
+def run_isolated(name, sizes):
+    cmd = [sys.executable, os.path.abspath(__file__), '--case', name, '--sizes', ','.join(map(str, sizes))]
+    result = subprocess.run(cmd, cwd=ML_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed'}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ML_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count(),
+    }
+
+def compare(results, baseline, threshold):
+    """Print p50 against the baseline; returns the names that got slower than ``threshold``"""
+    regressions = []
+    print(f"\n{'benchmark':<28}{'baseline p50':>14}{'p50':>12}{'ratio':>8}")
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if not before or 'p50_ms' not in before or 'p50_ms' not in result:
+            continue
+        ratio = result['p50_ms'] / before['p50_ms']
+        flag = '  SLOWER' if ratio > threshold else ''
+        print(f"{name:<28}{before['p50_ms']:>12.3f}ms{result['p50_ms']:>10.3f}ms{ratio:>7.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the prediction and training hot paths')
+    parser.add_argument('--only', help='run benchmarks matching this glob (e.g. "predict*")')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='synthetic row counts for train_features (10M rows needs ~10 GB RAM)')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='compare against results saved earlier')
+    parser.add_argument('--threshold', type=float, default=1.25, help='p50 ratio counted as a regression')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(n) for n in args.sizes.split(',') if n]
+
+    if args.case:
+        run_case(args.case, sizes)
+        return
+
+    names = [name for name in benchmarks(sizes) if not args.only or fnmatch.fnmatch(name, args.only)]
+    print(f"{'benchmark':<28}{'p50 ms':>10}{'p99 ms':>10}{'items/s':>14}{'peak RSS MB':>13}")
+    results = {}
+    for name in names:
+        result = results[name] = run_isolated(name, sizes)
+        if 'error' in result:
+            print(f"{name:<28}  failed: {result['error']}")
+            continue
+        print(f"{name:<28}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+              f"{result['throughput']:>14,.0f}{result['peak_rss_mb']:>13.1f}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"\nResults saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than {args.threshold}x the baseline: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Cache of training features, one memory-mapped .npy file per column
+
+load_features() returns the same frame as create_features(load_and_preprocess_data())
+without parsing the CSV when nothing has changed. With ``lean=True`` it
+matches create_features(..., lean=True) instead: only the needed columns
+are read, each straight into its compact dtype. Columns are stored under
+the hash of the CSV contents and named after the hash of their definition:
+
+    data/feature_cache/<source hash>/<column>-<definition hash>.npy
+
+A derived feature's definition is its FEATURE_SPEC expression plus those of
+the features it uses; a history feature's is its statistic, source and
+window. Editing one feature therefore only recomputes the columns that
+depend on it, and new CSV contents get a fresh directory. The directories
+of older sources beyond ``keep`` are pruned.
+"""
+
+import os
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+from features import INPUT_COLUMNS, FEATURE_NAMES, compile_column_evaluator, feature_definition
+from ingest import (PROJECT_ROOT, DEFAULT_CSV, HISTORY_SPEC, encode_columns, feature_columns,
+                    history_column, read_sorted_csv, compact_frame)
+
+# Bump when encoding, sorting or NaN filling change, to invalidate every column
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, 'data', 'feature_cache')
+
+_DERIVED = frozenset(FEATURE_NAMES)
+_HISTORY = {name: (source, statistic, window) for name, source, statistic, window in HISTORY_SPEC}
+
+def source_hash(csv_path):
+    """sha256 of the CSV contents"""
+    digest = hashlib.sha256()
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def column_definition(name):
+    """Everything that determines a cached column's values, apart from the source data"""
+    if name in _DERIVED:
+        definition = f'feature: {feature_definition(name)}'
+    elif name in _HISTORY:
+        source, statistic, window = _HISTORY[name]
+        definition = f'history: {statistic}({source}, {window})'
+    else:
+        definition = f'column: {name}'
+    return f'v{CACHE_VERSION} {definition}; fill: ffill, bfill'
+
+def column_file(name):
+    return f"{name}-{hashlib.sha256(column_definition(name).encode('utf-8')).hexdigest()[:12]}.npy"
+
+def _compute_columns(csv_path, names):
+    """Compute ``names`` the way create_features does, NaN-filled"""
+    df = encode_columns(read_sorted_csv(csv_path))
+
+    computed = {}
+    derived = [name for name in names if name in _DERIVED]
+    if derived:
+        inputs = {col: df[col].to_numpy(dtype=np.float64) for col in INPUT_COLUMNS}
+        X = compile_column_evaluator(derived)(inputs)
+        computed.update({name: pd.Series(X[:, j]) for j, name in enumerate(derived)})
+
+    for name in names:
+        if name in _HISTORY:
+            computed[name] = history_column(df, *_HISTORY[name])
+        elif name not in computed:
+            computed[name] = df[name]
+
+    for name in names:
+        yield name, computed.pop(name).ffill().bfill().to_numpy()
+
+def _write_column(path, values):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+def prune_cache(cache_dir=DEFAULT_CACHE_DIR, keep=3):
+    """Delete all but the ``keep`` most recently used source directories"""
+    if not os.path.isdir(cache_dir):
+        return
+    entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)]
+    entries = sorted((p for p in entries if os.path.isdir(p)), key=os.path.getmtime, reverse=True)
+    for path in entries[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def load_features(csv_path=DEFAULT_CSV, cache_dir=DEFAULT_CACHE_DIR, keep=3, lean=False, history=True):
+    """Feature frame for ``csv_path``, computing only the columns not cached yet.
+
+    ``lean`` returns float32/int8 columns without exact duplicates, copied
+    one at a time from the memory-mapped files, and skips the lag/rolling
+    features unless ``history``. Returns (DataFrame, stats) where stats
+    counts cache hits and computed columns.
+    """
+    directory = os.path.join(cache_dir, source_hash(csv_path)[:16])
+    os.makedirs(directory, exist_ok=True)
+
+    names = feature_columns(pd.read_csv(csv_path, nrows=0).columns)
+    if lean and not history:
+        names = [name for name in names if name not in _HISTORY]
+    paths = {name: os.path.join(directory, column_file(name)) for name in names}
+    missing = [name for name in names if not os.path.exists(paths[name])]
+
+    if missing:
+        for name, values in _compute_columns(csv_path, missing):
+            _write_column(paths[name], values)
+
+    # Mark this source as recently used so pruning keeps it
+    os.utime(directory)
+    prune_cache(cache_dir, keep)
+
+    columns = {name: np.load(paths[name], mmap_mode='r') for name in names}
+    # A lean frame never holds the float64 columns together: each one is
+    # compacted into its own array and its mapping released
+    df = compact_frame(columns) if lean else pd.DataFrame(columns)
+    return df, {'hits': len(names) - len(missing), 'computed': len(missing), 'directory': directory}
@@ -0,0 +1,289 @@
+"""
+Feature definitions shared by training (train.py) and serving (inference.py)
+
+Every derived feature is declared exactly once in FEATURE_SPEC as a Python
+expression over the input columns and earlier features. The spec is compiled
+into two evaluators:
+
+    compile_column_evaluator(cols)  vectorized NumPy function for N rows
+    compile_row_evaluator(cols)     plain float function for one request
+
+Features that depend on a single integer calendar input (hour, day of week,
+month or day of year) are evaluated once for that input's whole domain when
+this module loads. Both evaluators then serve them from the same lookup
+tables, a gather instead of fresh sin/cos math. Everything else runs the same
+expressions with IEEE float64 arithmetic, so the two evaluators produce
+bit-identical feature matrices.
+"""
+
+import hashlib
+import json
+import math
+import numpy as np
+
+# Raw inputs every feature is computed from, in row evaluator argument order
+INPUT_COLUMNS = (
+    'Hour', 'DayOfWeek', 'Month', 'DayOfYear', 'WeekOfYear', 'DayOfMonth',
+    'Temperature', 'Humidity', 'SquareFootage', 'Occupancy',
+    'HVACUsage', 'LightingUsage', 'Holiday', 'RenewableEnergy', 'EnergyConsumption',
+)
+
+# Derived features, in the order train.create_features adds them.
+# Expressions may only use operators that give the same float64 result on
+# Python floats and NumPy arrays: + - * / // comparisons & | and sin/cos/pi.
+# Do not use ``**`` (pow and square/cube differ in the last bit) or
+# ``and``/``or`` (they do not broadcast).
+FEATURE_SPEC = (
+    # Time-based features
+    ('Quarter', '(Month - 1) // 3 + 1'),
+
+    # Enhanced cyclical encoding
+    ('Hour_sin', 'sin(2 * pi * Hour / 24)'),
+    ('Hour_cos', 'cos(2 * pi * Hour / 24)'),
+    ('DayOfWeek_sin', 'sin(2 * pi * DayOfWeek / 7)'),
+    ('DayOfWeek_cos', 'cos(2 * pi * DayOfWeek / 7)'),
+    ('Month_sin', 'sin(2 * pi * Month / 12)'),
+    ('Month_cos', 'cos(2 * pi * Month / 12)'),
+    ('DayOfYear_sin', 'sin(2 * pi * DayOfYear / 365)'),
+    ('DayOfYear_cos', 'cos(2 * pi * DayOfYear / 365)'),
+
+    # Enhanced boolean features
+    ('IsWeekend', 'DayOfWeek >= 5'),
+    ('IsPeakHour', '((Hour >= 7) & (Hour <= 9)) | ((Hour >= 17) & (Hour <= 19))'),
+    ('IsBusinessHour', '(Hour >= 8) & (Hour <= 18)'),
+    ('IsNight', '(Hour >= 22) | (Hour <= 6)'),
+    ('IsMorning', '(Hour >= 6) & (Hour <= 12)'),
+    ('IsAfternoon', '(Hour >= 12) & (Hour <= 18)'),
+    ('IsEvening', '(Hour >= 18) & (Hour <= 22)'),
+
+    # Enhanced interaction features
+    ('TempHumidity', 'Temperature * Humidity'),
+    ('TempSquared', 'Temperature * Temperature'),
+    ('HumiditySquared', 'Humidity * Humidity'),
+    ('TempCubed', 'Temperature * Temperature * Temperature'),
+    ('HumidityCubed', 'Humidity * Humidity * Humidity'),
+    ('HVAC_Temp', 'HVACUsage * Temperature'),
+    ('Lighting_Hour', 'LightingUsage * Hour'),
+    ('Occupancy_SqFt', 'Occupancy / (SquareFootage + 1e-8)'),
+    ('EnergyEfficiency', 'RenewableEnergy / (EnergyConsumption + 1e-8)'),
+    ('OccupancyDensity', 'Occupancy / (SquareFootage + 1e-8)'),
+    ('TempHumidityRatio', 'Temperature / (Humidity + 1e-8)'),
+
+    # Advanced features
+    ('TotalUsage', 'HVACUsage + LightingUsage'),
+    ('UsageIntensity', 'TotalUsage * Occupancy'),
+    ('EnvironmentalStress', 'Temperature * Humidity * Occupancy'),
+    ('BuildingEfficiency', 'SquareFootage / (EnergyConsumption + 1e-8)'),
+)
+
+FEATURE_NAMES = tuple(name for name, _ in FEATURE_SPEC)
+
+LAGS = (1, 2, 3, 6, 12, 24)
+ROLLING_WINDOWS = (3, 6, 12, 24)
+
+# Lag and rolling window features over a building's past readings, in column
+# order: (name, source column, statistic, window). ingest.py computes them
+# with pandas for training, history_engine.py incrementally for serving.
+HISTORY_SPEC = tuple(
+    [(f'{prefix}_Lag_{lag}', source, 'lag', lag)
+     for lag in LAGS
+     for prefix, source in (('Energy', 'EnergyConsumption'), ('Temp', 'Temperature'), ('Humidity', 'Humidity'))]
+    + [(f'{prefix}_Rolling_{stat.capitalize()}_{window}', source, stat, window)
+       for window in ROLLING_WINDOWS
+       for prefix, source, stat in (('Energy', 'EnergyConsumption', 'mean'), ('Energy', 'EnergyConsumption', 'std'),
+                                    ('Temp', 'Temperature', 'mean'), ('Humidity', 'Humidity', 'mean'))]
+)
+
+HISTORY_NAMES = tuple(name for name, *_ in HISTORY_SPEC)
+
+_HISTORY_DEFINITIONS = {name: f'{statistic}({source}, {window})' for name, source, statistic, window in HISTORY_SPEC}
+
+# Rows of history the longest lag or window needs
+HISTORY_ROWS = max(LAGS + ROLLING_WINDOWS)
+
+# Integer calendar inputs and the size of their lookup table (index = value)
+CALENDAR_DOMAINS = {'Hour': 24, 'DayOfWeek': 7, 'Month': 13, 'DayOfYear': 367}
+
+_EXPRESSIONS = dict(FEATURE_SPEC)
+
+_ROW_NAMESPACE = {'sin': math.sin, 'cos': math.cos, 'pi': math.pi}
+_COLUMN_NAMESPACE = {'sin': np.sin, 'cos': np.cos, 'pi': np.pi}
+
+def _dependencies(name):
+    """Names referenced by a feature expression"""
+    return compile(_EXPRESSIONS[name], name, 'eval').co_names
+
+def _input_closure(name):
+    """Input columns a feature ultimately depends on"""
+    inputs = set()
+    for dep in _dependencies(name):
+        if dep in _EXPRESSIONS:
+            inputs |= _input_closure(dep)
+        elif dep in INPUT_COLUMNS:
+            inputs.add(dep)
+    return inputs
+
+def _required_features(outputs):
+    """Derived features needed to produce ``outputs``, in spec order"""
+    needed = set()
+    stack = [name for name in outputs if name in _EXPRESSIONS]
+    while stack:
+        name = stack.pop()
+        if name in needed:
+            continue
+        needed.add(name)
+        stack.extend(dep for dep in _dependencies(name) if dep in _EXPRESSIONS)
+    return [name for name in FEATURE_NAMES if name in needed]
+
+# Calendar input -> features served from its lookup table
+TABULATED_FEATURES = {
+    key: tuple(name for name in FEATURE_NAMES if _input_closure(name) == {key})
+    for key in CALENDAR_DOMAINS
+}
+_TABLE_KEY = {name: key for key, names in TABULATED_FEATURES.items() for name in names}
+
+def _build_source(outputs, mode, args=INPUT_COLUMNS):
+    """Generate an evaluator for ``outputs``.
+
+    ``mode`` is 'row' or 'column' to read tabulated features from the lookup
+    tables, or 'formula' to evaluate every expression directly.
+    """
+    lines = [f"def evaluate({', '.join(args)}):"]
+    gathered = set()
+    for name in _required_features(outputs):
+        key = _TABLE_KEY.get(name) if mode != 'formula' else None
+        if key is None:
+            lines.append(f'    {name} = {_EXPRESSIONS[name]}')
+        elif key not in gathered:
+            gathered.add(key)
+            names = TABULATED_FEATURES[key]
+            if mode == 'row':
+                lines.append(f"    {', '.join(names)}, = _rows_{key}[{key}]")
+            else:
+                lines.append(f"    _block = _table_{key}[_index({key}, {CALENDAR_DOMAINS[key]}, '{key}')]")
+                lines.extend(f'    {n} = _block[:, {j}]' for j, n in enumerate(names))
+    known = set(args) | set(FEATURE_NAMES)
+    # Unknown columns fall back to 0.0, like EnergyPredictor always did
+    values = [name if name in known else '0.0' for name in outputs]
+    lines.append(f"    return ({', '.join(values)},)")
+    return '\n'.join(lines)
+
+def _compile(outputs, mode, namespace, args=INPUT_COLUMNS):
+    namespace = dict(namespace)
+    exec(compile(_build_source(outputs, mode, args), '<features>', 'exec'), namespace)
+    return namespace['evaluate']
+
+def _index(values, size, key):
+    """Convert a calendar column to table indices, rejecting non-integer or out-of-range values"""
+    index = values.astype(np.intp)
+    if not (np.array_equal(index, values) and (index >= 0).all() and (index < size).all()):
+        raise ValueError(f'{key} values must be integers in [0, {size})')
+    return index
+
+def _build_tables():
+    """Evaluate every tabulated feature over its calendar input's whole domain"""
+    tables = {}
+    for key, names in TABULATED_FEATURES.items():
+        evaluate = _compile(names, 'formula', _COLUMN_NAMESPACE, args=(key,))
+        domain = np.arange(CALENDAR_DOMAINS[key], dtype=np.float64)
+        table = np.empty((len(domain), len(names)), dtype=np.float64)
+        for j, values in enumerate(evaluate(domain)):
+            table[:, j] = values
+        tables[key] = table
+    return tables
+
+# Lookup tables, built once at import: CALENDAR_TABLES[key][value] is the row of
+# TABULATED_FEATURES[key] for that calendar value
+CALENDAR_TABLES = _build_tables()
+
+_ROW_NAMESPACE.update({f'_rows_{key}': [tuple(row) for row in table.tolist()]
+                       for key, table in CALENDAR_TABLES.items()})
+_COLUMN_NAMESPACE.update({f'_table_{key}': table for key, table in CALENDAR_TABLES.items()})
+_COLUMN_NAMESPACE['_index'] = _index
+
+def compile_row_evaluator(feature_cols):
+    """Compile a single-row evaluator returning a tuple of floats in ``feature_cols`` order.
+
+    The returned function takes the INPUT_COLUMNS values as positional
+    arguments (Python numbers; the CALENDAR_DOMAINS inputs must be ints)
+    and does no dict building or array work.
+    """
+    return _compile(list(feature_cols), 'row', _ROW_NAMESPACE)
+
+def compile_column_evaluator(feature_cols):
+    """Compile a vectorized evaluator returning an (N, len(feature_cols)) float64 matrix.
+
+    The returned function takes a mapping of INPUT_COLUMNS name to 1-D array.
+    """
+    feature_cols = list(feature_cols)
+    evaluate = _compile(feature_cols, 'column', _COLUMN_NAMESPACE)
+
+    def evaluate_columns(columns):
+        args = [np.asarray(columns[name], dtype=np.float64) for name in INPUT_COLUMNS]
+        n = len(args[0])
+        X = np.empty((n, len(feature_cols)), dtype=np.float64)
+        for j, values in enumerate(evaluate(*args)):
+            X[:, j] = values
+        return X
+
+    return evaluate_columns
+
+_derive_all = None
+
+def derive_columns(columns):
+    """Compute every FEATURE_SPEC feature for a mapping of input columns.
+
+    Returns a dict of feature name to float64 array, in spec order.
+    """
+    global _derive_all
+    if _derive_all is None:
+        _derive_all = compile_column_evaluator(FEATURE_NAMES)
+    X = _derive_all(columns)
+    return {name: X[:, j] for j, name in enumerate(FEATURE_NAMES)}
+
+def hourly_calendar(start, hours):
+    """Calendar input columns for ``hours`` hourly timestamps from ``start`` (naive datetime or datetime64)"""
+    hours = np.datetime64(start, 'h') + np.arange(hours)
+    days = hours.astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    years = days.astype('datetime64[Y]')
+    # Monday = 0; 1970-01-01 was a Thursday
+    day_of_week = (days.astype(np.int64) + 3) % 7
+    # ISO week: the week of the year that holds this week's Thursday
+    thursdays = days - day_of_week + 3
+    iso_week = (thursdays - thursdays.astype('datetime64[Y]')).astype(np.int64) // 7 + 1
+    return {
+        'Hour': (hours - days).astype(np.float64),
+        'DayOfWeek': day_of_week.astype(np.float64),
+        'Month': (months - years).astype(np.float64) + 1,
+        'DayOfYear': (days - years).astype(np.float64) + 1,
+        'WeekOfYear': iso_week.astype(np.float64),
+        'DayOfMonth': (days - months).astype(np.float64) + 1,
+    }
+
+def feature_definition(name):
+    """Expression of a derived feature followed by those of the features it uses.
+
+    Changes whenever the feature, or anything it is computed from, is redefined.
+    """
+    deps = sorted(dep for dep in set(_dependencies(name)) if dep in _EXPRESSIONS)
+    return _EXPRESSIONS[name] + ''.join(f'; {dep} = {feature_definition(dep)}' for dep in deps)
+
+def _schema_definition(name):
+    """What a model column means: a feature definition, a history statistic or an input"""
+    if name in _EXPRESSIONS:
+        return feature_definition(name)
+    if name in _HISTORY_DEFINITIONS:
+        return f'history: {_HISTORY_DEFINITIONS[name]}'
+    return 'input' if name in INPUT_COLUMNS else None
+
+def feature_schema_hash(feature_cols):
+    """Hash of a model's feature columns and the expressions that produce them.
+
+    Derived columns contribute their full feature_definition(), so redefining
+    a helper feature the model does not use directly changes the hash too.
+    Stored with saved models so serving can refuse a model whose features
+    were defined differently when it was trained.
+    """
+    schema = [[name, _schema_definition(name)] for name in feature_cols]
+    return hashlib.sha256(json.dumps(schema).encode('utf-8')).hexdigest()
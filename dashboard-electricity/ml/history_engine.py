@@ -0,0 +1,277 @@
+"""
+Incremental lag and rolling window features for live readings
+
+HistoryEngine keeps per-building state and takes one hourly reading at a
+time. Each update returns the HISTORY_SPEC features (Energy_Lag_*,
+Energy_Rolling_Mean_*/Std_*, Temp_* and Humidity_*) in O(1). A ring buffer
+holds the last HISTORY_ROWS readings for the lags and for the values leaving
+each window. Every window keeps running statistics: a compensated sum for
+the mean and Welford's mean / sum of squared deviations for the variance.
+
+The add/remove steps are those pandas' rolling mean and var use, so the
+values equal the batch pandas features computed over the same readings.
+Like pandas, missing readings (NaN) are skipped by the windows, and a value
+is NaN until there is enough history.
+
+Those are the features of the row of the last reading. Serving predicts the
+hour after it, so next_hour() shifts the lags by one (Energy_Lag_1 is the
+last reading) and keeps the windows ending at the last reading.
+"""
+
+import copy
+import math
+import threading
+from features import HISTORY_SPEC, HISTORY_ROWS, HISTORY_NAMES
+
+# Readings the engine keeps history for
+SOURCES = ('EnergyConsumption', 'Temperature', 'Humidity')
+
+NAN = float('nan')
+
+class _RollingMean:
+    """pandas roll_mean over a fixed window, one value at a time"""
+
+    def __init__(self, window):
+        self.window = window
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.consecutive_same = 0
+        self.prev_value = None
+
+    def add(self, val):
+        if val != val:
+            return
+        if self.prev_value is None:
+            self.prev_value = val
+        self.nobs += 1
+        y = val - self.compensation_add
+        t = self.sum_x + y
+        self.compensation_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct += 1
+        if val == self.prev_value:
+            self.consecutive_same += 1
+        else:
+            self.consecutive_same = 1
+        self.prev_value = val
+
+    def remove(self, val):
+        if val != val:
+            return
+        self.nobs -= 1
+        y = -val - self.compensation_remove
+        t = self.sum_x + y
+        self.compensation_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+    def value(self):
+        if self.nobs <= 0:
+            return NAN
+        result = self.sum_x / self.nobs
+        if self.consecutive_same >= self.nobs:
+            return self.prev_value
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+        return result
+
+class _RollingStd:
+    """pandas roll_var (ddof=1) over a fixed window with Welford updates, as a standard deviation"""
+
+    def __init__(self, window):
+        self.window = window
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.consecutive_same = 0
+        self.prev_value = None
+
+    def add(self, val):
+        if val != val:
+            return
+        if self.prev_value is None:
+            self.prev_value = val
+        self.nobs += 1
+        if val == self.prev_value:
+            self.consecutive_same += 1
+        else:
+            self.consecutive_same = 1
+        self.prev_value = val
+
+        prev_mean = self.mean_x - self.compensation_add
+        y = val - self.compensation_add
+        t = y - self.mean_x
+        self.compensation_add = t + self.mean_x - y
+        self.mean_x = self.mean_x + t / self.nobs
+        self.ssqdm_x = self.ssqdm_x + (val - prev_mean) * (val - self.mean_x)
+
+    def remove(self, val):
+        if val != val:
+            return
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean_x - self.compensation_remove
+            y = val - self.compensation_remove
+            t = y - self.mean_x
+            self.compensation_remove = t + self.mean_x - y
+            self.mean_x = self.mean_x - t / self.nobs
+            self.ssqdm_x = self.ssqdm_x - (val - prev_mean) * (val - self.mean_x)
+        else:
+            self.mean_x = 0.0
+            self.ssqdm_x = 0.0
+
+    def value(self):
+        if self.nobs <= 1:
+            return NAN
+        if self.consecutive_same >= self.nobs:
+            return 0.0
+        var = self.ssqdm_x / (self.nobs - 1)
+        return math.sqrt(var) if var > 0 else 0.0
+
+class _BuildingHistory:
+    """Ring buffers and window statistics for one building"""
+
+    def __init__(self):
+        # Slot ``count % size`` holds the newest reading
+        self.size = HISTORY_ROWS + 1
+        self.buffers = {source: [NAN] * self.size for source in SOURCES}
+        self.count = 0
+        self.first = {}
+        self.windows = []
+        for name, source, statistic, window in HISTORY_SPEC:
+            if statistic != 'lag':
+                stat = _RollingMean(window) if statistic == 'mean' else _RollingStd(window)
+                self.windows.append((name, source, stat))
+        self.features = None
+        self.filled = None
+        self.next_filled = None
+
+    def _ago(self, source, steps):
+        """Reading ``steps`` updates before the newest, NaN before the first"""
+        if steps >= self.count:
+            return NAN
+        return self.buffers[source][(self.count - 1 - steps) % self.size]
+
+    def update(self, reading):
+        for source in SOURCES:
+            value = float(reading[source])
+            self.buffers[source][self.count % self.size] = value
+            if source not in self.first and value == value:
+                self.first[source] = value
+        self.count += 1
+
+        features = {}
+        for name, source, statistic, window in HISTORY_SPEC:
+            if statistic == 'lag':
+                features[name] = self._ago(source, window)
+        for name, source, stat in self.windows:
+            if self.count > stat.window:
+                stat.remove(self._ago(source, stat.window))
+            stat.add(self._ago(source, 0))
+            features[name] = stat.value()
+
+        self.features = {name: features[name] for name in HISTORY_NAMES}
+        self.filled = self._fill(self.features, self.filled)
+        upcoming = dict(self.features)
+        for name, source, statistic, window in HISTORY_SPEC:
+            if statistic == 'lag':
+                upcoming[name] = self._ago(source, window - 1)
+        self.next_filled = self._fill(upcoming, self.next_filled)
+        return self.features
+
+    def _fill(self, features, previous):
+        """Serving values: forward fill from ``previous`` like create_features, with defaults before any history.
+
+        create_features back-fills leading gaps. For a lag that is the first
+        reading, which is already known; a rolling std with one reading
+        becomes 0.0.
+        """
+        filled = {}
+        for name, source, statistic, window in HISTORY_SPEC:
+            value = features[name]
+            if value != value:
+                if previous is not None and previous[name] == previous[name]:
+                    value = previous[name]
+                elif statistic == 'lag':
+                    value = self.first.get(source, NAN)
+                elif statistic == 'std':
+                    value = 0.0
+            filled[name] = value
+        return filled
+
+class HistoryEngine:
+    """Per-building incremental history features, safe to share between request threads"""
+
+    def __init__(self):
+        self._buildings = {}
+        self._lock = threading.Lock()
+
+    def update(self, building_id, reading):
+        """Add one hourly reading ({EnergyConsumption, Temperature, Humidity}) for ``building_id``.
+
+        Returns the HISTORY_SPEC features after this reading, NaN where pandas would give NaN.
+        """
+        with self._lock:
+            history = self._buildings.get(building_id)
+            if history is None:
+                history = self._buildings[building_id] = _BuildingHistory()
+            return dict(history.update(reading))
+
+    def latest(self, building_id, filled=True):
+        """Features after the building's last reading (NaN-filled for serving), or None"""
+        with self._lock:
+            history = self._buildings.get(building_id)
+            if history is None or history.features is None:
+                return None
+            return dict(history.filled if filled else history.features)
+
+    def fork(self, building_id):
+        """Independent engine holding a copy of ``building_id``'s history, or None without history.
+
+        Updates to the fork (e.g. predicted readings) never reach this engine.
+        """
+        with self._lock:
+            history = self._buildings.get(building_id)
+            if history is None or history.features is None:
+                return None
+            fork = HistoryEngine()
+            fork._buildings[building_id] = copy.deepcopy(history)
+            return fork
+
+    def next_hour(self, building_id):
+        """NaN-filled features for the hour after the building's last reading, or None.
+
+        Lag k is the reading k - 1 steps before the last one; windows end at the last reading.
+        """
+        with self._lock:
+            history = self._buildings.get(building_id)
+            if history is None or history.features is None:
+                return None
+            return dict(history.next_filled)
+
+    def readings(self, building_id):
+        """Number of readings seen for ``building_id``"""
+        with self._lock:
+            history = self._buildings.get(building_id)
+            return history.count if history is not None else 0
+
+    def buildings(self):
+        with self._lock:
+            return list(self._buildings)
+
+    def reset(self, building_id=None):
+        """Forget one building's history, or every building's"""
+        with self._lock:
+            if building_id is None:
+                self._buildings.clear()
+            else:
+                self._buildings.pop(building_id, None)
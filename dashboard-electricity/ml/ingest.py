@@ -0,0 +1,372 @@
+"""
+Streaming ingestion of the energy CSV into an on-disk column store
+
+The CSV is read in chunks with compact dtypes: categoricals for the string
+columns and float32 for the measurements. Each chunk gets the same features
+as train.create_features. The last HISTORY_ROWS raw rows of a chunk are
+prepended to the next one, so lags and rolling windows see across chunk
+boundaries. Forward fill continues from the last row written. Memory is
+bounded by the chunk size rather than the file size.
+
+The store is a directory with one raw binary file per column plus a
+manifest.json (dtype of each column and the row count):
+
+    data/energy_features/
+        manifest.json
+        Temperature.bin
+        ...
+
+open_column_store() memory-maps the columns read-only. The store is written
+to a temporary directory and renamed into place once complete.
+
+Usage:
+    python ingest.py [--csv data/Energy_consumption.csv] [--out data/energy_features] [--chunksize 100000]
+"""
+
+import os
+import json
+import shutil
+import argparse
+import numpy as np
+import pandas as pd
+from features import INPUT_COLUMNS, FEATURE_NAMES, HISTORY_SPEC, HISTORY_ROWS, derive_columns
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CSV = os.path.join(PROJECT_ROOT, 'data', 'Energy_consumption.csv')
+DEFAULT_STORE = os.path.join(PROJECT_ROOT, 'data', 'energy_features')
+
+# String columns and their values, in code order (Monday = 0, Off/No = 0)
+CATEGORIES = {
+    'DayOfWeek': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+    'HVACUsage': ['Off', 'On'],
+    'LightingUsage': ['Off', 'On'],
+    'Holiday': ['No', 'Yes'],
+}
+
+CSV_DTYPES = {
+    'Temperature': 'float32',
+    'Humidity': 'float32',
+    'SquareFootage': 'float32',
+    'Occupancy': 'float32',
+    'RenewableEnergy': 'float32',
+    'EnergyConsumption': 'float32',
+    **{col: pd.CategoricalDtype(values) for col, values in CATEGORIES.items()},
+}
+
+# Columns encode_columns adds from Timestamp
+CALENDAR_COLUMNS = ('Hour', 'Month', 'DayOfYear', 'WeekOfYear', 'DayOfMonth')
+
+# Rows per block when build_lean_features computes derived features
+LEAN_BLOCK_ROWS = 1 << 18
+
+def _codes(series, values):
+    """Position of each value in ``values`` (NaN when missing or unknown)"""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(pd.CategoricalDtype(values))
+    codes = series.cat.codes
+    return codes.where(codes >= 0)
+
+def encode_columns(df):
+    """Calendar columns from Timestamp and integer codes for the string columns (in place)"""
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+    # Keep in sync with CALENDAR_COLUMNS
+    df['Hour'] = df['Timestamp'].dt.hour
+    df['Month'] = df['Timestamp'].dt.month
+    df['DayOfYear'] = df['Timestamp'].dt.dayofyear
+    df['WeekOfYear'] = df['Timestamp'].dt.isocalendar().week.astype(int)
+    df['DayOfMonth'] = df['Timestamp'].dt.day
+
+    for col, values in CATEGORIES.items():
+        df[col] = _codes(df[col], values)
+    return df
+
+def history_column(df, source, statistic, window):
+    """One lag or rolling window feature of ``df[source]``"""
+    series = df[source]
+    if statistic == 'lag':
+        return series.shift(window)
+    rolling = series.rolling(window, min_periods=1)
+    return rolling.mean() if statistic == 'mean' else rolling.std()
+
+def add_history_features(df):
+    """Lag and rolling window features (used by the LSTM)"""
+    history = {name: history_column(df, source, statistic, window)
+               for name, source, statistic, window in HISTORY_SPEC}
+    return pd.concat([df, pd.DataFrame(history, index=df.index)], axis=1)
+
+def feature_columns(raw_columns):
+    """Column order of build_features for a CSV with ``raw_columns``"""
+    return (list(raw_columns) + [c for c in CALENDAR_COLUMNS if c not in raw_columns]
+            + list(FEATURE_NAMES) + [name for name, *_ in HISTORY_SPEC])
+
+def read_sorted_csv(csv_path):
+    """Read the whole raw CSV and sort it by Timestamp"""
+    df = pd.read_csv(csv_path)
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+    return df.sort_values('Timestamp').reset_index(drop=True)
+
+def build_features(df):
+    """Every model feature for a time-ordered raw frame, before NaN filling"""
+    df = encode_columns(df.copy())
+
+    # Cyclical, boolean and interaction features from the shared feature spec
+    inputs = {col: df[col].to_numpy(dtype=np.float64) for col in INPUT_COLUMNS}
+    derived = pd.DataFrame(derive_columns(inputs), index=df.index)
+    df = pd.concat([df, derived], axis=1)
+
+    return add_history_features(df)
+
+def compact_dtype(values):
+    """Smallest dtype holding ``values`` exactly: int8/int16 for small integers, else float32"""
+    if values.dtype.kind in 'iub':
+        low, high = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+    elif len(values) and np.isfinite(values).all() and np.array_equal(values, np.rint(values)):
+        low, high = float(values.min()), float(values.max())
+    else:
+        return np.dtype(np.float32)
+    for dtype in (np.int8, np.int16):
+        if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.float32)
+
+def fill_gaps(values):
+    """Forward then backward fill the NaNs of a float array in place, like DataFrame.ffill().bfill()"""
+    missing = np.isnan(values)
+    if not missing.any():
+        return values
+    # Index of the last valid value at or before each row (0 before the first one)
+    last_valid = np.where(missing, 0, np.arange(len(values)))
+    np.maximum.accumulate(last_valid, out=last_valid)
+    values[missing] = values[last_valid[missing]]
+    # Only NaNs before the first valid value remain
+    leading = np.isnan(values)
+    if not leading.all():
+        values[:np.argmax(~leading)] = values[np.argmax(~leading)]
+    return values
+
+def duplicate_columns(columns, keep=('Timestamp', 'EnergyConsumption')):
+    """Names of columns equal to an earlier column of the same dtype, except ``keep``"""
+    seen = {}
+    duplicates = []
+    for name, values in columns.items():
+        if name in keep:
+            continue
+        # Cheap fingerprint first; equal fingerprints are compared in full
+        key = (values.dtype.str, values[::max(1, len(values) // 64)].tobytes())
+        if any(np.array_equal(values, columns[other], equal_nan=values.dtype.kind == 'f')
+               for other in seen.get(key, ())):
+            duplicates.append(name)
+        else:
+            seen.setdefault(key, []).append(name)
+    return duplicates
+
+def compact_frame(columns):
+    """DataFrame of compacted columns without exact duplicates, built without copying"""
+    for name, values in columns.items():
+        if values.dtype.kind in 'iubf':
+            columns[name] = values.astype(compact_dtype(values), copy=False)
+    for name in duplicate_columns(columns):
+        del columns[name]
+    # copy=False keeps one array per column instead of consolidating them into a copy
+    return pd.DataFrame(columns, copy=False)
+
+def build_lean_features(df, history=True, block_rows=LEAN_BLOCK_ROWS):
+    """NaN-filled model features for a time-ordered raw frame, in compact dtypes.
+
+    Values equal build_features() followed by ffill/bfill, stored as float32,
+    or int8/int16 where that is exact. Exact duplicate columns are dropped,
+    and the lag/rolling features are skipped unless ``history``. Derived
+    features are computed ``block_rows`` rows at a time, so their float64
+    temporaries stay small.
+    """
+    n = len(df)
+    timestamps = pd.DatetimeIndex(pd.to_datetime(df['Timestamp']))
+    columns = {}
+    for col in df.columns:
+        if col == 'Timestamp':
+            columns[col] = timestamps.to_numpy()
+        elif col in CATEGORIES:
+            columns[col] = _codes(df[col], CATEGORIES[col]).to_numpy(dtype=np.float32, na_value=np.nan)
+        else:
+            columns[col] = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+    calendar = {
+        'Hour': timestamps.hour, 'Month': timestamps.month, 'DayOfYear': timestamps.dayofyear,
+        'WeekOfYear': timestamps.isocalendar().week, 'DayOfMonth': timestamps.day,
+    }
+    for col in CALENDAR_COLUMNS:
+        if col not in columns:
+            columns[col] = np.asarray(calendar[col], dtype=np.int16)
+
+    # Derived features from float64 inputs, exactly as build_features computes them
+    def source(col):
+        if col in CATEGORIES or col in CALENDAR_COLUMNS:
+            return columns[col]
+        return df[col].to_numpy()
+    sources = {col: source(col) for col in INPUT_COLUMNS}
+    derived = {name: np.empty(n, dtype=np.float32) for name in FEATURE_NAMES}
+    for start in range(0, n, block_rows):
+        block = {col: np.asarray(values[start:start + block_rows], dtype=np.float64) for col, values in sources.items()}
+        for name, values in derive_columns(block).items():
+            derived[name][start:start + block_rows] = values
+    columns.update(derived)
+
+    if history:
+        for name, col, statistic, window in HISTORY_SPEC:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            if statistic == 'lag':
+                lagged = np.full(n, np.nan, dtype=np.float32)
+                if window < n:
+                    lagged[window:] = values[:n - window]
+                columns[name] = lagged
+            else:
+                rolling = pd.Series(values).rolling(window, min_periods=1)
+                columns[name] = (rolling.mean() if statistic == 'mean' else rolling.std()).to_numpy(np.float32)
+
+    for name, values in columns.items():
+        if values.dtype.kind == 'f':
+            fill_gaps(values)
+    return compact_frame(columns)
+
+def compact_features(df, history=True):
+    """Compact dtypes and no duplicate columns for an already built feature frame (e.g. from the cache)"""
+    history_names = {name for name, *_ in HISTORY_SPEC}
+    return compact_frame({col: df[col].to_numpy() for col in df.columns if history or col not in history_names})
+
+def read_csv_chunks(csv_path, chunksize):
+    """Read the raw CSV lazily, ``chunksize`` rows at a time, with compact dtypes"""
+    return pd.read_csv(csv_path, dtype=CSV_DTYPES, parse_dates=['Timestamp'], chunksize=chunksize)
+
+def stream_features(csv_path, chunksize=100_000):
+    """Yield NaN-filled feature frames for a time-ordered CSV, one per chunk.
+
+    Concatenated, the frames equal create_features() on the whole file
+    (computed from float32 inputs). The CSV must already be sorted by
+    Timestamp, since a stream cannot be sorted.
+    """
+    if chunksize <= HISTORY_ROWS:
+        raise ValueError(f'chunksize must be larger than {HISTORY_ROWS} rows')
+    return stream_chunk_features(read_csv_chunks(csv_path, chunksize))
+
+def stream_chunk_features(chunks):
+    """Yield NaN-filled feature frames for consecutive time-ordered raw frames, one per frame"""
+    context = None
+    last_row = None
+    for chunk in chunks:
+        timestamps = chunk['Timestamp']
+        if not timestamps.is_monotonic_increasing or (context is not None and
+                                                       timestamps.iloc[0] < context['Timestamp'].iloc[-1]):
+            raise ValueError('Streaming ingestion needs rows sorted by Timestamp')
+
+        frame = chunk if context is None else pd.concat([context, chunk], ignore_index=True)
+        features = build_features(frame).iloc[len(frame) - len(chunk):]
+
+        if last_row is None:
+            features = features.ffill().bfill()
+        else:
+            features = pd.concat([last_row, features]).ffill().iloc[1:]
+
+        context = frame.iloc[-HISTORY_ROWS:]
+        last_row = features.iloc[[-1]]
+        yield features.reset_index(drop=True)
+
+def _storage_dtype(dtype):
+    """Compact on-disk dtype for a feature column"""
+    if np.issubdtype(dtype, np.floating):
+        return np.dtype('float32')
+    return np.dtype(dtype)
+
+class ColumnStoreWriter:
+    """Append frames to a new column store, published atomically by close()"""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f'{path}.tmp'
+        if os.path.exists(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path)
+        self.columns = None
+        self.rows = 0
+        self._files = {}
+
+    def append(self, frame):
+        if self.columns is None:
+            self.columns = {name: _storage_dtype(frame[name].dtype) for name in frame.columns}
+            self._files = {name: open(os.path.join(self.tmp_path, f'{name}.bin'), 'wb') for name in self.columns}
+        elif list(frame.columns) != list(self.columns):
+            raise ValueError('All frames in a column store must have the same columns')
+
+        for name, dtype in self.columns.items():
+            np.ascontiguousarray(frame[name].to_numpy(dtype=dtype)).tofile(self._files[name])
+        self.rows += len(frame)
+
+    def close(self, **metadata):
+        """Write the manifest and move the finished store into place. Returns the manifest."""
+        for f in self._files.values():
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'rows': self.rows,
+            'columns': {name: dtype.str for name, dtype in (self.columns or {}).items()},
+            **metadata,
+        }
+        with open(os.path.join(self.tmp_path, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.rename(self.tmp_path, self.path)
+        return manifest
+
+def ingest_csv(csv_path=DEFAULT_CSV, store_path=DEFAULT_STORE, chunksize=100_000):
+    """Stream ``csv_path`` through the feature pipeline into a column store"""
+    return write_feature_store(stream_features(csv_path, chunksize), store_path,
+                               source=os.path.abspath(csv_path), chunksize=chunksize)
+
+def write_feature_store(feature_frames, store_path, **metadata):
+    """Append feature frames to a new column store; returns its manifest"""
+    writer = ColumnStoreWriter(store_path)
+    for features in feature_frames:
+        writer.append(features)
+    return writer.close(**metadata)
+
+def read_store_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported column store format: {manifest.get('format_version')}")
+    return manifest
+
+def open_column_store(path, columns=None):
+    """Memory-map the columns of a store read-only. Returns {name: array}."""
+    manifest = read_store_manifest(path)
+    rows = manifest['rows']
+    names = list(manifest['columns']) if columns is None else list(columns)
+
+    arrays = {}
+    for name in names:
+        dtype = np.dtype(manifest['columns'][name])
+        if rows == 0:
+            arrays[name] = np.empty(0, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(os.path.join(path, f'{name}.bin'), dtype=dtype, mode='r', shape=(rows,))
+    return arrays
+
+def load_column_store(path, columns=None):
+    """Read a column store (or some of its columns) into a DataFrame"""
+    return pd.DataFrame(open_column_store(path, columns))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stream the energy CSV into a feature column store')
+    parser.add_argument('--csv', default=DEFAULT_CSV, help='time-ordered input CSV')
+    parser.add_argument('--out', default=DEFAULT_STORE, help='column store directory to write')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='rows per chunk')
+    args = parser.parse_args()
+
+    manifest = ingest_csv(args.csv, args.out, args.chunksize)
+    print(f"Wrote {manifest['rows']} rows x {len(manifest['columns'])} columns to {args.out}")
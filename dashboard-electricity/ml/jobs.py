@@ -0,0 +1,432 @@
+"""
+Background jobs: retraining and bulk scoring off the request path
+
+JobRunner accepts 'train' and 'score' jobs, queues them and runs at most
+ML_JOB_WORKERS (default 1) at a time. The limit holds across every process
+sharing the database (e.g. each gunicorn worker has a runner): a runner
+claims a slot in SQLite before starting a job, and only one train job runs
+at a time, since each one writes a bundle and swaps models/CURRENT.
+Every job runs in its own child
+process (`python jobs.py --run <id>`) that lowers its own CPU priority
+(ML_JOB_NICE, default 10), so training and large scoring runs never share
+threads, the GIL or the prediction cache with /predict. The runner's
+threads only start children and wait for them. Each child leads its own
+process group: cancelling a job stops the fit pools and other processes
+it started as well.
+
+Job state lives in a SQLite database (ML_JOBS_DB, default jobs/jobs.db
+next to this file), which every process of the service shares. The child
+reports progress into it, so any worker can answer a status request. Score
+inputs and results are JSON files next to the database.
+
+    runner = JobRunner()
+    job = runner.submit('score', {'records': [...]})
+    runner.store.get(job['id'])['progress']
+
+Jobs left queued or running by a process that has since died are marked
+failed when a runner starts.
+"""
+
+import os
+import sys
+import json
+import uuid
+import sqlite3
+import logging
+import signal
+import argparse
+import threading
+import time
+import subprocess
+from queue import Queue, Full
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPES = ('train', 'score')
+FINISHED = ('succeeded', 'failed', 'cancelled')
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(ML_DIR, 'jobs', 'jobs.db')
+# Records scored per model call in a score job; progress is reported per chunk
+SCORE_CHUNK = 10_000
+# Largest chunkSize a score job may ask for
+MAX_SCORE_CHUNK = 100_000
+# Most jobs one listing returns
+MAX_LIST_LIMIT = 500
+# Seconds between attempts to claim a slot while other jobs hold them all
+CLAIM_INTERVAL = 0.5
+# Seconds a cancelled job's processes get to exit after SIGTERM before SIGKILL
+CANCEL_GRACE_SECONDS = 10
+
+# Train job parameters and the train.py environment variables they set
+TRAIN_OPTIONS = {
+    'modelFamilies': 'TRAIN_MODEL_FAMILIES',
+    'lean': 'TRAIN_LEAN_FEATURES',
+    'tune': 'TRAIN_TUNE',
+    'tuneSeconds': 'TRAIN_TUNE_SECONDS',
+    'screen': 'TRAIN_SCREEN',
+    'screenTopK': 'TRAIN_SCREEN_TOP_K',
+    'cores': 'TRAIN_CORES',
+    'plots': 'TRAIN_PLOTS',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    params TEXT,
+    result TEXT,
+    error TEXT,
+    owner_pid INTEGER,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+)
+"""
+
+def _now():
+    return datetime.now().isoformat()
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobStore:
+    """Job rows in SQLite, safe to share between threads and processes"""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('ML_JOBS_DB', DEFAULT_DB)
+        self.directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(self.directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(SCHEMA)
+
+    def _connect(self):
+        # A connection per operation: sqlite3 connections must not cross threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def file(self, job_id, kind):
+        """Path of a job's 'input', 'result' or 'log' file"""
+        return os.path.join(self.directory, f'{job_id}.{kind}' + ('.log' if kind == 'log' else '.json'))
+
+    def create(self, job_type, params):
+        job_id = uuid.uuid4().hex[:16]
+        with self._connect() as conn:
+            conn.execute('INSERT INTO jobs (id, type, status, message, params, owner_pid, created_at) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (job_id, job_type, 'queued', 'Waiting for a worker', json.dumps(params), os.getpid(), _now()))
+        return self.get(job_id)
+
+    def update(self, job_id, **fields):
+        if 'result' in fields:
+            fields['result'] = json.dumps(fields['result'])
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        with self._connect() as conn:
+            conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*fields.values(), job_id))
+
+    def get(self, job_id):
+        """The job as a dict, or None"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def list(self, limit=50):
+        """Most recent jobs first"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,)).fetchall()
+        return [self._job(row) for row in rows]
+
+    def claim(self, job_id, max_running):
+        """Mark a queued job running if a slot is free in every process sharing the database.
+
+        A slot is free while fewer than ``max_running`` jobs of live processes
+        run, and a train job also waits for any other train job. Returns
+        'claimed', 'busy' or 'skip' (the job is gone or no longer queued).
+        """
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            # Take the write lock before reading, so two runners cannot claim the same slot
+            conn.execute('BEGIN IMMEDIATE')
+            job = conn.execute('SELECT type, status FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if job is None or job['status'] != 'queued':
+                conn.execute('COMMIT')
+                return 'skip'
+            running = [row['type'] for row in conn.execute(
+                "SELECT type, owner_pid FROM jobs WHERE status = 'running'") if _pid_alive(row['owner_pid'])]
+            if len(running) >= max_running or (job['type'] == 'train' and 'train' in running):
+                conn.execute('COMMIT')
+                return 'busy'
+            conn.execute("UPDATE jobs SET status = 'running', message = 'Starting', started_at = ?, owner_pid = ? "
+                         "WHERE id = ?", (_now(), os.getpid(), job_id))
+            conn.execute('COMMIT')
+            return 'claimed'
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def fail_orphans(self):
+        """Mark jobs whose owning process is gone as failed. Returns their ids."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, owner_pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        orphans = [row['id'] for row in rows if not _pid_alive(row['owner_pid'])]
+        for job_id in orphans:
+            self.update(job_id, status='failed', error='The service stopped before the job finished',
+                        finished_at=_now())
+        return orphans
+
+    @staticmethod
+    def _job(row):
+        job = dict(row)
+        job['params'] = json.loads(job['params']) if job['params'] else {}
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        del job['owner_pid']
+        return job
+
+class JobRunner:
+    """Queue of jobs run in child processes by a fixed number of threads"""
+
+    def __init__(self, store=None, workers=None, queue_size=None, on_finished=None):
+        self.store = store or JobStore()
+        self.workers = max(1, int(workers or os.environ.get('ML_JOB_WORKERS', 1)))
+        self._queue = Queue(maxsize=int(queue_size or os.environ.get('ML_JOB_QUEUE', 16)))
+        self._on_finished = on_finished
+        self._processes = {}
+        # Running jobs terminated by cancel()
+        self._cancelled = set()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        """Start the worker threads (once); fails jobs orphaned by a previous process"""
+        with self._lock:
+            if self._threads:
+                return self
+            orphans = self.store.fail_orphans()
+            if orphans:
+                logger.warning(f"Marked {len(orphans)} interrupted jobs as failed")
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'job-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def submit(self, job_type, params=None):
+        """Queue a job and return it. Raises ValueError for a bad job and queue.Full when the queue is full."""
+        params = dict(params or {})
+        records = params.pop('records', None)
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Job type must be one of {', '.join(JOB_TYPES)}")
+        if job_type == 'score' and (not isinstance(records, list) or not records):
+            raise ValueError('A score job needs a non-empty records list')
+        if job_type == 'score' and 'chunkSize' in params:
+            chunk = params['chunkSize']
+            if isinstance(chunk, bool) or not isinstance(chunk, int) or not 1 <= chunk <= MAX_SCORE_CHUNK:
+                raise ValueError(f'chunkSize must be an integer between 1 and {MAX_SCORE_CHUNK}')
+        if job_type == 'train':
+            unknown = set(params) - set(TRAIN_OPTIONS)
+            if unknown:
+                raise ValueError(f"Unknown train options: {', '.join(sorted(unknown))}")
+
+        self.start()
+        job = self.store.create(job_type, params)
+        if records is not None:
+            with open(self.store.file(job['id'], 'input'), 'w') as f:
+                json.dump(records, f)
+            job['params']['count'] = len(records)
+            self.store.update(job['id'], params=json.dumps(job['params']))
+        # As queued: a worker thread may start it as soon as it is on the queue
+        job = self.store.get(job['id'])
+        try:
+            self._queue.put_nowait(job['id'])
+        except Full:
+            self.store.update(job['id'], status='failed', error='Job queue is full', finished_at=_now())
+            raise
+        return job
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or a job this process is running.
+
+        Returns False if the job does not exist, already finished or runs in another process.
+        """
+        with self._lock:
+            process = self._processes.get(job_id)
+            # The child records its own result just before it exits
+            if process is not None and self.store.get(job_id)['status'] not in FINISHED:
+                self._cancelled.add(job_id)
+                self._kill_group(process.pid, signal.SIGTERM)
+                timer = threading.Timer(CANCEL_GRACE_SECONDS, self._kill_group, (process.pid, signal.SIGKILL))
+                timer.daemon = True
+                timer.start()
+                return True
+            job = self.store.get(job_id)
+            if job is None or job['status'] != 'queued':
+                return False
+            # Whichever runner dequeues it skips it
+            self.store.update(job_id, status='cancelled', message='Cancelled', finished_at=_now())
+            return True
+
+    @staticmethod
+    def _kill_group(pgid, sig):
+        try:
+            os.killpg(pgid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _command(self, job_id):
+        return [sys.executable, os.path.abspath(__file__), '--run', job_id]
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} failed to run: {str(e)}")
+                self.store.update(job_id, status='failed', error=str(e), finished_at=_now())
+            finally:
+                self._queue.task_done()
+
+    def _child_env(self, job):
+        env = dict(os.environ, ML_JOB_ID=job['id'], ML_JOBS_DB=self.store.path, PYTHONUNBUFFERED='1')
+        if job['type'] == 'train':
+            # Nobody looks at the figures of an automated retrain unless asked for
+            env['TRAIN_PLOTS'] = 'none'
+            for option, variable in TRAIN_OPTIONS.items():
+                value = job['params'].get(option)
+                if value is not None:
+                    env[variable] = ('1' if value else '0') if isinstance(value, bool) else str(value)
+        return env
+
+    def _run(self, job_id):
+        waiting = False
+        while True:
+            with self._lock:
+                state = self.store.claim(job_id, self.workers)
+                if state == 'skip':
+                    return
+                if state == 'claimed':
+                    job = self.store.get(job_id)
+                    with open(self.store.file(job_id, 'log'), 'w') as log:
+                        process = subprocess.Popen(
+                            self._command(job_id), cwd=ML_DIR, env=self._child_env(job),
+                            stdout=log, stderr=subprocess.STDOUT, start_new_session=True,
+                        )
+                    self._processes[job_id] = process
+                    break
+                if not waiting:
+                    self.store.update(job_id, message='Waiting for a running job to finish')
+                    waiting = True
+            time.sleep(CLAIM_INTERVAL)
+
+        code = process.wait()
+        with self._lock:
+            del self._processes[job_id]
+            cancelled = job_id in self._cancelled
+            self._cancelled.discard(job_id)
+
+        job = self.store.get(job_id)
+        if cancelled and job['status'] not in FINISHED:
+            self.store.update(job_id, status='cancelled', message='Cancelled', finished_at=_now())
+        elif job['status'] == 'running':
+            # The child records success itself; anything else is a crash
+            self.store.update(job_id, status='failed', finished_at=_now(),
+                              error=f'Job process exited with code {code} (see {self.store.file(job_id, "log")})')
+        job = self.store.get(job_id)
+        logger.info(f"Job {job_id} ({job['type']}) {job['status']}")
+        if self._on_finished is not None:
+            self._on_finished(job)
+
+def report_progress(progress, message):
+    """Record the progress (0-1) of the job this process runs, if any"""
+    job_id, db = os.environ.get('ML_JOB_ID'), os.environ.get('ML_JOBS_DB')
+    if not job_id or not db:
+        return
+    try:
+        JobStore(db).update(job_id, progress=round(float(progress), 3), message=message)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not record job progress: {str(e)}")
+
+def run_train(store, job):
+    """Run train.py in this process and return the bundle it made current"""
+    import runpy
+    from model_bundle import current_bundle_id, current_bundle_dir, read_manifest
+
+    models_dir = os.path.join(ML_DIR, 'models')
+    previous = current_bundle_id(models_dir)
+    try:
+        runpy.run_path(os.path.join(ML_DIR, 'train.py'), run_name='__main__')
+    except SystemExit as e:
+        if e.code:
+            raise RuntimeError('Training failed (see the job log)')
+    bundle_id = current_bundle_id(models_dir)
+    if bundle_id is None or bundle_id == previous:
+        raise RuntimeError('Training finished without writing a new model bundle')
+    manifest = read_manifest(current_bundle_dir(models_dir))
+    return {'bundle_id': bundle_id, 'model_name': manifest.get('model_name'), 'metrics': manifest.get('metrics')}
+
+def run_score(store, job):
+    """Score the job's records in chunks and write them to its result file"""
+    from inference import EnergyPredictor
+
+    with open(store.file(job['id'], 'input')) as f:
+        records = json.load(f)
+    predictor = EnergyPredictor()
+    if not predictor.is_loaded:
+        raise RuntimeError('Model not loaded')
+
+    chunk = int(job['params'].get('chunkSize') or SCORE_CHUNK)
+    output = {}
+    for start in range(0, len(records), chunk):
+        result = predictor.predict_many(records[start:start + chunk])
+        if not result['success']:
+            raise RuntimeError(f"Records {start}-{start + chunk - 1}: {result['error']}")
+        for key in ('predictions', 'confidence', 'lower', 'upper'):
+            if key in result:
+                output.setdefault(key, []).extend(result[key])
+        report_progress(min(start + chunk, len(records)) / len(records),
+                        f'Scored {min(start + chunk, len(records))} of {len(records)} records')
+
+    output.update(success=True, count=len(records), unit='kWh', model_type=predictor.model_name,
+                  bundle_id=predictor.bundle_id, interval_coverage=(predictor.intervals or {}).get('coverage'))
+    with open(store.file(job['id'], 'result'), 'w') as f:
+        json.dump(output, f)
+    os.remove(store.file(job['id'], 'input'))
+    return {'count': len(records), 'bundle_id': predictor.bundle_id}
+
+def run_job(job_id, store=None):
+    """Run a job in this process (the child started by JobRunner) and record its outcome"""
+    nice = int(os.environ.get('ML_JOB_NICE', 10))
+    if nice and hasattr(os, 'nice'):
+        os.nice(nice)
+    store = store or JobStore()
+    job = store.get(job_id)
+    try:
+        result = {'train': run_train, 'score': run_score}[job['type']](store, job)
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {str(e)}")
+        store.update(job_id, status='failed', error=str(e), finished_at=_now())
+        return 1
+    store.update(job_id, status='succeeded', progress=1.0, message='Done', result=result, finished_at=_now())
+    return 0
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    parser = argparse.ArgumentParser(description='Run one background job (started by JobRunner)')
+    parser.add_argument('--run', required=True, metavar='JOB_ID')
+    args = parser.parse_args()
+    sys.exit(run_job(args.run))
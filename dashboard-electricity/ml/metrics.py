@@ -0,0 +1,206 @@
+"""
+In-process runtime metrics in the Prometheus text format
+
+A small stand-in for prometheus_client: counters, gauges and histograms with
+labels, kept per process and rendered by Registry.render() for the /metrics
+endpoint. Updates take a per-metric lock, so threaded servers can share
+them. Collectors add values computed at scrape time, such as the state of
+the model and the prediction cache.
+
+    RELOADS = REGISTRY.counter('energy_reloads_total', 'Model reloads', ['status'])
+    RELOADS.labels('swapped').inc()
+
+The inference core imports this module, so it only uses the standard library.
+"""
+
+import os
+import sys
+import math
+import bisect
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from 10 microseconds (a cached prediction) to 10 s
+DEFAULT_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+def _format_value(value):
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+class _CounterValue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        if amount < 0:
+            raise ValueError('Counters can only go up')
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        return [(name, labels, self.value)]
+
+class _GaugeValue(_CounterValue):
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        self.value = float(value)
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        # Observations per bucket (not cumulative); the last one is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        samples, cumulative = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            samples.append((f'{name}_bucket', labels + [('le', _format_value(bound))], cumulative))
+        samples.append((f'{name}_sum', labels, total))
+        samples.append((f'{name}_count', labels, cumulative))
+        return samples
+
+class Metric:
+    """A named metric with one value per combination of label values"""
+
+    def __init__(self, kind, name, help, labelnames, new_value):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._new_value = new_value
+        self._values = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values, **named):
+        """The value for these label values (positional, or by label name), created on first use"""
+        if named:
+            values = tuple(named[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}')
+        value = self._values.get(key)
+        if value is None:
+            with self._lock:
+                value = self._values.setdefault(key, self._new_value())
+        return value
+
+    def __getattr__(self, attr):
+        # inc()/set()/observe() on a metric without labels
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        if self.labelnames:
+            raise AttributeError(f'{self.name} has labels {self.labelnames}: use .labels(...).{attr}()')
+        return getattr(self._default, attr)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        samples = []
+        for key, value in values:
+            samples.extend(value.samples(self.name, list(zip(self.labelnames, key))))
+        return samples
+
+class Registry:
+    """The metrics of a process, rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} is already registered')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Metric('counter', name, help, labelnames, _CounterValue))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Metric('gauge', name, help, labelnames, _GaugeValue))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        buckets = tuple(sorted(float(b) for b in buckets))
+        return self._register(Metric('histogram', name, help, labelnames, lambda: _HistogramValue(buckets)))
+
+    def add_collector(self, collect):
+        """Register ``collect()``, called on every render.
+
+        It returns (name, kind, help, [(labels dict, value), ...]) tuples.
+        """
+        self._collectors.append(collect)
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+        for collect in list(self._collectors):
+            try:
+                families = list(collect())
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {str(e)}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+def process_rss_bytes():
+    """Resident memory of this process (the peak where the current value is not available)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+# The metrics of this process
+REGISTRY = Registry()
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Versioned model bundles
+
+A bundle is one directory holding everything serving needs from a training run:
+
+    models/bundles/<bundle_id>/
+        manifest.json         format version, feature schema, metrics, checksums
+        estimators.pkl        the fitted model and both scalers, pickled together
+        kernel_weights.npy    folded linear kernel (linear models only, mmap-able)
+        scalers.npz           center and scale of both scalers (centering/scaling scalers only)
+    models/CURRENT            id of the bundle to serve
+
+write_bundle() builds the directory under a temporary name and renames it into
+place, then atomically replaces CURRENT. A reader therefore sees either the
+previous complete bundle or the new complete bundle, never a new model next
+to an old scaler. load_bundle() verifies checksums and the feature schema
+before anything is used. Serving reads the kernel and scaler arrays, and
+unpickles estimators.pkl only for a model without a kernel, to call its
+predict().
+
+Usage:
+    python model_bundle.py convert    Build a bundle from the legacy *.pkl files
+    python model_bundle.py verify     Check the current bundle
+"""
+
+import os
+import sys
+import json
+import pickle
+import shutil
+import hashlib
+import argparse
+import logging
+import threading
+from datetime import datetime, timezone
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from features import INPUT_COLUMNS, FEATURE_NAMES, HISTORY_NAMES, feature_schema_hash
+from uncertainty import validate_intervals
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+BUNDLES_DIR = 'bundles'
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+ESTIMATORS_FILE = 'estimators.pkl'
+KERNEL_FILE = 'kernel_weights.npy'
+SCALERS_FILE = 'scalers.npz'
+
+class BundleError(Exception):
+    """A bundle is missing, incomplete, corrupted or incompatible with this code"""
+
+class ModelBundle:
+    """A loaded, verified model bundle.
+
+    The estimators are unpickled on first use of model, scaler_X or scaler_y.
+    A bundle with a linear kernel is served without them, so serving never
+    has to import sklearn. ``scaler_params`` holds the scalers as arrays
+    ({'x_center', 'x_scale', 'y_center', 'y_scale'}), or None.
+    """
+
+    def __init__(self, path, manifest, linear_kernel, scaler_params=None):
+        self.path = path
+        self.manifest = manifest
+        self.bundle_id = manifest['bundle_id']
+        self.feature_cols = list(manifest['feature_cols'])
+        self.model_name = manifest.get('model_name')
+        self.metrics = manifest.get('metrics') or {}
+        # Conformal prediction interval calibration (uncertainty.py), or None
+        self.intervals = manifest.get('intervals')
+        self.linear_kernel = linear_kernel
+        self.scaler_params = scaler_params
+        self._estimators = None
+        self._lock = threading.Lock()
+
+    def estimators(self):
+        """{'model', 'scaler_X', 'scaler_y'}, unpickled once (checksums were verified by load_bundle)"""
+        with self._lock:
+            if self._estimators is None:
+                with open(os.path.join(self.path, ESTIMATORS_FILE), 'rb') as f:
+                    self._estimators = pickle.load(f)
+            return self._estimators
+
+    @property
+    def model(self):
+        return self.estimators()['model']
+
+    @property
+    def scaler_X(self):
+        return self.estimators().get('scaler_X')
+
+    @property
+    def scaler_y(self):
+        return self.estimators().get('scaler_y')
+
+def _affine_params(scaler, n):
+    """Return (center, scale) arrays for a centering/scaling scaler, or None if unsupported"""
+    if scaler is None:
+        return np.zeros(n), np.ones(n)
+    name = type(scaler).__name__
+    # A disabled step may still have its fitted attribute (StandardScaler
+    # sets mean_ with with_mean=False), but transform() does not apply it
+    if name == 'RobustScaler':
+        center = scaler.center_ if scaler.with_centering else None
+        scale = scaler.scale_ if scaler.with_scaling else None
+    elif name == 'StandardScaler':
+        center = scaler.mean_ if scaler.with_mean else None
+        scale = scaler.scale_ if scaler.with_std else None
+    else:
+        return None
+    center = np.zeros(n) if center is None else np.asarray(center, dtype=np.float64).ravel()
+    scale = np.ones(n) if scale is None else np.asarray(scale, dtype=np.float64).ravel()
+    if center.shape != (n,) or scale.shape != (n,):
+        return None
+    return center, scale
+
+def scaler_arrays(scaler_X, scaler_y, n_features):
+    """Both scalers as {'x_center', 'x_scale', 'y_center', 'y_scale'} arrays, or None if either is unsupported"""
+    x_params = _affine_params(scaler_X, n_features)
+    y_params = _affine_params(scaler_y, 1)
+    if x_params is None or y_params is None:
+        return None
+    return {'x_center': x_params[0], 'x_scale': x_params[1], 'y_center': y_params[0], 'y_scale': y_params[1]}
+
+def fold_linear_kernel(model, scaler_X, scaler_y, n_features):
+    """Fold scaler_X, a linear model and scaler_y into (weights, bias) so y = x @ weights + bias.
+
+    Returns None when the model or scalers are not affine; those models
+    are served through the generic sklearn path instead.
+    """
+    if not type(model).__module__.startswith('sklearn.linear_model'):
+        return None
+    coef = getattr(model, 'coef_', None)
+    intercept = getattr(model, 'intercept_', None)
+    if coef is None or intercept is None:
+        return None
+
+    coef = np.asarray(coef, dtype=np.float64).ravel()
+    intercept = np.asarray(intercept, dtype=np.float64).ravel()
+    x_params = _affine_params(scaler_X, n_features)
+    y_params = _affine_params(scaler_y, 1)
+    if coef.shape != (n_features,) or intercept.shape != (1,) or x_params is None or y_params is None:
+        return None
+
+    (x_center, x_scale), (y_center, y_scale) = x_params, y_params
+    scaled_coef = coef / x_scale
+    weights = np.ascontiguousarray(scaled_coef * y_scale[0], dtype=np.float64)
+    bias = float((intercept[0] - scaled_coef @ x_center) * y_scale[0] + y_center[0])
+    return weights, bias
+
+def kernel_matches(kernel, model, scaler_X, scaler_y, n_features, rows=16):
+    """Whether a folded kernel predicts what the model and scalers predict, on random rows"""
+    weights, bias = kernel
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(rows, n_features))
+    params = _affine_params(scaler_X, n_features)
+    if params is not None:
+        center, scale = params
+        X = center + X * scale
+    scaled = scaler_X.transform(X) if scaler_X is not None else X
+    expected = np.asarray(model.predict(scaled), dtype=np.float64).reshape(-1, 1)
+    if scaler_y is not None:
+        expected = scaler_y.inverse_transform(expected)
+    return bool(np.allclose(X @ weights + bias, expected.ravel(), rtol=1e-6, atol=1e-6))
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _fsync_file(path):
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+
+def _fsync_dir(path):
+    # Directory fsync makes renames durable; not available on Windows
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def _to_builtin(value):
+    """Convert NumPy scalars in metrics to plain JSON types"""
+    if isinstance(value, dict):
+        return {k: _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (np.floating, np.integer)):
+        return value.item()
+    return value
+
+def unknown_features(feature_cols):
+    """Feature columns the shared feature spec cannot produce"""
+    known = set(INPUT_COLUMNS) | set(FEATURE_NAMES) | set(HISTORY_NAMES)
+    return [col for col in feature_cols if col not in known]
+
+def write_bundle(models_dir, model, scaler_X, scaler_y, feature_cols, model_name, metrics=None, keep=3,
+                 intervals=None):
+    """Write a new bundle and make it current. Returns the bundle directory."""
+    feature_cols = list(feature_cols)
+    bundles_root = os.path.join(models_dir, BUNDLES_DIR)
+    os.makedirs(bundles_root, exist_ok=True)
+
+    missing = unknown_features(feature_cols)
+    if missing:
+        logger.warning(f"Bundle features not produced by features.py, serving will refuse it: {missing}")
+
+    created_at = datetime.now(timezone.utc)
+    estimators = pickle.dumps({'model': model, 'scaler_X': scaler_X, 'scaler_y': scaler_y})
+    intervals = _to_builtin(intervals) if intervals else None
+    # The id hashes everything that changes served results
+    digest = hashlib.sha256(estimators)
+    if intervals:
+        digest.update(json.dumps(intervals, sort_keys=True).encode('utf-8'))
+    bundle_id = f"{created_at.strftime('%Y%m%dT%H%M%SZ')}-{digest.hexdigest()[:8]}"
+
+    tmp_dir = os.path.join(bundles_root, f'.tmp-{bundle_id}')
+    final_dir = os.path.join(bundles_root, bundle_id)
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    files = {}
+
+    estimators_path = os.path.join(tmp_dir, ESTIMATORS_FILE)
+    with open(estimators_path, 'wb') as f:
+        f.write(estimators)
+
+    kernel = fold_linear_kernel(model, scaler_X, scaler_y, len(feature_cols))
+    if kernel is not None and not kernel_matches(kernel, model, scaler_X, scaler_y, len(feature_cols)):
+        logger.warning("Folded linear kernel does not match the model, serving through sklearn instead")
+        kernel = None
+    kernel_info = None
+    if kernel is not None:
+        weights, bias = kernel
+        np.save(os.path.join(tmp_dir, KERNEL_FILE), weights)
+        kernel_info = {'weights': KERNEL_FILE, 'bias': bias}
+
+    scalers = scaler_arrays(scaler_X, scaler_y, len(feature_cols))
+    if scalers is not None:
+        np.savez(os.path.join(tmp_dir, SCALERS_FILE), **scalers)
+
+    for name in os.listdir(tmp_dir):
+        path = os.path.join(tmp_dir, name)
+        _fsync_file(path)
+        files[name] = {'sha256': _sha256(path), 'bytes': os.path.getsize(path)}
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'bundle_id': bundle_id,
+        'created_at': created_at.isoformat(),
+        'model_name': model_name,
+        'model_class': f'{type(model).__module__}.{type(model).__name__}',
+        'feature_cols': feature_cols,
+        'feature_schema': feature_schema_hash(feature_cols),
+        'metrics': _to_builtin(metrics or {}),
+        'kernel': kernel_info,
+        'scalers': SCALERS_FILE if scalers is not None else None,
+        'intervals': intervals,
+        'files': files,
+    }
+    manifest_path = os.path.join(tmp_dir, MANIFEST_FILE)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    _fsync_dir(tmp_dir)
+
+    # The bundle only becomes visible once it is complete. The id embeds a hash
+    # of the estimators, so an existing directory already holds this exact bundle.
+    if os.path.exists(final_dir):
+        shutil.rmtree(tmp_dir)
+    else:
+        os.rename(tmp_dir, final_dir)
+        _fsync_dir(bundles_root)
+
+    current_tmp = os.path.join(models_dir, f'{CURRENT_FILE}.tmp')
+    with open(current_tmp, 'w') as f:
+        f.write(bundle_id + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(current_tmp, os.path.join(models_dir, CURRENT_FILE))
+    _fsync_dir(models_dir)
+
+    prune_bundles(models_dir, keep=keep)
+    logger.info(f"Model bundle {bundle_id} written to {final_dir}")
+    return final_dir
+
+def prune_bundles(models_dir, keep=3):
+    """Delete all but the newest ``keep`` bundles, never touching the current one"""
+    bundles_root = os.path.join(models_dir, BUNDLES_DIR)
+    current = current_bundle_id(models_dir)
+    bundle_ids = sorted(name for name in os.listdir(bundles_root) if not name.startswith('.'))
+    for bundle_id in bundle_ids[:-keep] if keep > 0 else bundle_ids:
+        if bundle_id != current:
+            shutil.rmtree(os.path.join(bundles_root, bundle_id), ignore_errors=True)
+
+def current_bundle_id(models_dir):
+    """Id of the bundle CURRENT points to, or None when there is no bundle"""
+    try:
+        with open(os.path.join(models_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def current_bundle_dir(models_dir):
+    """Directory of the current bundle, or None when there is no bundle"""
+    bundle_id = current_bundle_id(models_dir)
+    if bundle_id is None:
+        return None
+    return os.path.join(models_dir, BUNDLES_DIR, bundle_id)
+
+def read_manifest(bundle_dir):
+    """Read and sanity-check a bundle manifest"""
+    try:
+        with open(os.path.join(bundle_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise BundleError(f"Bundle has no manifest: {bundle_dir}")
+    except json.JSONDecodeError as e:
+        raise BundleError(f"Bundle manifest is corrupted: {str(e)}")
+
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise BundleError(f"Unsupported bundle format version: {manifest.get('format_version')}")
+    return manifest
+
+def verify_bundle(bundle_dir, manifest):
+    """Check file checksums and the feature schema against this code"""
+    for name, info in manifest['files'].items():
+        path = os.path.join(bundle_dir, name)
+        if not os.path.exists(path):
+            raise BundleError(f"Bundle file missing: {name}")
+        if _sha256(path) != info['sha256']:
+            raise BundleError(f"Bundle file checksum mismatch: {name}")
+
+    feature_cols = manifest['feature_cols']
+    missing = unknown_features(feature_cols)
+    if missing:
+        raise BundleError(f"Bundle uses features this code cannot produce: {missing}")
+    if feature_schema_hash(feature_cols) != manifest['feature_schema']:
+        raise BundleError("Feature definitions changed since this bundle was trained; retrain the model")
+    if manifest.get('intervals') is not None:
+        try:
+            validate_intervals(manifest['intervals'])
+        except ValueError as e:
+            raise BundleError(str(e))
+
+def load_bundle(bundle_dir):
+    """Load and verify a bundle. Raises BundleError if it cannot be served safely."""
+    manifest = read_manifest(bundle_dir)
+    verify_bundle(bundle_dir, manifest)
+
+    linear_kernel = None
+    kernel = manifest.get('kernel')
+    if kernel:
+        # Read-only memory map: worker processes share the same pages
+        weights = np.load(os.path.join(bundle_dir, kernel['weights']), mmap_mode='r')
+        if weights.shape != (len(manifest['feature_cols']),) or weights.dtype != np.float64:
+            raise BundleError(f"Kernel weights have shape {weights.shape}, expected ({len(manifest['feature_cols'])},)")
+        linear_kernel = (weights, float(kernel['bias']))
+
+    scaler_params = None
+    if manifest.get('scalers'):
+        n = len(manifest['feature_cols'])
+        with np.load(os.path.join(bundle_dir, manifest['scalers']), allow_pickle=False) as arrays:
+            scaler_params = {name: np.asarray(arrays[name], dtype=np.float64)
+                             for name in ('x_center', 'x_scale', 'y_center', 'y_scale')}
+        shapes = {name: values.shape for name, values in scaler_params.items()}
+        if shapes != {'x_center': (n,), 'x_scale': (n,), 'y_center': (1,), 'y_scale': (1,)}:
+            raise BundleError(f"Scaler arrays have shapes {shapes}, expected ({n},) and (1,)")
+
+    return ModelBundle(bundle_dir, manifest, linear_kernel, scaler_params)
+
+def convert_legacy(models_dir, model_name='Ridge Regression'):
+    """Build a bundle from the legacy model/scaler/feature_cols pickles"""
+    def load(name):
+        path = os.path.join(models_dir, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    model = load('electricity_consumption_models.pkl')
+    if model is None:
+        raise BundleError("Legacy model file electricity_consumption_models.pkl not found")
+
+    feature_cols = load('feature_cols.pkl')
+    if feature_cols is None:
+        raise BundleError("Legacy feature_cols.pkl not found")
+
+    # Carry over the recorded test metrics when model_results.pkl is readable
+    metrics = None
+    try:
+        results = load('model_results.pkl') or {}
+        if results.get('best_model') == model_name:
+            metrics = {k: v for k, v in results['all_results'][model_name].items()
+                       if k not in ('model', 'history', 'model_name')}
+    except Exception as e:
+        logger.warning(f"Could not read model_results.pkl, bundle will have no metrics: {str(e)}")
+
+    return write_bundle(models_dir, model, load('scaler_X.pkl'), load('scaler_y.pkl'),
+                        feature_cols, model_name=model_name, metrics=metrics)
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage versioned model bundles')
+    parser.add_argument('command', choices=['convert', 'verify'])
+    parser.add_argument('--models-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+    parser.add_argument('--model-name', default='Ridge Regression')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == 'convert':
+        print(f"Bundle written: {convert_legacy(args.models_dir, args.model_name)}")
+    else:
+        bundle_dir = current_bundle_dir(args.models_dir)
+        if bundle_dir is None:
+            print("No current bundle")
+            sys.exit(1)
+        bundle = load_bundle(bundle_dir)
+        intervals = f"{bundle.intervals['coverage']:.0%}" if bundle.intervals else 'none'
+        print(f"✅ Bundle {bundle.bundle_id} OK: {bundle.model_name}, {len(bundle.feature_cols)} features, "
+              f"linear kernel: {bundle.linear_kernel is not None}, "
+              f"intervals: {intervals}")
+
+if __name__ == '__main__':
+    main()
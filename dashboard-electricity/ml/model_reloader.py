@@ -0,0 +1,146 @@
+"""
+Hot model reload
+
+PredictorReloader owns the live EnergyPredictor. A reload builds a complete
+new predictor in the background, checks it against canary inputs and only
+then swaps the reference. Requests that already hold the old predictor
+finish on the old model; new requests get the new one, and none of them fail.
+A predictor that fails its canary is thrown away and the old one keeps serving.
+
+Reloads are triggered by reload()/reload_async() (the /admin/reload endpoint)
+or by the watcher thread, which polls models/CURRENT for a new bundle id.
+"""
+
+import os
+import math
+import time
+import threading
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Inputs every new predictor must score successfully before it goes live
+CANARY_RECORDS = [
+    {'temperature': 25.0, 'humidity': 60.0, 'squareFootage': 1000.0, 'occupancy': 5,
+     'hvacUsage': True, 'lightingUsage': True, 'isHoliday': False,
+     'hour': 14, 'dayOfWeek': 1, 'month': 6, 'dayOfYear': 160, 'weekOfYear': 23, 'dayOfMonth': 9},
+    {'temperature': 5.0, 'humidity': 85.0, 'squareFootage': 2500.0, 'occupancy': 0,
+     'hvacUsage': False, 'lightingUsage': False, 'isHoliday': True,
+     'hour': 3, 'dayOfWeek': 6, 'month': 12, 'dayOfYear': 360, 'weekOfYear': 52, 'dayOfMonth': 26},
+]
+
+class PredictorReloader:
+    """Hold the live predictor and replace it without dropping requests"""
+
+    def __init__(self, factory, watch_file=None, canary_records=CANARY_RECORDS, on_swap=None):
+        self._factory = factory
+        self._watch_file = watch_file
+        self._canary_records = canary_records
+        self._on_swap = on_swap
+        self._reload_lock = threading.Lock()
+        self._watch_stop = threading.Event()
+        self._watch_thread = None
+        self.last_reload = None
+
+        self._watch_state = self._file_state()
+        self.current = factory()
+
+    def _file_state(self):
+        """Fingerprint of the watched file (None when it does not exist)"""
+        if not self._watch_file:
+            return None
+        try:
+            with open(self._watch_file) as f:
+                return os.stat(self._watch_file).st_mtime_ns, f.read()
+        except FileNotFoundError:
+            return None
+
+    def check_canary(self, candidate):
+        """Raise ValueError unless ``candidate`` loaded and scores the canary inputs sensibly"""
+        if not candidate.is_loaded:
+            raise ValueError('New model failed to load')
+
+        for record in self._canary_records:
+            result = candidate.predict(dict(record))
+            if not result.get('success'):
+                raise ValueError(f"Canary prediction failed: {result.get('error')}")
+            if not math.isfinite(result['prediction']):
+                raise ValueError(f"Canary prediction is not finite: {result['prediction']}")
+
+        batch = candidate.predict_many([dict(r) for r in self._canary_records])
+        if not batch.get('success') or batch['count'] != len(self._canary_records):
+            raise ValueError(f"Canary batch prediction failed: {batch.get('error')}")
+
+    def reload(self, reason='manual'):
+        """Build, validate and swap in a new predictor. Returns a status dict."""
+        if not self._reload_lock.acquire(blocking=False):
+            return {'status': 'in_progress'}
+
+        started = time.perf_counter()
+        previous = self.current
+        try:
+            self._watch_state = self._file_state()
+            candidate = self._factory()
+            self.check_canary(candidate)
+
+            # A single reference assignment: in-flight requests keep the old object
+            self.current = candidate
+            if self._on_swap is not None:
+                self._on_swap(candidate)
+
+            status = {
+                'status': 'swapped',
+                'previous_bundle': getattr(previous, 'bundle_id', None),
+                'bundle_id': getattr(candidate, 'bundle_id', None),
+            }
+            logger.info(f"Model reloaded ({reason}): {status['previous_bundle']} -> {status['bundle_id']}")
+
+        except Exception as e:
+            status = {'status': 'failed', 'error': str(e), 'bundle_id': getattr(previous, 'bundle_id', None)}
+            logger.error(f"Model reload ({reason}) failed, keeping current model: {str(e)}")
+
+        finally:
+            self._reload_lock.release()
+
+        status.update({
+            'reason': reason,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+            'finished_at': datetime.now().isoformat(),
+        })
+        self.last_reload = status
+        return status
+
+    def reload_async(self, reason='manual'):
+        """Start a reload in a background thread. Returns False if one is already running."""
+        if self._reload_lock.locked():
+            return False
+        threading.Thread(target=self.reload, args=(reason,), name='model-reload', daemon=True).start()
+        return True
+
+    def start_watching(self, interval=5.0):
+        """Poll the watched file and reload when it changes"""
+        if not self._watch_file or interval <= 0 or self._watch_thread is not None:
+            return
+
+        def watch():
+            while not self._watch_stop.wait(interval):
+                if self._file_state() != self._watch_state:
+                    self.reload(reason='file-change')
+
+        self._watch_thread = threading.Thread(target=watch, name='model-watch', daemon=True)
+        self._watch_thread.start()
+        logger.info(f"Watching {self._watch_file} for new models every {interval}s")
+
+    def stop_watching(self):
+        self._watch_stop.set()
+
+    def status(self):
+        """Current model and last reload, for the admin endpoint"""
+        return {
+            'bundle_id': getattr(self.current, 'bundle_id', None),
+            'model_loaded': self.current.is_loaded,
+            'reload_in_progress': self._reload_lock.locked(),
+            'watching': self._watch_thread is not None and not self._watch_stop.is_set(),
+            'last_reload': self.last_reload,
+        }
@@ -0,0 +1,133 @@
+"""
+Parallel training of independent candidate models
+
+fit_models_async() fits a dict of unfitted estimators in a process pool and
+returns at once, so the caller can train something else (the LSTM) while the
+pool works. Every candidate gets an equal share of a total core budget. The
+share is used as the estimator's n_jobs where it has one, and as the BLAS /
+OpenMP thread limit for the rest, so the pool never runs more threads than
+the budget allows.
+
+The core budget is TRAIN_CORES when set, otherwise the cores this process may
+run on. On POSIX the pool forks, so workers share the training arrays with
+the parent instead of receiving a pickled copy.
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from threadpoolctl import threadpool_limits
+
+# Training arrays, set once per worker process by _init_worker
+_worker_data = {}
+
+def available_cores():
+    """Cores this process is allowed to run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def core_budget(cores=None):
+    """Total cores training may use: ``cores``, else TRAIN_CORES, else every available core"""
+    if cores is None:
+        cores = int(os.environ.get('TRAIN_CORES', 0)) or available_cores()
+    return max(1, int(cores))
+
+def plan_cores(n_models, cores):
+    """Split ``cores`` into (worker processes, threads per model).
+
+    workers * threads never exceeds ``cores``.
+    """
+    workers = max(1, min(n_models, cores))
+    return workers, max(1, cores // workers)
+
+def _init_worker(X, y):
+    _worker_data['X'] = X
+    _worker_data['y'] = y
+
+def _fit_one(name, model, threads):
+    """Fit one estimator with ``threads`` cores. Returns (name, model, fit seconds)."""
+    params = model.get_params(deep=False)
+    uses_n_jobs = 'n_jobs' in params
+    if uses_n_jobs:
+        model.set_params(n_jobs=threads)
+
+    # Time the fit alone: setting the limits scans every loaded native library
+    with threadpool_limits(limits=threads):
+        started = time.perf_counter()
+        model.fit(_worker_data['X'], _worker_data['y'])
+        seconds = time.perf_counter() - started
+
+    # Serving scores small batches, where extra prediction threads only add overhead
+    if uses_n_jobs:
+        model.set_params(n_jobs=params['n_jobs'])
+    return name, model, seconds
+
+class FitJob:
+    """Models being fitted in the background"""
+
+    def __init__(self, executor, futures, names, workers, threads):
+        self._executor = executor
+        self._futures = futures
+        self.names = names
+        self.workers = workers
+        self.threads = threads
+
+    def wait(self):
+        """Block until every model is fitted. Returns {name: (fitted model, fit seconds)} in input order."""
+        fitted = {}
+        try:
+            for future in self._futures:
+                name, model, seconds = future.result()
+                fitted[name] = (model, seconds)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+        return {name: fitted[name] for name in self.names}
+
+class _DoneFuture:
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value
+
+def _start_method():
+    method = os.environ.get('TRAIN_START_METHOD')
+    if method:
+        return method
+    return 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+
+def mp_context():
+    """Multiprocessing context for training pools: TRAIN_START_METHOD, else fork where available"""
+    return multiprocessing.get_context(_start_method())
+
+def fit_models_async(models, X, y, cores=None):
+    """Start fitting ``models`` ({name: unfitted estimator}) on (X, y) and return a FitJob.
+
+    With a budget of one core the models are fitted in this process, one after another.
+    """
+    cores = core_budget(cores)
+    names = list(models)
+    workers, threads = plan_cores(len(names), cores)
+
+    if workers == 1:
+        _init_worker(X, y)
+        futures = [_DoneFuture(_fit_one(name, models[name], threads)) for name in names]
+        return FitJob(None, futures, names, workers, threads)
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context(),
+        initializer=_init_worker,
+        initargs=(X, y),
+    )
+    # All workers are started by the time submit returns, before the caller starts other work
+    futures = [executor.submit(_fit_one, name, models[name], threads) for name in names]
+    return FitJob(executor, futures, names, workers, threads)
+
+def fit_models(models, X, y, cores=None):
+    """Fit ``models`` in parallel and wait for them. See fit_models_async."""
+    return fit_models_async(models, X, y, cores).wait()
@@ -1,305 +1,90 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
-import pandas as pd
-import numpy as np
-import pickle
 import os
-import sys
-import json
-import warnings
-from sklearn.preprocessing import RobustScaler
-from datetime import datetime
 import logging
+import threading
+from queue import Full
+from time import perf_counter
+from datetime import datetime
+# The inference core has no Flask dependency (the Node bridge imports it directly)
+from inference import EnergyPredictor, get_predictor, history_engine, reloader
+from metrics import REGISTRY, CONTENT_TYPE
+from jobs import JobRunner, MAX_LIST_LIMIT
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Suppress warnings
-warnings.filterwarnings('ignore')
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
-
 app = Flask(__name__)
 CORS(app)
 
-class EnergyPredictor:
-    def __init__(self):
-        """Initialize the energy predictor by loading the Ridge Regression model and scalers"""
-        self.models_path = os.path.join(os.path.dirname(__file__), 'models')
-        self.model = None
-        self.scaler_X = None
-        self.scaler_y = None
-        self.feature_cols = []
-        self.is_loaded = False
-        self.model_name = "Ridge Regression"
-        self.model_accuracy = 98.4
-        
-        self._load_models()
-    
-    def _load_models(self):
-        """Load the Ridge Regression model and scalers"""
-        try:
-            # Load the Ridge Regression model
-            model_path = os.path.join(self.models_path, 'electricity_consumption_models.pkl')
-            logger.info(f'Loading model from: {model_path}')
-            
-            if os.path.exists(model_path):
-                with open(model_path, 'rb') as f:
-                    self.model = pickle.load(f)
-                logger.info("Ridge Regression model loaded successfully")
-            else:
-                logger.error(f"Model file not found: {model_path}")
-                return
-            
-            # Load the scalers
-            scaler_x_path = os.path.join(self.models_path, 'scaler_X.pkl')
-            if os.path.exists(scaler_x_path):
-                with open(scaler_x_path, 'rb') as f:
-                    self.scaler_X = pickle.load(f)
-                logger.info("X scaler (RobustScaler) loaded successfully")
-            
-            scaler_y_path = os.path.join(self.models_path, 'scaler_y.pkl')
-            if os.path.exists(scaler_y_path):
-                with open(scaler_y_path, 'rb') as f:
-                    self.scaler_y = pickle.load(f)
-                logger.info("Y scaler (RobustScaler) loaded successfully")
-            
-            # Load feature columns
-            feature_cols_path = os.path.join(self.models_path, 'feature_cols.pkl')
-            if os.path.exists(feature_cols_path):
-                with open(feature_cols_path, 'rb') as f:
-                    self.feature_cols = pickle.load(f)
-                logger.info(f"Feature columns loaded successfully: {len(self.feature_cols)} features")
-            else:
-                self.feature_cols = self._create_default_feature_columns()
-                logger.info("Using default feature columns")
-            
-            self.is_loaded = True
-            logger.info(f"✅ {self.model_name} model loaded successfully with {self.model_accuracy}% accuracy!")
-            
-        except Exception as e:
-            logger.error(f"Error loading models: {str(e)}")
-            self.is_loaded = False
-    
-    def _create_default_feature_columns(self):
-        """Create default feature columns for Ridge Regression model"""
-        return [
-            'Hour', 'Month', 'Quarter', 'DayOfYear', 'WeekOfYear', 'DayOfMonth',
-            'DayOfWeek', 'Hour_sin', 'Hour_cos', 'DayOfWeek_sin', 'DayOfWeek_cos',
-            'Month_sin', 'Month_cos', 'DayOfYear_sin', 'DayOfYear_cos',
-            'IsWeekend', 'IsPeakHour', 'IsBusinessHour', 'IsNight', 'IsMorning',
-            'IsAfternoon', 'IsEvening', 'Temperature', 'Humidity', 'SquareFootage',
-            'Occupancy', 'HVACUsage', 'LightingUsage', 'Holiday', 'RenewableEnergy',
-            'TempHumidity', 'TempSquared', 'HumiditySquared', 'TempCubed',
-            'HumidityCubed', 'HVAC_Temp', 'Lighting_Hour', 'Occupancy_SqFt',
-            'EnergyEfficiency', 'OccupancyDensity', 'TempHumidityRatio',
-            'TotalUsage', 'UsageIntensity', 'EnvironmentalStress', 'BuildingEfficiency'
-        ]
-    
-    def create_features(self, data):
-        """Create all necessary features for Ridge Regression prediction"""
-        try:
-            features = {}
-            
-            # Get current datetime for defaults
-            now = datetime.now()
-            
-            # Time-based features
-            hour = data.get('hour', now.hour)
-            day_of_week = data.get('dayOfWeek', now.weekday())
-            month = data.get('month', now.month)
-            
-            # Validate inputs
-            hour = max(0, min(23, int(hour)))
-            day_of_week = max(0, min(6, int(day_of_week)))
-            month = max(1, min(12, int(month)))
-            
-            # Basic time features
-            features['Hour'] = hour
-            features['DayOfWeek'] = day_of_week
-            features['Month'] = month
-            features['Quarter'] = (month - 1) // 3 + 1
-            features['DayOfYear'] = data.get('dayOfYear', now.timetuple().tm_yday)
-            features['WeekOfYear'] = data.get('weekOfYear', now.isocalendar()[1])
-            features['DayOfMonth'] = data.get('dayOfMonth', now.day)
-            
-            # Enhanced cyclical encoding
-            features['Hour_sin'] = np.sin(2 * np.pi * hour / 24)
-            features['Hour_cos'] = np.cos(2 * np.pi * hour / 24)
-            features['DayOfWeek_sin'] = np.sin(2 * np.pi * day_of_week / 7)
-            features['DayOfWeek_cos'] = np.cos(2 * np.pi * day_of_week / 7)
-            features['Month_sin'] = np.sin(2 * np.pi * month / 12)
-            features['Month_cos'] = np.cos(2 * np.pi * month / 12)
-            features['DayOfYear_sin'] = np.sin(2 * np.pi * features['DayOfYear'] / 365)
-            features['DayOfYear_cos'] = np.cos(2 * np.pi * features['DayOfYear'] / 365)
-            
-            # Enhanced boolean features
-            features['IsWeekend'] = 1 if day_of_week >= 5 else 0
-            features['IsPeakHour'] = 1 if (7 <= hour <= 9) or (17 <= hour <= 19) else 0
-            features['IsBusinessHour'] = 1 if 8 <= hour <= 18 else 0
-            features['IsNight'] = 1 if (hour >= 22) or (hour <= 6) else 0
-            features['IsMorning'] = 1 if 6 <= hour <= 12 else 0
-            features['IsAfternoon'] = 1 if 12 <= hour <= 18 else 0
-            features['IsEvening'] = 1 if 18 <= hour <= 22 else 0
-            
-            # Environmental and building features
-            temperature = float(data.get('temperature', 25.0))
-            humidity = float(data.get('humidity', 60.0))
-            square_footage = float(data.get('squareFootage', 1000.0))
-            occupancy = float(data.get('occupancy', 5.0))
-            renewable_energy = float(data.get('renewableEnergy', 10.0))
-            
-            features['Temperature'] = temperature
-            features['Humidity'] = humidity
-            features['SquareFootage'] = square_footage
-            features['Occupancy'] = occupancy
-            features['HVACUsage'] = 1 if data.get('hvacUsage', False) else 0
-            features['LightingUsage'] = 1 if data.get('lightingUsage', False) else 0
-            features['Holiday'] = 1 if data.get('isHoliday', False) else 0
-            features['RenewableEnergy'] = renewable_energy
-            
-            # Enhanced interaction features
-            features['TempHumidity'] = temperature * humidity
-            features['TempSquared'] = temperature ** 2
-            features['HumiditySquared'] = humidity ** 2
-            features['TempCubed'] = temperature ** 3
-            features['HumidityCubed'] = humidity ** 3
-            features['HVAC_Temp'] = features['HVACUsage'] * temperature
-            features['Lighting_Hour'] = features['LightingUsage'] * hour
-            features['Occupancy_SqFt'] = occupancy / max(square_footage, 1e-8)
-            features['EnergyEfficiency'] = renewable_energy / max(data.get('energyConsumption', 50.0), 1e-8)
-            features['OccupancyDensity'] = occupancy / max(square_footage, 1e-8)
-            features['TempHumidityRatio'] = temperature / max(humidity, 1e-8)
-            
-            # Advanced features
-            features['TotalUsage'] = features['HVACUsage'] + features['LightingUsage']
-            features['UsageIntensity'] = features['TotalUsage'] * occupancy
-            features['EnvironmentalStress'] = temperature * humidity * occupancy
-            features['BuildingEfficiency'] = square_footage / max(data.get('energyConsumption', 50.0), 1e-8)
-            
-            return features
-            
-        except Exception as e:
-            logger.error(f"Error creating features: {str(e)}")
-            raise ValueError(f"Feature creation failed: {str(e)}")
-    
-    def prepare_features(self, features):
-        """Prepare features for Ridge Regression prediction"""
-        try:
-            # Create feature array in the correct order
-            feature_array = []
-            for col in self.feature_cols:
-                if col in features:
-                    feature_array.append(features[col])
-                else:
-                    # Use default value for missing features
-                    feature_array.append(0.0)
-            
-            # Convert to numpy array with proper shape
-            feature_array = np.array(feature_array).reshape(1, -1)
-            
-            # Scale features using RobustScaler
-            if self.scaler_X is not None:
-                try:
-                    feature_scaled = self.scaler_X.transform(feature_array)
-                    return feature_scaled
-                except Exception as e:
-                    logger.warning(f"Scaling failed, using raw features: {str(e)}")
-                    return feature_array
-            else:
-                return feature_array
-            
-        except Exception as e:
-            logger.error(f"Error preparing features: {str(e)}")
-            # Return basic feature array if preparation fails
-            basic_features = np.array([list(features.values())[:len(self.feature_cols)]]).reshape(1, -1)
-            return basic_features
-    
-    def predict(self, data):
-        """Make energy consumption prediction using Ridge Regression model"""
-        try:
-            if not self.is_loaded or self.model is None:
-                return {
-                    'success': False,
-                    'error': 'Ridge Regression model not loaded properly'
-                }
-            
-            # Validate input data
-            if not isinstance(data, dict):
-                return {
-                    'success': False,
-                    'error': 'Input data must be a dictionary'
-                }
-            
-            # Create features
-            features = self.create_features(data)
-            
-            # Prepare features for prediction
-            feature_array = self.prepare_features(features)
-            
-            # Make prediction using Ridge Regression
-            pred_scaled = self.model.predict(feature_array)
-            prediction = pred_scaled[0] if isinstance(pred_scaled, np.ndarray) else pred_scaled
-            
-            # Inverse transform using RobustScaler
-            if self.scaler_y is not None:
-                try:
-                    prediction = self.scaler_y.inverse_transform([[prediction]])[0][0]
-                except Exception as e:
-                    logger.warning(f"Inverse scaling failed: {str(e)}")
-            
-            # Ensure prediction is positive and reasonable
-            prediction = max(0, float(prediction))
-            
-            # Calculate confidence based on model accuracy
-            base_confidence = self.model_accuracy
-            # Add small variation for realism
-            confidence_variation = np.random.normal(0, 2)
-            confidence = min(99, max(85, base_confidence + confidence_variation))
-            
-            return {
-                'success': True,
-                'prediction': round(prediction, 2),
-                'confidence': round(confidence, 1),
-                'unit': 'kWh',
-                'model_type': self.model_name,
-                'model_accuracy': self.model_accuracy,
-                'features_used': len(features),
-                'timestamp': datetime.now().isoformat(),
-                'prediction_quality': 'High' if confidence > 90 else 'Medium'
-            }
-        
-        except Exception as e:
-            logger.error(f"Prediction failed: {str(e)}")
-            return {
-                'success': False,
-                'error': f'Prediction failed: {str(e)}'
-            }
+REQUEST_SECONDS = REGISTRY.histogram('energy_http_request_duration_seconds', 'Time to handle a request, by endpoint',
+                                     ['endpoint'])
+REQUESTS = REGISTRY.counter('energy_http_requests_total', 'Requests handled, by endpoint and status',
+                            ['endpoint', 'method', 'status'])
+REQUEST_ERRORS = REGISTRY.counter('energy_http_request_errors_total', 'Requests answered with a 4xx or 5xx status',
+                                  ['endpoint'])
+
+@app.before_request
+def _start_timer():
+    g.request_started = perf_counter()
+
+@app.after_request
+def _record_request(response):
+    """Time and count every request by its route (not the raw path, which could be anything)"""
+    started = g.pop('request_started', None)
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    if started is not None:
+        REQUEST_SECONDS.labels(endpoint).observe(perf_counter() - started)
+    REQUESTS.labels(endpoint, request.method, response.status_code).inc()
+    if response.status_code >= 400:
+        REQUEST_ERRORS.labels(endpoint).inc()
+    return response
 
-# Initialize predictor
-predictor = EnergyPredictor()
+def _model_performance(current):
+    """Test-split metrics recorded with the serving bundle, or None"""
+    metrics = current.test_metrics
+    if 'accuracy' not in metrics:
+        return None
+    return {
+        "accuracy": f"{metrics['accuracy']:.1f}%",
+        "r2_score": f"{metrics['r2']:.3f}" if 'r2' in metrics else None,
+        "rmse": f"{metrics['rmse']:.2f}" if 'rmse' in metrics else None,
+        "mae": f"{metrics['mae']:.2f}" if 'mae' in metrics else None,
+        "predictions_within_10_percent": f"{metrics['within_10_percent']:.1f}%" if 'within_10_percent' in metrics else None,
+        "mean_percentage_error": f"{metrics['mean_percentage_error']:.2f}%" if 'mean_percentage_error' in metrics else None,
+    }
 
 @app.route('/', methods=['GET'])
 def home():
     """Home endpoint with API information"""
+    current = get_predictor()
     return jsonify({
         "message": "Energy Consumption Prediction API",
         "status": "running",
-        "model_loaded": predictor.is_loaded,
-        "model_type": predictor.model_name,
-        "model_accuracy": f"{predictor.model_accuracy}%",
+        "model_loaded": current.is_loaded,
+        "model_type": current.model_name,
+        "model_accuracy": f"{current.model_accuracy}%",
         "version": "2.0.0",
         "endpoints": {
             "/": "API information",
             "/predict": "POST - Make energy consumption prediction",
+            "/predict/batch": "POST - Predict many records in one call",
+            "/forecast": "POST - Hourly forecast for a start time and horizon in one call",
             "/model-info": "GET - Get model information",
-            "/health": "GET - Health check"
+            "/health": "GET - Health check",
+            "/metrics": "GET - Runtime metrics in the Prometheus text format",
+            "/telemetry": "POST - Add live hourly readings for a building",
+            "/admin/reload": "POST - Reload the model from models/CURRENT, GET - Reload status",
+            "/jobs": "POST - Start a background train or score job, GET - Recent jobs",
+            "/jobs/<id>": "GET - Job status and progress",
+            "/jobs/<id>/result": "GET - Result of a finished job",
+            "/jobs/<id>/cancel": "POST - Cancel a queued or running job"
         }
     })
 
 @app.route('/predict', methods=['POST'])
 def predict():
     """Make energy consumption prediction using Ridge Regression"""
+    current = get_predictor()
     try:
         # Get JSON data from request
         data = request.get_json()
@@ -310,14 +95,14 @@ def predict():
                 "error": "No input data provided. Please send JSON data."
             }), 400
 
-        if not predictor.is_loaded:
+        if not current.is_loaded:
             return jsonify({
                 "success": False, 
                 "error": "Ridge Regression model not loaded. Please check server logs."
             }), 500
         
         # Make prediction
-        result = predictor.predict(data)
+        result = current.predict(data)
         
         if not result['success']:
             return jsonify(result), 400
@@ -331,32 +116,91 @@ def predict():
             "error": f"Server error: {str(e)}"
         }), 500
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Score many records with one vectorized model call"""
+    current = get_predictor()
+    try:
+        data = request.get_json()
+        records = data.get('records') if isinstance(data, dict) else data
+
+        if not records:
+            return jsonify({
+                "success": False,
+                "error": "No input records provided. Send a JSON list or {\"records\": [...]}."
+            }), 400
+
+        if not current.is_loaded:
+            return jsonify({
+                "success": False,
+                "error": "Ridge Regression model not loaded. Please check server logs."
+            }), 500
+
+        result = current.predict_many(records)
+
+        if not result['success']:
+            return jsonify(result), 400
+
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Batch prediction endpoint error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Server error: {str(e)}"
+        }), 500
+
+@app.route('/forecast', methods=['POST'])
+def forecast():
+    """Hourly forecast over a horizon, scored with one vectorized model call"""
+    current = get_predictor()
+    try:
+        data = request.get_json(silent=True) or {}
+
+        if not current.is_loaded:
+            return jsonify({
+                "success": False,
+                "error": "Ridge Regression model not loaded. Please check server logs."
+            }), 500
+
+        result = current.forecast(data)
+
+        if not result['success']:
+            return jsonify(result), 400
+
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Forecast endpoint error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Server error: {str(e)}"
+        }), 500
+
 @app.route('/model-info', methods=['GET'])
 def model_info():
     """Get detailed Ridge Regression model information"""
+    current = get_predictor()
     try:
-        if not predictor.is_loaded:
+        if not current.is_loaded:
             return jsonify({"error": "Ridge Regression model not loaded"}), 400
         
         return jsonify({
             "model_loaded": True,
-            "model_type": predictor.model_name,
-            "model_accuracy": f"{predictor.model_accuracy}%",
-            "feature_columns": predictor.feature_cols,
-            "num_features": len(predictor.feature_cols),
+            "model_type": current.model_name,
+            "model_accuracy": f"{current.model_accuracy}%",
+            "feature_columns": current.feature_cols,
+            "num_features": len(current.feature_cols),
             "scalers_available": {
-                "scaler_X": predictor.scaler_X is not None,
-                "scaler_y": predictor.scaler_y is not None
+                "scaler_X": current.scaler_X is not None,
+                "scaler_y": current.scaler_y is not None
             },
-            "model_path": predictor.models_path,
-            "model_performance": {
-                "accuracy": "98.4%",
-                "r2_score": "0.949",
-                "rmse": "1.74",
-                "mae": "1.27",
-                "predictions_within_10_percent": "100.0%",
-                "mean_percentage_error": "1.63%"
-            }
+            "linear_kernel": current.linear_kernel is not None,
+            "bundle_id": current.bundle_id,
+            "prediction_cache": current.cache.stats() if current.cache is not None else None,
+            "model_path": current.models_path,
+            "model_load_seconds": round(current.load_seconds, 4),
+            "model_performance": _model_performance(current)
         })
         
     except Exception as e:
@@ -366,21 +210,186 @@ def model_info():
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
+    current = get_predictor()
     return jsonify({
-        "status": "healthy" if predictor.is_loaded else "unhealthy",
-        "model_loaded": predictor.is_loaded,
-        "model_type": predictor.model_name,
-        "model_accuracy": f"{predictor.model_accuracy}%",
+        "status": "healthy" if current.is_loaded else "unhealthy",
+        "model_loaded": current.is_loaded,
+        "model_type": current.model_name,
+        "model_accuracy": f"{current.model_accuracy}%",
         "timestamp": datetime.now().isoformat(),
         "server": "Flask Energy Prediction API with Ridge Regression"
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Request, stage, cache and model metrics in the Prometheus text format"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+def _reading(item):
+    """Telemetry reading as history engine input (missing values are skipped like NaN)"""
+    def value(key):
+        return float('nan') if item.get(key) is None else float(item[key])
+    return {
+        'EnergyConsumption': value('energyConsumption'),
+        'Temperature': value('temperature'),
+        'Humidity': value('humidity'),
+    }
+
+def _json_number(value):
+    return None if value != value else value
+
+@app.route('/telemetry', methods=['POST'])
+def telemetry():
+    """Add hourly readings to each building's history for lag/rolling features"""
+    # History lives in this process; with several workers each would only see part of the stream
+    if int(os.environ.get('ML_SERVING_PROCESSES', 1)) > 1:
+        return jsonify({
+            "success": False,
+            "error": "Telemetry history is kept per worker process. Run serve.py with --workers 1 (scale with --threads) to use /telemetry."
+        }), 409
+    try:
+        data = request.get_json()
+        readings = data.get('readings', [data]) if isinstance(data, dict) else data
+
+        if not readings or not all(isinstance(r, dict) and r.get('buildingId') is not None for r in readings):
+            return jsonify({
+                "success": False,
+                "error": "Send a reading (or {\"readings\": [...]}) with buildingId, energyConsumption, temperature and humidity."
+            }), 400
+
+        for item in readings:
+            history_engine.update(item['buildingId'], _reading(item))
+
+        buildings = dict.fromkeys(r['buildingId'] for r in readings)
+        return jsonify({
+            "success": True,
+            "count": len(readings),
+            "features": {
+                str(b): {name: _json_number(v) for name, v in history_engine.latest(b).items()}
+                for b in buildings
+            }
+        })
+
+    except Exception as e:
+        logger.error(f"Telemetry endpoint error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Server error: {str(e)}"
+        }), 500
+
+def _admin_authorized():
+    """Admin endpoints require X-Admin-Token when ML_ADMIN_TOKEN is set"""
+    token = os.environ.get('ML_ADMIN_TOKEN')
+    return not token or request.headers.get('X-Admin-Token') == token
+
+@app.route('/admin/reload', methods=['GET', 'POST'])
+def admin_reload():
+    """Load the bundle in models/CURRENT and swap it in once it passes the canary check"""
+    if not _admin_authorized():
+        return jsonify({"success": False, "error": "Invalid admin token"}), 403
+
+    if request.method == 'GET':
+        return jsonify(reloader.status())
+
+    # ?wait=1 blocks until the new model is live (or rejected)
+    if request.args.get('wait') in ('1', 'true'):
+        status = reloader.reload(reason='admin')
+        code = {'swapped': 200, 'in_progress': 409}.get(status['status'], 500)
+        return jsonify({"success": status['status'] == 'swapped', **status}), code
+
+    if not reloader.reload_async(reason='admin'):
+        return jsonify({"success": False, "status": "in_progress"}), 409
+    return jsonify({"success": True, "status": "started"}), 202
+
+_job_runner = None
+_job_runner_lock = threading.Lock()
+
+def _job_finished(job):
+    # Serve a retrained model from this process without waiting for the file watcher
+    if job['type'] == 'train' and job['status'] == 'succeeded':
+        reloader.reload_async(reason='train-job')
+
+def get_job_runner():
+    """The job runner of this process, created on first use"""
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            _job_runner = JobRunner(on_finished=_job_finished)
+        return _job_runner
+
+@app.route('/jobs', methods=['GET', 'POST'])
+def jobs():
+    """Start a train or score job in the background, or list recent jobs"""
+    runner = get_job_runner()
+    if request.method == 'GET':
+        try:
+            limit = int(request.args.get('limit', 50))
+        except ValueError:
+            limit = None
+        if limit is None or not 1 <= limit <= MAX_LIST_LIMIT:
+            return jsonify({"success": False, "error": f"limit must be an integer between 1 and {MAX_LIST_LIMIT}"}), 400
+        return jsonify({"success": True, "jobs": runner.store.list(limit)})
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({
+            "success": False,
+            "error": "Send {\"type\": \"train\"} (with optional train options) or {\"type\": \"score\", \"records\": [...]}."
+        }), 400
+    params = {key: value for key, value in data.items() if key != 'type'}
+    # Training replaces the served model, so it is an admin action
+    if data.get('type') == 'train' and not _admin_authorized():
+        return jsonify({"success": False, "error": "Invalid admin token"}), 403
+
+    try:
+        job = runner.submit(data.get('type'), params)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Full:
+        return jsonify({"success": False, "error": "Too many queued jobs, try again later"}), 429
+    return jsonify({"success": True, "job": job}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status, progress and (once finished) result summary of a job"""
+    job = get_job_runner().store.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Unknown job"}), 404
+    return jsonify({"success": True, "job": job})
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """Full result of a finished job: the scored records, or the new model bundle"""
+    store = get_job_runner().store
+    job = store.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Unknown job"}), 404
+    if job['status'] != 'succeeded':
+        return jsonify({"success": False, "status": job['status'], "error": job['error'] or "Job has not finished"}), 409
+    if job['type'] == 'score':
+        with open(store.file(job_id, 'result')) as f:
+            return Response(f.read(), content_type='application/json')
+    return jsonify({"success": True, **job['result']})
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def job_cancel(job_id):
+    """Cancel a queued job, or a running job of this process"""
+    runner = get_job_runner()
+    job = runner.store.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Unknown job"}), 404
+    if job['type'] == 'train' and not _admin_authorized():
+        return jsonify({"success": False, "error": "Invalid admin token"}), 403
+    if not runner.cancel(job_id):
+        return jsonify({"success": False, "status": job['status'], "error": "Job cannot be cancelled"}), 409
+    return jsonify({"success": True, "job": runner.store.get(job_id)})
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
     return jsonify({
         "error": "Endpoint not found",
-        "available_endpoints": ["/", "/predict", "/model-info", "/health"]
+        "available_endpoints": ["/", "/predict", "/predict/batch", "/forecast", "/model-info", "/health", "/metrics", "/telemetry", "/admin/reload", "/jobs"]
     }), 404
 
 @app.errorhandler(500)
@@ -392,26 +401,32 @@ def internal_error(error):
     }), 500
 
 if __name__ == '__main__':
+    current = get_predictor()
     print("=" * 60)
     print("🏆 Starting Energy Prediction Server with Ridge Regression Model")
     print("=" * 60)
-    print(f"✅ Model loaded: {predictor.is_loaded}")
-    print(f"🏆 Model type: {predictor.model_name}")
-    print(f"📊 Model accuracy: {predictor.model_accuracy}%")
-    print(f"🔧 Features: {len(predictor.feature_cols)}")
-    print(f"⚙️  Scalers available: X={predictor.scaler_X is not None}, Y={predictor.scaler_y is not None}")
+    print(f"✅ Model loaded: {current.is_loaded}")
+    print(f"🏆 Model type: {current.model_name}")
+    print(f"📊 Model accuracy: {current.model_accuracy}%")
+    print(f"🔧 Features: {len(current.feature_cols)}")
+    print(f"⚙️  Scalers available: X={current.scaler_X is not None}, Y={current.scaler_y is not None}")
     
-    if predictor.is_loaded:
+    if current.is_loaded:
         print("🚀 Server ready to make predictions!")
-        print("📈 Model Performance:")
-        print("   • Accuracy: 98.4%")
-        print("   • R² Score: 0.949")
-        print("   • RMSE: 1.74")
-        print("   • Predictions within 10%: 100.0%")
+        performance = _model_performance(current)
+        if performance:
+            print("📈 Model Performance:")
+            print(f"   • Accuracy: {performance['accuracy']}")
+            print(f"   • R² Score: {performance['r2_score']}")
+            print(f"   • RMSE: {performance['rmse']}")
+            print(f"   • Predictions within 10%: {performance['predictions_within_10_percent']}")
     else:
         print("❌ WARNING: Model not loaded properly!")
     
     print("=" * 60)
     
+    # Pick up newly trained bundles without a restart
+    reloader.start_watching(float(os.environ.get('MODEL_WATCH_INTERVAL', 5)))
+
     # Run the Flask app
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Screening of candidate models on time-stratified subsamples
+
+screen_models() fits every candidate on a few growing subsamples of the
+training split and scores each fit on the validation split. From these
+learning curves it extrapolates each model's validation RMSE and fit time on
+the full split, with a power law in the number of rows (a straight line in
+log-log space). Only the top-k models by predicted RMSE are then trained in
+full, so slow learners such as SVR, whose fit time grows faster than the row
+count, are not fitted on the whole data unless they look worth it.
+
+Subsamples are stratified in time: the training rows are cut into equal
+consecutive strata and one row is drawn from each, so every season and
+weekday is represented at every size.
+
+``time_weight`` trades accuracy for training time: models are ranked by
+predicted RMSE × (predicted fit time / fastest predicted fit time) ** time_weight,
+so 0 ranks by accuracy alone.
+"""
+
+import time
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error
+
+from parallel_training import fit_models
+
+DEFAULT_TOP_K = 3
+# Largest subsample, as a fraction of the training rows and in rows
+MAX_FRACTION = 0.0625
+MAX_ROWS = 20_000
+MIN_ROWS = 100
+STEPS = 3
+
+def time_subsample(n_rows, size, rng):
+    """Sorted indices of ``size`` rows, one drawn from each of ``size`` equal time strata"""
+    edges = np.linspace(0, n_rows, size + 1).astype(np.int64)
+    return edges[:-1] + (rng.random(size) * (edges[1:] - edges[:-1])).astype(np.int64)
+
+def subsample_sizes(n_rows, max_fraction=MAX_FRACTION, max_rows=MAX_ROWS, steps=STEPS):
+    """Growing subsample sizes, each twice the previous, up to max_fraction of ``n_rows`` and ``max_rows``"""
+    largest = min(int(n_rows * max_fraction), max_rows)
+    sizes = sorted({max(min(MIN_ROWS, n_rows), largest >> step) for step in range(steps)})
+    return [size for size in sizes if size <= n_rows]
+
+def extrapolate(sizes, values, n_rows):
+    """Value at ``n_rows`` of the power law fitted to (size, value) points"""
+    values = np.maximum(np.asarray(values, dtype=np.float64), 1e-12)
+    if len(sizes) < 2:
+        return float(values[-1])
+    slope, intercept = np.polyfit(np.log(sizes), np.log(values), 1)
+    return float(np.exp(intercept + slope * np.log(n_rows)))
+
+def screen_models(models, X_train, y_train, X_val, y_val, top_k=DEFAULT_TOP_K, time_weight=0.0,
+                  max_fraction=MAX_FRACTION, max_rows=MAX_ROWS, cores=None, seed=42):
+    """Learning curves of ``models`` ({name: unfitted estimator}) and the names to train in full.
+
+    Returns {'selected': [names, best first], 'models': {name: {'sizes', 'val_rmse',
+    'fit_seconds', 'predicted_rmse', 'predicted_seconds', 'rank_score'}},
+    'seconds': screening wall time, 'saved_seconds': predicted full fit time of
+    the dropped models minus the screening time}.
+    """
+    started = time.perf_counter()
+    n_rows = len(X_train)
+    sizes = subsample_sizes(n_rows, max_fraction, max_rows)
+    rng = np.random.default_rng(seed)
+    curves = {name: {'sizes': [], 'val_rmse': [], 'fit_seconds': []} for name in models}
+
+    for size in sizes:
+        rows = time_subsample(n_rows, size, rng)
+        fitted = fit_models({name: clone(model) for name, model in models.items()},
+                            X_train[rows], y_train[rows], cores=cores)
+        for name, (model, seconds) in fitted.items():
+            curves[name]['sizes'].append(size)
+            curves[name]['val_rmse'].append(float(np.sqrt(mean_squared_error(y_val, model.predict(X_val)))))
+            curves[name]['fit_seconds'].append(seconds)
+
+    for curve in curves.values():
+        curve['predicted_rmse'] = extrapolate(curve['sizes'], curve['val_rmse'], n_rows)
+        # Fit time does not shrink with more rows
+        curve['predicted_seconds'] = max(extrapolate(curve['sizes'], curve['fit_seconds'], n_rows),
+                                         curve['fit_seconds'][-1])
+    fastest = max(min(curve['predicted_seconds'] for curve in curves.values()), 1e-6)
+    for curve in curves.values():
+        curve['rank_score'] = curve['predicted_rmse'] * (curve['predicted_seconds'] / fastest) ** time_weight
+
+    ranked = sorted(curves, key=lambda name: curves[name]['rank_score'])
+    selected = ranked[:max(1, top_k)]
+    seconds = time.perf_counter() - started
+    dropped_seconds = sum(curves[name]['predicted_seconds'] for name in ranked[len(selected):])
+    return {
+        'selected': selected,
+        'models': curves,
+        'seconds': seconds,
+        'saved_seconds': dropped_seconds - seconds,
+    }
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Production server for the prediction API
+
+Runs predict.app under gunicorn with preforked workers. The model is loaded
+once in the master process before forking, so workers share its memory
+pages copy-on-write instead of each loading their own copy. Each worker
+serves requests on a thread pool (gthread), so one slow request does not
+block the others. Each worker watches models/CURRENT after the fork and
+hot-reloads new bundles by itself.
+
+Settings come from the command line or the environment:
+
+    --bind       SERVE_BIND       address to listen on (0.0.0.0:5001)
+    --workers    SERVE_WORKERS    worker processes (available cores)
+    --threads    SERVE_THREADS    request threads per worker (4)
+    --timeout    SERVE_TIMEOUT    seconds before a stuck worker is restarted (30)
+    --keepalive  SERVE_KEEPALIVE  seconds to keep idle connections open (5)
+    --graceful-timeout  SERVE_GRACEFUL_TIMEOUT  seconds to finish requests on shutdown (30)
+
+Lag/rolling history from /telemetry is kept in each worker's memory, so
+/telemetry answers 409 when more than one worker runs.
+
+SIGTERM/SIGINT stop accepting connections and let in-flight requests finish.
+gunicorn only runs on POSIX systems. Where it is not installed, the server
+falls back to the threaded Werkzeug server with the debugger off.
+
+Usage:
+    python serve.py [--bind 0.0.0.0:5001] [--workers 4] [--threads 4]
+"""
+
+import os
+import gc
+import sys
+import argparse
+import logging
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+logger = logging.getLogger(__name__)
+
+def _default_workers():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def parse_args(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description='Production server for the energy prediction API')
+    parser.add_argument('--bind', default=env('SERVE_BIND', '0.0.0.0:5001'))
+    parser.add_argument('--workers', type=int, default=int(env('SERVE_WORKERS', _default_workers())))
+    parser.add_argument('--threads', type=int, default=int(env('SERVE_THREADS', 4)))
+    parser.add_argument('--timeout', type=int, default=int(env('SERVE_TIMEOUT', 30)))
+    parser.add_argument('--keepalive', type=int, default=int(env('SERVE_KEEPALIVE', 5)))
+    parser.add_argument('--graceful-timeout', type=int, default=int(env('SERVE_GRACEFUL_TIMEOUT', 30)))
+    parser.add_argument('--watch-interval', type=float, default=float(env('MODEL_WATCH_INTERVAL', 5)),
+                        help='seconds between checks of models/CURRENT in each worker (0 disables)')
+    return parser.parse_args(argv)
+
+def _load_app():
+    """Import the API (loading the model) and freeze the heap before workers fork"""
+    from predict import app, get_predictor
+    logger.info(f"Model loaded before fork: {get_predictor().is_loaded}")
+    # Objects created so far are never collected, so the collector does not
+    # touch (and copy) their pages in the workers
+    gc.freeze()
+    return app
+
+def run_gunicorn(args):
+    from gunicorn.app.base import BaseApplication
+
+    def post_fork(server, worker):
+        from predict import reloader
+        reloader.start_watching(args.watch_interval)
+
+    def worker_exit(server, worker):
+        from predict import reloader
+        reloader.stop_watching()
+
+    class PredictionServer(BaseApplication):
+        def load_config(self):
+            settings = {
+                'bind': args.bind,
+                'workers': args.workers,
+                'worker_class': 'gthread',
+                'threads': args.threads,
+                'timeout': args.timeout,
+                'keepalive': args.keepalive,
+                'graceful_timeout': args.graceful_timeout,
+                'preload_app': True,
+                'post_fork': post_fork,
+                'worker_exit': worker_exit,
+                'accesslog': os.environ.get('SERVE_ACCESS_LOG'),
+            }
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return _load_app()
+
+    # Workers inherit this; predict.py refuses /telemetry when history would be split between them
+    os.environ['ML_SERVING_PROCESSES'] = str(args.workers)
+    if args.workers > 1:
+        logger.warning("/telemetry is disabled with more than one worker: each worker keeps its own history")
+    print(f"🚀 Serving on {args.bind} with {args.workers} workers x {args.threads} threads")
+    PredictionServer().run()
+
+def run_werkzeug(args):
+    """Fallback without gunicorn: one process, threaded, debugger and reloader off"""
+    from predict import reloader
+    app = _load_app()
+    reloader.start_watching(args.watch_interval)
+    host, _, port = args.bind.rpartition(':')
+    print(f"⚠️  gunicorn is not installed; serving on {args.bind} with the threaded Werkzeug server")
+    app.run(host=host or '0.0.0.0', port=int(port), debug=False, threaded=True, use_reloader=False)
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        run_werkzeug(args)
+        return
+    run_gunicorn(args)
+
+if __name__ == '__main__':
+    main()
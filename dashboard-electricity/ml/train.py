@@ -1,12 +1,8 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pickle
 import os
 from sklearn.preprocessing import StandardScaler, RobustScaler
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, ExtraTreesRegressor
 from sklearn.linear_model import LinearRegression, Ridge, Lasso
 from sklearn.svm import SVR
@@ -16,7 +12,18 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense, LSTM, Dropout, BatchNormalization
 from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
 from tensorflow.keras.optimizers import Adam
+import time
 import warnings
+from ingest import build_features, build_lean_features, compact_features, read_sorted_csv, load_column_store
+from feature_cache import load_features
+from model_bundle import write_bundle
+from parallel_training import core_budget, fit_models_async
+from tuning import DEFAULT_FOLDS, tune_models
+from screening import DEFAULT_TOP_K, screen_models
+from jobs import report_progress
+from training_report import build_report, write_report, render_plots, plot_in_background
+from windowing import window_dataset, window_targets
+from uncertainty import DEFAULT_COVERAGE, fit_intervals, empirical_coverage
 warnings.filterwarnings('ignore')
 
 # Set TensorFlow logging level
@@ -36,93 +43,40 @@ def load_and_preprocess_data():
     data_path = os.path.join(project_root, 'data', 'Energy_consumption.csv')
     print(f"Loading data from: {data_path}")
     
-    df = pd.read_csv(data_path)
+    # Convert timestamp and sort data
+    df = read_sorted_csv(data_path)
     
     print(f"Dataset shape: {df.shape}")
     print(f"Columns: {df.columns.tolist()}")
     
-    # Convert timestamp and sort data
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-    df = df.sort_values('Timestamp').reset_index(drop=True)
-    
     return df
 
-def create_features(df):
-    """Create enhanced features for the model"""
-    df = df.copy()
-    
-    # Time-based features
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-    df['Hour'] = df['Timestamp'].dt.hour
-    df['Month'] = df['Timestamp'].dt.month
-    df['Quarter'] = df['Timestamp'].dt.quarter
-    df['DayOfYear'] = df['Timestamp'].dt.dayofyear
-    df['WeekOfYear'] = df['Timestamp'].dt.isocalendar().week
-    df['DayOfMonth'] = df['Timestamp'].dt.day
-    
-    # DayOfWeek is already in the dataset as a string, convert it to numeric
-    day_mapping = {'Monday': 0, 'Tuesday': 1, 'Wednesday': 2, 'Thursday': 3, 'Friday': 4, 'Saturday': 5, 'Sunday': 6}
-    df['DayOfWeek'] = df['DayOfWeek'].map(day_mapping)
-    
-    # Convert boolean columns
-    df['Holiday'] = df['Holiday'].map({'No': 0, 'Yes': 1})
-    df['HVACUsage'] = df['HVACUsage'].map({'Off': 0, 'On': 1})
-    df['LightingUsage'] = df['LightingUsage'].map({'Off': 0, 'On': 1})
-    
-    # Enhanced cyclical encoding
-    df['Hour_sin'] = np.sin(2 * np.pi * df['Hour'] / 24)
-    df['Hour_cos'] = np.cos(2 * np.pi * df['Hour'] / 24)
-    df['DayOfWeek_sin'] = np.sin(2 * np.pi * df['DayOfWeek'] / 7)
-    df['DayOfWeek_cos'] = np.cos(2 * np.pi * df['DayOfWeek'] / 7)
-    df['Month_sin'] = np.sin(2 * np.pi * df['Month'] / 12)
-    df['Month_cos'] = np.cos(2 * np.pi * df['Month'] / 12)
-    df['DayOfYear_sin'] = np.sin(2 * np.pi * df['DayOfYear'] / 365)
-    df['DayOfYear_cos'] = np.cos(2 * np.pi * df['DayOfYear'] / 365)
-    
-    # Enhanced boolean features
-    df['IsWeekend'] = (df['DayOfWeek'] >= 5).astype(int)
-    df['IsPeakHour'] = ((df['Hour'] >= 7) & (df['Hour'] <= 9) | 
-                        (df['Hour'] >= 17) & (df['Hour'] <= 19)).astype(int)
-    df['IsBusinessHour'] = ((df['Hour'] >= 8) & (df['Hour'] <= 18)).astype(int)
-    df['IsNight'] = ((df['Hour'] >= 22) | (df['Hour'] <= 6)).astype(int)
-    df['IsMorning'] = ((df['Hour'] >= 6) & (df['Hour'] <= 12)).astype(int)
-    df['IsAfternoon'] = ((df['Hour'] >= 12) & (df['Hour'] <= 18)).astype(int)
-    df['IsEvening'] = ((df['Hour'] >= 18) & (df['Hour'] <= 22)).astype(int)
-    
-    # Enhanced interaction features
-    df['TempHumidity'] = df['Temperature'] * df['Humidity']
-    df['TempSquared'] = df['Temperature'] ** 2
-    df['HumiditySquared'] = df['Humidity'] ** 2
-    df['TempCubed'] = df['Temperature'] ** 3
-    df['HumidityCubed'] = df['Humidity'] ** 3
-    df['HVAC_Temp'] = df['HVACUsage'] * df['Temperature']
-    df['Lighting_Hour'] = df['LightingUsage'] * df['Hour']
-    df['Occupancy_SqFt'] = df['Occupancy'] / (df['SquareFootage'] + 1e-8)
-    df['EnergyEfficiency'] = df['RenewableEnergy'] / (df['EnergyConsumption'] + 1e-8)
-    df['OccupancyDensity'] = df['Occupancy'] / (df['SquareFootage'] + 1e-8)
-    df['TempHumidityRatio'] = df['Temperature'] / (df['Humidity'] + 1e-8)
-    
-    # Advanced features
-    df['TotalUsage'] = df['HVACUsage'] + df['LightingUsage']
-    df['UsageIntensity'] = df['TotalUsage'] * df['Occupancy']
-    df['EnvironmentalStress'] = df['Temperature'] * df['Humidity'] * df['Occupancy']
-    df['BuildingEfficiency'] = df['SquareFootage'] / (df['EnergyConsumption'] + 1e-8)
-    
-    # Lag features (only for LSTM)
-    for lag in [1, 2, 3, 6, 12, 24]:
-        df[f'Energy_Lag_{lag}'] = df['EnergyConsumption'].shift(lag)
-        df[f'Temp_Lag_{lag}'] = df['Temperature'].shift(lag)
-        df[f'Humidity_Lag_{lag}'] = df['Humidity'].shift(lag)
-    
-    # Rolling statistics (only for LSTM)
-    for window in [3, 6, 12, 24]:
-        df[f'Energy_Rolling_Mean_{window}'] = df['EnergyConsumption'].rolling(window, min_periods=1).mean()
-        df[f'Energy_Rolling_Std_{window}'] = df['EnergyConsumption'].rolling(window, min_periods=1).std()
-        df[f'Temp_Rolling_Mean_{window}'] = df['Temperature'].rolling(window, min_periods=1).mean()
-        df[f'Humidity_Rolling_Mean_{window}'] = df['Humidity'].rolling(window, min_periods=1).mean()
-    
-    # Fill NaN values with forward fill and then backward fill
-    df = df.fillna(method='ffill').fillna(method='bfill')
+# Model families: 'tabular' regressors (without lag/rolling features, see
+# prepare_data) and the 'lstm' (every feature)
+MODEL_FAMILIES = ('tabular', 'lstm')
+
+def model_families():
+    """Families to train: TRAIN_MODEL_FAMILIES (comma separated), else all"""
+    families = tuple(f.strip() for f in os.environ.get('TRAIN_MODEL_FAMILIES', ','.join(MODEL_FAMILIES)).split(',') if f.strip())
+    unknown = set(families) - set(MODEL_FAMILIES)
+    if unknown or not families:
+        raise ValueError(f"TRAIN_MODEL_FAMILIES must name some of {', '.join(MODEL_FAMILIES)}, got {sorted(unknown) or 'none'}")
+    return families
+
+def create_features(df, lean=False, families=MODEL_FAMILIES):
+    """Create enhanced features for the model.
+
+    ``lean`` stores them as float32/int8 without duplicate columns, and skips
+    the lag/rolling features unless the LSTM is among ``families``.
+    """
+    if lean:
+        return build_lean_features(df, history='lstm' in families)
+
+    df = build_features(df)
+    
+    # Fill NaN values with forward fill and then backward fill, in place
+    df.ffill(inplace=True)
+    df.bfill(inplace=True)
     
     return df
 
@@ -161,8 +115,8 @@ def prepare_data(df):
 
 def prepare_data_for_lstm(df):
     """Prepare features and target for LSTM modeling"""
-    # Fill NaN values
-    df_clean = df.fillna(method='ffill').fillna(method='bfill')
+    # Fill NaN values (create_features has already filled them)
+    df_clean = df.ffill().bfill() if df.isna().values.any() else df
     
     # Prepare features and target
     feature_cols = [col for col in df_clean.columns if col not in ['Timestamp', 'EnergyConsumption']]
@@ -256,8 +210,28 @@ def evaluate_model(model, X_test, y_test, scaler_y, model_name):
         'model': model
     }
 
-def train_enhanced_models(X_train, X_test, y_train, y_test, scaler_y):
-    """Train enhanced ML models with hyperparameter tuning"""
+def calibrate_intervals(model, X_val, y_val, X_test, y_test, scaler_X, scaler_y, feature_cols,
+                        coverage=DEFAULT_COVERAGE):
+    """Conformal prediction intervals from the validation split, checked on the test split"""
+    hour = feature_cols.index('Hour')
+
+    def unscaled(X, y):
+        y_pred = scaler_y.inverse_transform(model.predict(X).reshape(-1, 1)).flatten()
+        y_true = scaler_y.inverse_transform(y.reshape(-1, 1)).flatten()
+        hours = np.rint(scaler_X.inverse_transform(X)[:, hour])
+        return y_true, y_pred, hours
+
+    intervals = fit_intervals(*unscaled(X_val, y_val), coverage=coverage)
+    test_coverage = empirical_coverage(intervals, *unscaled(X_test, y_test))
+    print(f"\n{coverage:.0%} prediction intervals: +/- {intervals['global_half_width']:.2f} kWh "
+          f"({intervals['samples']} validation rows), test coverage {test_coverage:.1%}")
+    return intervals, test_coverage
+
+def build_candidate_models(params=None, names=None):
+    """Unfitted candidate models, keyed by display name, with tuned ``params`` ({name: params}) applied.
+
+    ``names`` keeps only those candidates (e.g. the ones that passed screening).
+    """
     models = {
         'Random Forest': RandomForestRegressor(
             n_estimators=200, 
@@ -291,16 +265,102 @@ def train_enhanced_models(X_train, X_test, y_train, y_test, scaler_y):
             random_state=42
         )
     }
-    
+    if names is not None:
+        models = {name: models[name] for name in names}
+    for name, model_params in (params or {}).items():
+        if name in models:
+            models[name].set_params(**model_params)
+    return models
+
+# Hyperparameter grids searched by tune_candidate_models. Each includes the
+# defaults of build_candidate_models, so tuning can only keep or beat them in
+# cross-validation.
+SEARCH_SPACES = {
+    'Random Forest': {'n_estimators': [100, 200], 'max_depth': [10, 15, None], 'min_samples_leaf': [1, 2, 5]},
+    'Gradient Boosting': {'n_estimators': [100, 200], 'learning_rate': [0.05, 0.1], 'max_depth': [3, 5, 8]},
+    'Extra Trees': {'n_estimators': [100, 200], 'max_depth': [10, 15, None], 'min_samples_split': [2, 5]},
+    'Ridge Regression': {'alpha': [0.01, 0.1, 1.0, 10.0, 100.0]},
+    'Lasso Regression': {'alpha': [0.0001, 0.001, 0.01, 0.1]},
+    'SVR': {'C': [1.0, 10.0, 100.0], 'epsilon': [0.01, 0.1]},
+    'Neural Network': {'hidden_layer_sizes': [(100, 50, 25), (64, 32)], 'alpha': [0.0001, 0.001, 0.01]},
+}
+
+def tune_candidate_models(X_train, y_train, cores=None, names=None):
+    """Tuned {name: params} for the candidate models, from walk-forward CV on the training split.
+
+    TRAIN_TUNE_FOLDS sets the number of folds, TRAIN_TUNE_SECONDS the wall-clock budget.
+    """
+    n_splits = int(os.environ.get('TRAIN_TUNE_FOLDS', DEFAULT_FOLDS))
+    budget = float(os.environ.get('TRAIN_TUNE_SECONDS', 600))
+    spaces = {name: space for name, space in SEARCH_SPACES.items() if names is None or name in names}
+    results, summary = tune_models(build_candidate_models(names=names), spaces, X_train, y_train,
+                                   n_splits=n_splits, budget_seconds=budget, cores=cores)
+    print(f"\nTuned {len(results)} models with {summary['fits']} fold fits in {summary['seconds']:.1f}s"
+          f"{' (stopped at the time budget)' if summary['timed_out'] else ''}")
+    print(f"{'Model':<20} {'Configs':>8} {'Folds':>6} {'CV RMSE':>8}  Params")
+    for name, result in results.items():
+        cv_rmse = f"{result['cv_rmse']:.4f}" if result['cv_rmse'] is not None else 'n/a'
+        print(f"{name:<20} {result['configs']:>8} {result['folds']:>6} {cv_rmse:>8}  {result['params'] or 'defaults'}")
+    return {name: result['params'] for name, result in results.items()}
+
+# Screening runs by default from this many training rows, where full fits of
+# every candidate start to cost minutes
+SCREEN_MIN_ROWS = 50_000
+
+def screen_candidate_models(X_train, y_train, X_val, y_val, cores=None):
+    """Names of the candidates worth training in full, and the screening report (None when screening is off).
+
+    TRAIN_SCREEN is 1, 0 or auto (from SCREEN_MIN_ROWS training rows).
+    TRAIN_SCREEN_TOP_K models are kept, ranked by predicted validation RMSE
+    times their relative predicted fit time to the power TRAIN_SCREEN_TIME_WEIGHT.
+    """
+    mode = os.environ.get('TRAIN_SCREEN', 'auto')
+    if mode == '0' or (mode == 'auto' and len(X_train) < SCREEN_MIN_ROWS):
+        return list(build_candidate_models()), None
+
+    report = screen_models(build_candidate_models(), X_train, y_train, X_val, y_val,
+                           top_k=int(os.environ.get('TRAIN_SCREEN_TOP_K', DEFAULT_TOP_K)),
+                           time_weight=float(os.environ.get('TRAIN_SCREEN_TIME_WEIGHT', 0.0)), cores=cores)
+    print(f"\nScreened {len(report['models'])} models on subsamples of "
+          f"{', '.join(map(str, next(iter(report['models'].values()))['sizes']))} rows in {report['seconds']:.1f}s")
+    print(f"{'Model':<20} {'Pred. RMSE':>10} {'Pred. fit (s)':>13}")
+    for name, curve in sorted(report['models'].items(), key=lambda item: item[1]['rank_score']):
+        mark = ' *' if name in report['selected'] else ''
+        print(f"{name:<20} {curve['predicted_rmse']:>10.4f} {curve['predicted_seconds']:>13.1f}{mark}")
+    print(f"Training {', '.join(report['selected'])} in full; screening saved an estimated "
+          f"{report['saved_seconds']:.1f}s")
+    return report['selected'], report
+
+def evaluate_fitted_models(job, X_test, y_test, scaler_y):
+    """Wait for a parallel fit job and evaluate every model it fitted"""
     results = {}
-    
-    for name, model in models.items():
-        print(f"\nTraining {name}...")
-        model.fit(X_train, y_train)
+    for name, (model, seconds) in job.wait().items():
         results[name] = evaluate_model(model, X_test, y_test, scaler_y, name)
-    
+        results[name]['fit_seconds'] = seconds
     return results
 
+def train_enhanced_models(X_train, X_test, y_train, y_test, scaler_y, cores=None):
+    """Train the candidate ML models in parallel within a core budget"""
+    job = fit_models_async(build_candidate_models(), X_train, y_train, cores=cores)
+    print(f"\nTraining {len(job.names)} models in {job.workers} processes x {job.threads} threads...")
+    return evaluate_fitted_models(job, X_test, y_test, scaler_y)
+
+def limit_tensorflow_threads(threads):
+    """Keep TensorFlow within its share of the core budget (must run before the first TF op)"""
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1 if threads <= 2 else 2)
+    except RuntimeError as e:
+        print(f"Could not limit TensorFlow threads: {str(e)}")
+
+def print_training_times(results, wall_seconds):
+    """Per-model fit time next to the total wall time of the parallel run"""
+    print(f"\n{'Model':<20} {'Fit time (s)':>12}")
+    for name, result in results.items():
+        print(f"{name:<20} {result.get('fit_seconds', float('nan')):>12.2f}")
+    total = sum(result.get('fit_seconds', 0.0) for result in results.values())
+    print(f"Sum of fit times: {total:.2f}s, wall time: {wall_seconds:.2f}s")
+
 def create_enhanced_lstm_model(input_shape):
     """Create enhanced LSTM model for energy consumption prediction"""
     model = Sequential([
@@ -328,14 +388,11 @@ def train_enhanced_lstm_model(X_train, X_test, y_train, y_test, scaler_y):
     """Train enhanced LSTM model"""
     sequence_length = 24  # Increased for better performance
     
-    # Create sequences for LSTM
-    X_train_seq = np.array([X_train[i:i+sequence_length] 
-                           for i in range(len(X_train)-sequence_length)])
-    y_train_seq = y_train[sequence_length:]
-    
-    X_test_seq = np.array([X_test[i:i+sequence_length] 
-                          for i in range(len(X_test)-sequence_length)])
-    y_test_seq = y_test[sequence_length:]
+    # Stream windows batch by batch from strided views instead of building
+    # the full (samples, sequence_length, features) tensor
+    train_data = window_dataset(X_train, y_train, sequence_length, batch_size=32, shuffle=True, seed=42)
+    test_data = window_dataset(X_test, y_test, sequence_length, batch_size=256)
+    y_test_seq = window_targets(y_test, sequence_length)
     
     # Create and train model
     model = create_enhanced_lstm_model((sequence_length, X_train.shape[1]))
@@ -346,17 +403,18 @@ def train_enhanced_lstm_model(X_train, X_test, y_train, y_test, scaler_y):
     ]
     
     print("\nTraining Enhanced LSTM model...")
+    started = time.perf_counter()
     history = model.fit(
-        X_train_seq, y_train_seq,
-        validation_data=(X_test_seq, y_test_seq),
+        train_data,
+        validation_data=test_data,
         epochs=100,
-        batch_size=32,
         callbacks=callbacks,
         verbose=1
     )
+    fit_seconds = time.perf_counter() - started
     
     # Evaluate LSTM
-    y_pred_scaled = model.predict(X_test_seq)
+    y_pred_scaled = model.predict(window_dataset(X_test, None, sequence_length, batch_size=256))
     y_pred = scaler_y.inverse_transform(y_pred_scaled).flatten()
     y_true = scaler_y.inverse_transform(y_test_seq.reshape(-1, 1)).flatten()
     
@@ -389,7 +447,8 @@ def train_enhanced_lstm_model(X_train, X_test, y_train, y_test, scaler_y):
         'within_10_percent': accuracy_metrics['within_10_percent'],
         'mean_percentage_error': accuracy_metrics['mean_percentage_error'],
         'model': model,
-        'history': history
+        'history': history,
+        'fit_seconds': fit_seconds
     }
 
 if __name__ == "__main__":
@@ -400,27 +459,79 @@ if __name__ == "__main__":
         os.makedirs(models_dir, exist_ok=True)
         print(f"Models directory: {models_dir}")
         
-        # Load and preprocess data
-        df = load_and_preprocess_data()
+        # Lean features: float32/int8 columns, without duplicates or the
+        # features no selected model family uses
+        families = model_families()
+        lean = os.environ.get('TRAIN_LEAN_FEATURES', '0') == '1'
         
-        # Create features
-        df = create_features(df)
-        print("Features created successfully")
-        
-        # Train traditional ML models
-        X_train, X_val, X_test, y_train, y_val, y_test, scaler_X, scaler_y, feature_cols = prepare_data(df)
-        print("Data prepared for traditional ML models")
+        store_path = os.environ.get('TRAIN_COLUMN_STORE')
+        if store_path:
+            # Features already computed by `python ingest.py`
+            df = load_column_store(store_path)
+            print(f"Features loaded from column store: {store_path} ({len(df)} rows)")
+            if lean:
+                df = compact_features(df, history='lstm' in families)
+        elif os.environ.get('TRAIN_FEATURE_CACHE', '1') != '0':
+            # Reuse cached feature columns, computing only new or changed ones
+            df, cache_stats = load_features(lean=lean, history='lstm' in families)
+            print(f"Features loaded: {cache_stats['hits']} columns from cache, "
+                  f"{cache_stats['computed']} computed ({cache_stats['directory']})")
+        else:
+            # Load and preprocess data
+            df = load_and_preprocess_data()
+            
+            # Create features
+            df = create_features(df, lean=lean, families=families)
+            print("Features created successfully")
+        report_progress(0.1, 'Features ready')
+        if lean:
+            print(f"Lean features: {df.shape[1]} columns, {df.memory_usage(deep=False).sum() / 2**20:.1f} MB")
         
-        traditional_results = train_enhanced_models(X_train, X_test, y_train, y_test, scaler_y)
+        # Split the core budget: the LSTM trains in this process while a pool
+        # fits the other candidates. The pool forks before TensorFlow starts.
+        cores = core_budget()
+        lstm_threads = max(1, cores // 4) if 'lstm' in families else 0
+        training_started = time.perf_counter()
+        job = None
+        tuned_params = None
+        screening = None
+        if 'tabular' in families:
+            # Train traditional ML models
+            X_train, X_val, X_test, y_train, y_val, y_test, scaler_X, scaler_y, feature_cols = prepare_data(df)
+            print("Data prepared for traditional ML models")
+            report_progress(0.15, 'Selecting candidate models')
+            
+            # Drop candidates unlikely to win before fitting them on everything
+            candidate_names, screening = screen_candidate_models(X_train, y_train, X_val, y_val, cores=cores)
+            
+            # Optional hyperparameter search before the final fits (TRAIN_TUNE=1)
+            if os.environ.get('TRAIN_TUNE', '0') == '1':
+                tuned_params = tune_candidate_models(X_train, y_train, cores=cores, names=candidate_names)
+            
+            job = fit_models_async(build_candidate_models(tuned_params, candidate_names), X_train, y_train,
+                                   cores=max(1, cores - lstm_threads))
+            report_progress(0.3, f'Training {len(job.names)} models')
+            print(f"Training {len(job.names)} models in {job.workers} processes x {job.threads} threads, "
+                  f"LSTM with {lstm_threads} threads ({cores} cores)")
         
-        # Train LSTM model
-        X_train_lstm, X_test_lstm, y_train_lstm, y_test_lstm, scaler_X_lstm, scaler_y_lstm, feature_cols_lstm = prepare_data_for_lstm(df)
-        print("Data prepared for LSTM")
+        lstm_result = None
+        if 'lstm' in families:
+            # Train LSTM model
+            limit_tensorflow_threads(lstm_threads)
+            X_train_lstm, X_test_lstm, y_train_lstm, y_test_lstm, scaler_X_lstm, scaler_y_lstm, feature_cols_lstm = prepare_data_for_lstm(df)
+            print("Data prepared for LSTM")
+            report_progress(0.35, 'Training the LSTM')
+            
+            lstm_result = train_enhanced_lstm_model(X_train_lstm, X_test_lstm, y_train_lstm, y_test_lstm, scaler_y_lstm)
         
-        lstm_result = train_enhanced_lstm_model(X_train_lstm, X_test_lstm, y_train_lstm, y_test_lstm, scaler_y_lstm)
+        report_progress(0.7, 'Evaluating models')
+        traditional_results = evaluate_fitted_models(job, X_test, y_test, scaler_y) if job else {}
         
         # Combine all results
-        all_results = {**traditional_results, 'Enhanced LSTM': lstm_result}
+        all_results = dict(traditional_results)
+        if lstm_result is not None:
+            all_results['Enhanced LSTM'] = lstm_result
+        print_training_times(all_results, time.perf_counter() - training_started)
         
         # Find the best model
         best_model_name = max(all_results.keys(), key=lambda x: all_results[x]['accuracy'])
@@ -435,137 +546,35 @@ if __name__ == "__main__":
         print(f"R² Score: {all_results[best_model_name]['r2']:.3f}")
         print(f"{'='*50}")
         
-        # Save the best model and scalers
-        model_path = os.path.join(models_dir, 'electricity_consumption_models.pkl')
-        with open(model_path, 'wb') as f:
-            pickle.dump(best_model, f)
-        
-        with open(os.path.join(models_dir, 'scaler_X.pkl'), 'wb') as f:
-            pickle.dump(best_scaler_X, f)
-        with open(os.path.join(models_dir, 'scaler_y.pkl'), 'wb') as f:
-            pickle.dump(best_scaler_y, f)
-        with open(os.path.join(models_dir, 'feature_cols.pkl'), 'wb') as f:
-            pickle.dump(best_feature_cols, f)
-        
-        # Save model comparison results
-        comparison_data = {
-            'best_model': best_model_name,
-            'all_results': {name: {k: v for k, v in result.items() if k != 'model'} 
-                           for name, result in all_results.items()}
-        }
-        
-        with open(os.path.join(models_dir, 'model_results.pkl'), 'wb') as f:
-            pickle.dump(comparison_data, f)
-        
-        print("Model and scalers saved successfully!")
-        
-        # Create enhanced comparison plots
-        model_names = list(all_results.keys())
-        accuracies = [all_results[name]['accuracy'] for name in model_names]
-        within_10_percent = [all_results[name]['within_10_percent'] for name in model_names]
-        
-        plt.figure(figsize=(15, 10))
-        
-        # Overall Accuracy comparison
-        plt.subplot(2, 3, 1)
-        bars = plt.bar(model_names, accuracies, color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2'])
-        plt.title('Model Overall Accuracy Comparison')
-        plt.ylabel('Accuracy (%)')
-        plt.xticks(rotation=45)
-        
-        # Add value labels on bars
-        for bar, acc in zip(bars, accuracies):
-            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5, 
-                    f'{acc:.1f}%', ha='center', va='bottom')
+        # Save the best model, scalers and feature columns as one versioned bundle
+        best_metrics = {k: v for k, v in all_results[best_model_name].items() if k not in ('model', 'history', 'model_name')}
+        intervals = None
+        if best_model_name != 'Enhanced LSTM':
+            coverage = float(os.environ.get('TRAIN_INTERVAL_COVERAGE', DEFAULT_COVERAGE))
+            intervals, best_metrics['interval_test_coverage'] = calibrate_intervals(
+                best_model, X_val, y_val, X_test, y_test, scaler_X, scaler_y, feature_cols, coverage)
+        bundle_dir = write_bundle(models_dir, best_model, best_scaler_X, best_scaler_y, best_feature_cols,
+                                  model_name=best_model_name, metrics=best_metrics, intervals=intervals)
+        print(f"Model bundle written to: {bundle_dir}")
+        report_progress(0.9, 'Writing reports')
         
-        # Predictions within 10% comparison
-        plt.subplot(2, 3, 2)
-        bars = plt.bar(model_names, within_10_percent, color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2'])
-        plt.title('Predictions within 10% of Actual')
-        plt.ylabel('Percentage (%)')
-        plt.xticks(rotation=45)
+        # Compact JSON report; plots are drawn from it, by default in a separate
+        # process once the bundle has shipped (TRAIN_PLOTS=background|inline|none)
+        report = build_report(all_results, best_model_name, bundle_id=os.path.basename(bundle_dir),
+                              tuned_params=tuned_params, screening=screening,
+                              wall_seconds=round(time.perf_counter() - training_started, 3))
+        report_path = write_report(models_dir, report)
+        print(f"Training report written to: {report_path}")
         
-        for bar, acc in zip(bars, within_10_percent):
-            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5, 
-                    f'{acc:.1f}%', ha='center', va='bottom')
-        
-        # R² Score comparison
-        plt.subplot(2, 3, 3)
-        r2_scores = [all_results[name]['r2'] for name in model_names]
-        bars = plt.bar(model_names, r2_scores, color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2'])
-        plt.title('Model R² Score Comparison')
-        plt.ylabel('R² Score')
-        plt.xticks(rotation=45)
-        
-        for bar, r2 in zip(bars, r2_scores):
-            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.01, 
-                    f'{r2:.3f}', ha='center', va='bottom')
-        
-        # RMSE comparison
-        plt.subplot(2, 3, 4)
-        rmse_scores = [all_results[name]['rmse'] for name in model_names]
-        bars = plt.bar(model_names, rmse_scores, color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2'])
-        plt.title('Model RMSE Comparison')
-        plt.ylabel('RMSE')
-        plt.xticks(rotation=45)
-        
-        for bar, rmse in zip(bars, rmse_scores):
-            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, 
-                    f'{rmse:.2f}', ha='center', va='bottom')
-        
-        # MAE comparison
-        plt.subplot(2, 3, 5)
-        mae_scores = [all_results[name]['mae'] for name in model_names]
-        bars = plt.bar(model_names, mae_scores, color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2'])
-        plt.title('Model MAE Comparison')
-        plt.ylabel('MAE')
-        plt.xticks(rotation=45)
-        
-        for bar, mae in zip(bars, mae_scores):
-            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, 
-                    f'{mae:.2f}', ha='center', va='bottom')
-        
-        # Mean Percentage Error comparison
-        plt.subplot(2, 3, 6)
-        mpe_scores = [all_results[name]['mean_percentage_error'] for name in model_names]
-        bars = plt.bar(model_names, mpe_scores, color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2'])
-        plt.title('Mean Percentage Error')
-        plt.ylabel('Error (%)')
-        plt.xticks(rotation=45)
-        
-        for bar, mpe in zip(bars, mpe_scores):
-            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, 
-                    f'{mpe:.2f}%', ha='center', va='bottom')
-        
-        plt.tight_layout()
-        plt.savefig(os.path.join(models_dir, 'enhanced_model_analysis.png'), dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        # Plot training history for LSTM if available
-        if 'history' in lstm_result:
-            plt.figure(figsize=(12, 8))
-            
-            plt.subplot(2, 2, 1)
-            plt.plot(lstm_result['history'].history['loss'], label='Training Loss')
-            plt.plot(lstm_result['history'].history['val_loss'], label='Validation Loss')
-            plt.title('Enhanced LSTM Training History - Loss')
-            plt.xlabel('Epoch')
-            plt.ylabel('Loss')
-            plt.legend()
-            
-            plt.subplot(2, 2, 2)
-            plt.plot(lstm_result['history'].history['mae'], label='Training MAE')
-            plt.plot(lstm_result['history'].history['val_mae'], label='Validation MAE')
-            plt.title('Enhanced LSTM Training History - MAE')
-            plt.xlabel('Epoch')
-            plt.ylabel('MAE')
-            plt.legend()
-            
-            plt.tight_layout()
-            plt.savefig(os.path.join(models_dir, 'enhanced_training_history.png'))
-            plt.close()
+        plots = os.environ.get('TRAIN_PLOTS', 'background')
+        dpi = int(os.environ.get('TRAIN_PLOT_DPI', 300))
+        if plots == 'inline':
+            render_plots(report, models_dir, dpi)
+            print("Enhanced model comparison plots saved successfully!")
+        elif plots == 'background':
+            plot_in_background(report_path, dpi)
+            print("Rendering plots in the background (TRAIN_PLOTS=none skips them)")
         
-        print("Enhanced model comparison plots saved successfully!")
         print(f"\nBest model ({best_model_name}) saved with accuracy: {all_results[best_model_name]['accuracy']:.1f}%")
         print(f"Predictions within 10%: {all_results[best_model_name]['within_10_percent']:.1f}%")
         print(f"Mean Percentage Error: {all_results[best_model_name]['mean_percentage_error']:.2f}%")
@@ -574,3 +583,4 @@ if __name__ == "__main__":
         print(f"Error during training: {str(e)}")
         import traceback
         print(traceback.format_exc())
+        raise SystemExit(1)
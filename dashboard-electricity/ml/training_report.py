@@ -0,0 +1,136 @@
+"""
+Training report: compact JSON metrics and optional plots
+
+train.py writes models/training_report.json with the metrics of every model,
+the LSTM loss curves, and the tuning and screening results: a few KB of
+plain JSON, unlike a pickle of the results with the Keras History object.
+The plots are rendered from this report alone, so they can be drawn
+after the model has shipped, in another process, or never:
+
+    python training_report.py models/training_report.json [--dpi 300]
+
+matplotlib is imported only when plots are rendered.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+import numpy as np
+
+REPORT_FILE = 'training_report.json'
+COMPARISON_PLOT = 'enhanced_model_analysis.png'
+HISTORY_PLOT = 'enhanced_training_history.png'
+
+# LSTM History keys kept in the report
+HISTORY_KEYS = ('loss', 'val_loss', 'mae', 'val_mae')
+
+# Comparison panels: title, metric, y label, label offset, label format
+PANELS = (
+    ('Model Overall Accuracy Comparison', 'accuracy', 'Accuracy (%)', 0.5, '{:.1f}%'),
+    ('Predictions within 10% of Actual', 'within_10_percent', 'Percentage (%)', 0.5, '{:.1f}%'),
+    ('Model R² Score Comparison', 'r2', 'R² Score', 0.01, '{:.3f}'),
+    ('Model RMSE Comparison', 'rmse', 'RMSE', 0.1, '{:.2f}'),
+    ('Model MAE Comparison', 'mae', 'MAE', 0.1, '{:.2f}'),
+    ('Mean Percentage Error', 'mean_percentage_error', 'Error (%)', 0.1, '{:.2f}%'),
+)
+COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2']
+
+def _to_builtin(value):
+    """JSON-safe copy of numbers, arrays, dicts and lists"""
+    if isinstance(value, dict):
+        return {str(k): _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_to_builtin(v) for v in value]
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    return value
+
+def build_report(all_results, best_model, bundle_id=None, **extra):
+    """The report for ``all_results`` ({name: evaluate_model result}); ``extra`` entries are added as they are"""
+    models, history = {}, None
+    for name, result in all_results.items():
+        models[name] = {k: v for k, v in result.items() if k not in ('model', 'history', 'model_name')}
+        if result.get('history') is not None:
+            history = {key: [round(float(v), 6) for v in result['history'].history[key]]
+                       for key in HISTORY_KEYS if key in result['history'].history}
+    return _to_builtin({'best_model': best_model, 'bundle_id': bundle_id, 'models': models,
+                        'lstm_history': history, **extra})
+
+def write_report(models_dir, report):
+    """Write the report atomically. Returns its path."""
+    path = os.path.join(models_dir, REPORT_FILE)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=1)
+    os.replace(tmp_path, path)
+    return path
+
+def render_plots(report, out_dir, dpi=300):
+    """Draw the model comparison and LSTM history plots of ``report`` into ``out_dir``. Returns their paths."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    models = report['models']
+    model_names = list(models)
+    paths = [os.path.join(out_dir, COMPARISON_PLOT)]
+
+    plt.figure(figsize=(15, 10))
+    for index, (title, metric, ylabel, offset, label) in enumerate(PANELS, start=1):
+        values = [models[name][metric] for name in model_names]
+        plt.subplot(2, 3, index)
+        bars = plt.bar(model_names, values, color=COLORS)
+        plt.title(title)
+        plt.ylabel(ylabel)
+        plt.xticks(rotation=45)
+        for bar, value in zip(bars, values):
+            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + offset,
+                     label.format(value), ha='center', va='bottom')
+    plt.tight_layout()
+    plt.savefig(paths[0], dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+    history = report.get('lstm_history')
+    if history:
+        paths.append(os.path.join(out_dir, HISTORY_PLOT))
+        plt.figure(figsize=(12, 8))
+        for index, (metric, label) in enumerate((('loss', 'Loss'), ('mae', 'MAE')), start=1):
+            plt.subplot(2, 2, index)
+            plt.plot(history[metric], label=f'Training {label}')
+            plt.plot(history[f'val_{metric}'], label=f'Validation {label}')
+            plt.title(f'Enhanced LSTM Training History - {label}')
+            plt.xlabel('Epoch')
+            plt.ylabel(label)
+            plt.legend()
+        plt.tight_layout()
+        plt.savefig(paths[1])
+        plt.close()
+    return paths
+
+def plot_in_background(report_path, dpi=300):
+    """Render the plots of a written report in a background process. Returns the process.
+
+    The process stays in the caller's process group, so cancelling a training job stops it too.
+    """
+    # The child gets its own copy of the log descriptor; close ours
+    with open(os.path.join(os.path.dirname(report_path), 'plots.log'), 'w') as log:
+        return subprocess.Popen([sys.executable, os.path.abspath(__file__), report_path, '--dpi', str(dpi)],
+                                stdout=log, stderr=subprocess.STDOUT)
+
+def main():
+    parser = argparse.ArgumentParser(description='Render the plots of a training report')
+    parser.add_argument('report', help='path to training_report.json')
+    parser.add_argument('--out', help='output directory (default: the report directory)')
+    parser.add_argument('--dpi', type=int, default=300)
+    args = parser.parse_args()
+
+    with open(args.report) as f:
+        report = json.load(f)
+    for path in render_plots(report, args.out or os.path.dirname(os.path.abspath(args.report)), args.dpi):
+        print(f"Plot saved to: {path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Hyperparameter search with walk-forward cross-validation
+
+tune_models() picks hyperparameters for every candidate model on
+TimeSeriesSplit folds: each fold trains on the rows before it and is scored
+on the rows that follow, the way the model is used. Configurations are
+searched with successive halving: every configuration is scored on the
+first fold, and only the best 1/eta of them (per model) go on to eta times
+as many folds, until one is left or the folds run out. Bad configurations
+are dropped after one fold instead of costing a full cross-validation.
+
+The fold fits of a round run in parallel in a process pool within the core
+budget of parallel_training. The whole search stops at a wall-clock budget;
+a model then keeps the best configuration among those scored on the most
+folds, or its defaults if none was scored.
+"""
+
+import math
+import time
+import logging
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import ParameterGrid, TimeSeriesSplit
+from threadpoolctl import threadpool_limits
+
+from parallel_training import core_budget, mp_context, plan_cores
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FOLDS = 5
+DEFAULT_ETA = 3
+
+# Data, models and folds, set once per worker process by _init_worker
+_worker_data = {}
+
+def time_series_folds(n_rows, n_splits=DEFAULT_FOLDS):
+    """Walk-forward (train indices, validation indices) folds, oldest first"""
+    return list(TimeSeriesSplit(n_splits=n_splits).split(np.empty((n_rows, 1))))
+
+def rung_folds(n_splits, eta=DEFAULT_ETA):
+    """Folds scored by the end of each round of successive halving: 1, eta, eta², ..., n_splits"""
+    rungs, folds = [], 1
+    while folds < n_splits:
+        rungs.append(folds)
+        folds *= eta
+    return rungs + [n_splits]
+
+def _init_worker(X, y, models, folds):
+    _worker_data.update(X=X, y=y, models=models, folds=folds)
+
+def _score_fold(name, params, fold, threads):
+    """Validation RMSE of model ``name`` with ``params`` on fold ``fold``"""
+    model = clone(_worker_data['models'][name]).set_params(**params)
+    if 'n_jobs' in model.get_params(deep=False):
+        model.set_params(n_jobs=threads)
+    train, val = _worker_data['folds'][fold]
+    X, y = _worker_data['X'], _worker_data['y']
+    with threadpool_limits(limits=threads):
+        model.fit(X[train], y[train])
+        return float(np.sqrt(mean_squared_error(y[val], model.predict(X[val]))))
+
+class _Trial:
+    """One configuration of one model and its fold scores"""
+
+    def __init__(self, name, params):
+        self.name = name
+        self.params = params
+        self.scores = {}
+
+    @property
+    def score(self):
+        return float(np.mean(list(self.scores.values()))) if self.scores else math.inf
+
+def _survivors(trials, eta):
+    """The best ceil(len / eta) trials by mean score"""
+    return sorted(trials, key=lambda trial: trial.score)[:max(1, math.ceil(len(trials) / eta))]
+
+def _best(trials):
+    """Best trial among those scored on the most folds, or None if none was scored"""
+    most = max(len(trial.scores) for trial in trials)
+    if most == 0:
+        return None
+    return min((trial for trial in trials if len(trial.scores) == most), key=lambda trial: trial.score)
+
+def tune_models(models, spaces, X, y, n_splits=DEFAULT_FOLDS, eta=DEFAULT_ETA, budget_seconds=None, cores=None):
+    """Successive-halving search over ``spaces`` ({name: param grid}) for ``models`` ({name: estimator}).
+
+    Returns ({name: {'params', 'cv_rmse', 'folds', 'configs'}}, {'seconds', 'fits', 'timed_out'}).
+    ``params`` are the best configuration found, {} when none was scored in time.
+    """
+    started = time.perf_counter()
+    deadline = started + budget_seconds if budget_seconds else math.inf
+    folds = time_series_folds(len(X), n_splits)
+    trials = {name: [_Trial(name, params) for params in ParameterGrid(spaces[name])] for name in spaces}
+    alive = {name: list(model_trials) for name, model_trials in trials.items()}
+
+    cores = core_budget(cores)
+    # The first round has the most fits: one per configuration
+    workers, threads = plan_cores(max(1, sum(len(t) for t in trials.values())), cores)
+    pool = None
+    if workers > 1:
+        pool = mp_context().Pool(workers, initializer=_init_worker, initargs=(X, y, models, folds))
+    else:
+        _init_worker(X, y, models, folds)
+
+    fits, timed_out = 0, False
+    try:
+        for depth in rung_folds(n_splits, eta):
+            # A model down to one configuration needs no more folds
+            tasks = [(trial, fold) for name in alive if len(alive[name]) > 1 or depth == 1
+                     for trial in alive[name] for fold in range(depth) if fold not in trial.scores]
+            if pool is None:
+                for trial, fold in tasks:
+                    if time.perf_counter() >= deadline:
+                        timed_out = True
+                        break
+                    trial.scores[fold] = _score_fold(trial.name, trial.params, fold, threads)
+                    fits += 1
+            else:
+                pending = [(trial, fold, pool.apply_async(_score_fold, (trial.name, trial.params, fold, threads)))
+                           for trial, fold in tasks]
+                for trial, fold, result in pending:
+                    if not timed_out:
+                        result.wait(max(0.0, deadline - time.perf_counter()) if budget_seconds else None)
+                        timed_out = not result.ready()
+                    # After the deadline, keep the fits that finished anyway
+                    if result.ready():
+                        trial.scores[fold] = result.get()
+                        fits += 1
+            if timed_out:
+                break
+            for name in alive:
+                alive[name] = _survivors(alive[name], eta)
+            if all(len(model_trials) == 1 for model_trials in alive.values()):
+                break
+    finally:
+        if pool is not None:
+            # Abandons the fits still running when the budget ran out
+            pool.terminate()
+            pool.join()
+
+    if timed_out:
+        logger.warning(f"Tuning stopped at its {budget_seconds}s budget after {fits} fold fits")
+
+    results = {}
+    for name, model_trials in trials.items():
+        best = _best(model_trials)
+        results[name] = {
+            'params': best.params if best else {},
+            'cv_rmse': best.score if best else None,
+            'folds': len(best.scores) if best else 0,
+            'configs': len(model_trials),
+        }
+    summary = {'seconds': time.perf_counter() - started, 'fits': fits, 'timed_out': timed_out}
+    return results, summary
@@ -0,0 +1,99 @@
+"""
+Prediction intervals from split conformal calibration
+
+train.py scores the chosen model on the validation split, which it was not
+fitted on, and keeps the absolute residuals. For each time-of-day bucket,
+the interval half-width is the conformal quantile of those residuals: at
+least ``coverage`` of new predictions fall within prediction +/- half-width,
+as long as new data resembles the validation data. Buckets with too few
+validation rows use the quantile over all rows.
+
+The calibration is a small dict stored in the bundle manifest:
+
+    {'method': 'split_conformal', 'coverage': 0.9, 'bucket_hours': 6,
+     'half_widths': [one per bucket], 'global_half_width': ..., 'samples': 150}
+
+Serving imports this module, so it only uses NumPy.
+"""
+
+import math
+import numpy as np
+
+DEFAULT_COVERAGE = 0.9
+
+# Hours per time-of-day bucket (night, morning, afternoon, evening)
+BUCKET_HOURS = 6
+
+# Validation rows a bucket needs for its own quantile
+MIN_BUCKET_SAMPLES = 20
+
+def conformal_quantile(residuals, coverage):
+    """Residual that at least ``coverage`` of new points fall within, or inf with too few residuals"""
+    n = len(residuals)
+    rank = math.ceil((n + 1) * coverage)
+    if n == 0 or rank > n:
+        return math.inf
+    return float(np.partition(np.asarray(residuals, dtype=np.float64), rank - 1)[rank - 1])
+
+def fit_intervals(y_true, y_pred, hours, coverage=DEFAULT_COVERAGE, bucket_hours=BUCKET_HOURS,
+                  min_samples=MIN_BUCKET_SAMPLES):
+    """Calibrate interval half-widths per time-of-day bucket from validation predictions"""
+    if not 0 < coverage < 1:
+        raise ValueError('coverage must be between 0 and 1')
+    if 24 % bucket_hours:
+        raise ValueError('bucket_hours must divide 24')
+
+    residuals = np.abs(np.asarray(y_true, dtype=np.float64) - np.asarray(y_pred, dtype=np.float64))
+    buckets = (np.asarray(hours, dtype=np.int64) % 24) // bucket_hours
+
+    global_width = conformal_quantile(residuals, coverage)
+    if not math.isfinite(global_width):
+        raise ValueError(f'{len(residuals)} validation rows are too few for {coverage:.0%} coverage')
+
+    half_widths = []
+    for bucket in range(24 // bucket_hours):
+        bucket_residuals = residuals[buckets == bucket]
+        width = conformal_quantile(bucket_residuals, coverage) if len(bucket_residuals) >= min_samples else math.inf
+        half_widths.append(width if math.isfinite(width) else global_width)
+
+    return {
+        'method': 'split_conformal',
+        'coverage': coverage,
+        'bucket_hours': bucket_hours,
+        'half_widths': half_widths,
+        'global_half_width': global_width,
+        'samples': int(len(residuals)),
+    }
+
+def validate_intervals(intervals):
+    """Raise ValueError unless ``intervals`` is a usable calibration"""
+    try:
+        bucket_hours = int(intervals['bucket_hours'])
+        widths = np.asarray(intervals['half_widths'], dtype=np.float64)
+        coverage = float(intervals['coverage'])
+        global_width = float(intervals['global_half_width'])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f'Malformed interval calibration: {str(e)}')
+    if bucket_hours <= 0 or 24 % bucket_hours or widths.shape != (24 // bucket_hours,):
+        raise ValueError('Interval calibration needs one half-width per time-of-day bucket')
+    if not 0 < coverage < 1 or not np.all(np.isfinite(widths) & (widths >= 0)) or not global_width >= 0:
+        raise ValueError('Interval calibration has an invalid coverage or half-width')
+
+def half_widths(intervals, hours, n):
+    """Half-width for each of ``n`` predictions; ``hours`` None uses the global half-width"""
+    if hours is None:
+        return np.full(n, float(intervals['global_half_width']))
+    table = np.asarray(intervals['half_widths'], dtype=np.float64)
+    return table[(np.asarray(hours, dtype=np.int64) % 24) // int(intervals['bucket_hours'])]
+
+def interval_confidence(predictions, widths):
+    """Confidence in percent: how narrow the interval is relative to the prediction"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = np.where(predictions > 0, widths / predictions, np.inf)
+    return np.clip(100 * (1 - relative), 0, 99)
+
+def empirical_coverage(intervals, y_true, y_pred, hours):
+    """Share of ``y_true`` inside the intervals around ``y_pred``"""
+    widths = half_widths(intervals, hours, len(y_pred))
+    inside = np.abs(np.asarray(y_true, dtype=np.float64) - np.asarray(y_pred, dtype=np.float64)) <= widths
+    return float(np.mean(inside))
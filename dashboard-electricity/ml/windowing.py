@@ -0,0 +1,77 @@
+"""
+Sliding windows over time-ordered feature matrices for sequence models
+
+Window i is X[i:i + length] and its target is y[i + length], the first value
+after the window. sliding_windows() returns every window as a strided view
+of X, so it allocates nothing however long the series is.
+iter_window_batches() and window_dataset() copy one batch of windows at a
+time. The full (n, length, features) tensor is never built, so memory stays
+at batch_size * length * features.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def window_count(n_rows, length):
+    """Number of windows with a target in a series of ``n_rows``"""
+    return max(0, n_rows - length)
+
+def sliding_windows(X, length):
+    """Read-only (n_windows, length, features) view of X without copying"""
+    X = np.asarray(X)
+    n = window_count(len(X), length)
+    if n == 0:
+        return np.empty((0, length) + X.shape[1:], dtype=X.dtype)
+    # sliding_window_view puts the window axis last: (n + 1, features, length)
+    return np.moveaxis(sliding_window_view(X, length, axis=0), -1, 1)[:n]
+
+def window_targets(y, length):
+    """Target of each window: the value right after it"""
+    return np.asarray(y)[length:]
+
+def iter_window_batches(X, y, length, batch_size=32, shuffle=False, rng=None, dtype=np.float32):
+    """Yield (windows, targets) batches, copying one batch at a time.
+
+    With ``shuffle`` the window order is permuted using ``rng`` (a
+    numpy Generator); pass the same rng to every epoch to get a new order each epoch.
+    """
+    windows = sliding_windows(X, length)
+    targets = window_targets(y, length) if y is not None else None
+    order = np.arange(len(windows))
+    if shuffle:
+        (rng if rng is not None else np.random.default_rng()).shuffle(order)
+
+    for start in range(0, len(order), batch_size):
+        index = order[start:start + batch_size]
+        if not shuffle:
+            # Contiguous slice of the view; astype makes the only copy
+            index = slice(start, start + len(index))
+        batch = windows[index].astype(dtype)
+        if targets is None:
+            yield batch
+        else:
+            yield batch, targets[index].astype(dtype)
+
+def window_dataset(X, y, length, batch_size=32, shuffle=False, seed=None):
+    """tf.data.Dataset of window batches for Keras fit/predict/evaluate.
+
+    Windows are gathered batch by batch from a strided view, and each epoch
+    reshuffles when ``shuffle`` is set. Pass y=None for a
+    prediction dataset.
+    """
+    import tensorflow as tf
+
+    X = np.asarray(X)
+    rng = np.random.default_rng(seed)
+    window_spec = tf.TensorSpec(shape=(None, length) + X.shape[1:], dtype=tf.float32)
+    if y is None:
+        signature = window_spec
+    else:
+        signature = (window_spec, tf.TensorSpec(shape=(None,), dtype=tf.float32))
+
+    def generate():
+        return iter_window_batches(X, y, length, batch_size, shuffle=shuffle, rng=rng)
+
+    dataset = tf.data.Dataset.from_generator(generate, output_signature=signature)
+    n_batches = -(-window_count(len(X), length) // batch_size)
+    return dataset.apply(tf.data.experimental.assert_cardinality(n_batches)).prefetch(2)
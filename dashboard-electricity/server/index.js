@@ -3,8 +3,6 @@ const cors = require('cors');
 const helmet = require('helmet');
 const rateLimit = require('express-rate-limit');
 const dotenv = require('dotenv');
-const { spawn } = require('child_process');
-const path = require('path');
 dotenv.config();
 // Import database connection
 const connectDB = require('./src/config/connetDB');
@@ -13,7 +11,11 @@ const connectDB = require('./src/config/connetDB');
 const authRoutes = require('./src/routes/auth');
 
 // Import middleware
-const { authenticateToken } = require('./src/middleware/auth');
+const { authenticateToken, authorize } = require('./src/middleware/auth');
+
+// Import services
+const { PredictionWorkerPool } = require('./src/services/predictionWorkerPool');
+const { mlJobRequest } = require('./src/services/mlJobs');
 
 
 
@@ -53,49 +55,19 @@ connectDB();
 // Routes
 app.use('/api/auth', authRoutes);
 
-// Function to run Python prediction script
-const predictEnergyConsumption = async (data) => {
-  return new Promise((resolve, reject) => {
-    // Ensure dayOfWeek is a number (0-6) for the Python script
-    if (typeof data.dayOfWeek === 'string') {
-      const days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'];
-      data.dayOfWeek = days.indexOf(data.dayOfWeek);
-      if (data.dayOfWeek === -1) data.dayOfWeek = new Date().getDay(); // Default to current day if invalid
-    }
-
-    const pythonProcess = spawn('python', [
-      path.join(__dirname, '..', '..', 'ml', 'api_bridge.py'),
-      JSON.stringify(data)
-    ]);
+// Long-lived Python prediction workers (model is loaded once per worker)
+const predictionPool = new PredictionWorkerPool().start();
 
-    let result = '';
-    let errorOutput = '';
-
-    pythonProcess.stdout.on('data', (data) => {
-      result += data.toString();
-      console.log('Python output:', data.toString());
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-      errorOutput += data.toString();
-      console.error(`Python Error: ${data}`);
-    });
+// Send a prediction request to the worker pool
+const predictEnergyConsumption = async (data) => {
+  // Ensure dayOfWeek is a number (0-6) for the Python script
+  if (typeof data.dayOfWeek === 'string') {
+    const days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'];
+    data.dayOfWeek = days.indexOf(data.dayOfWeek);
+    if (data.dayOfWeek === -1) data.dayOfWeek = new Date().getDay(); // Default to current day if invalid
+  }
 
-    pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        reject(new Error(`Python process exited with code ${code}. Error: ${errorOutput}`));
-        return;
-      }
-      try {
-        const trimmedResult = result.trim();
-        console.log('Trying to parse:', trimmedResult);
-        resolve(JSON.parse(trimmedResult));
-      } catch (e) {
-        console.error('Parse error:', e);
-        reject(new Error(`Failed to parse prediction result: ${result}`));
-      }
-    });
-  });
+  return predictionPool.predict(data);
 };
 
 // Health check endpoint
@@ -125,6 +97,103 @@ app.post('/api/predict', authenticateToken, async (req, res) => {
   }
 });
 
+// Protected batch prediction endpoint (one model call for many records)
+app.post('/api/predict/batch', authenticateToken, async (req, res) => {
+  try {
+    const records = Array.isArray(req.body) ? req.body : req.body.records;
+    if (!Array.isArray(records)) {
+      return res.status(400).json({
+        success: false,
+        message: 'Request body must contain a records array'
+      });
+    }
+
+    const prediction = await predictionPool.predictBatch(records);
+    if (!prediction.success) {
+      return res.status(400).json({
+        success: false,
+        message: prediction.error
+      });
+    }
+
+    res.json({
+      success: true,
+      prediction
+    });
+  } catch (error) {
+    console.error('Batch prediction error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Failed to make batch prediction',
+      error: error.message
+    });
+  }
+});
+
+// Protected forecast endpoint (every hour of a horizon in one model call)
+app.post('/api/forecast', authenticateToken, async (req, res) => {
+  try {
+    const forecast = await predictionPool.forecast(req.body || {});
+    if (!forecast.success) {
+      return res.status(400).json({
+        success: false,
+        message: forecast.error
+      });
+    }
+
+    res.json({
+      success: true,
+      forecast
+    });
+  } catch (error) {
+    console.error('Forecast error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Failed to make forecast',
+      error: error.message
+    });
+  }
+});
+
+// Background jobs in the ML service: proxy the request and pass its status code through
+const proxyMlJob = (method, pathFor, bodyFor) => async (req, res) => {
+  try {
+    const { status, body } = await mlJobRequest(method, pathFor(req), bodyFor ? bodyFor(req) : undefined);
+    res.status(status).json(body);
+  } catch (error) {
+    console.error('ML job request error:', error);
+    res.status(502).json({
+      success: false,
+      message: 'ML service unavailable',
+      error: error.message
+    });
+  }
+};
+
+// Start a retrain (admins only); poll /api/jobs/:id for progress
+app.post('/api/jobs/train', authenticateToken, authorize('admin'),
+  proxyMlJob('POST', () => '/jobs', (req) => ({ ...(req.body || {}), type: 'train' })));
+
+// Score a large batch of records in the background
+app.post('/api/jobs/score', authenticateToken,
+  proxyMlJob('POST', () => '/jobs', (req) => ({
+    ...(Array.isArray(req.body) ? { records: req.body } : req.body || {}),
+    type: 'score'
+  })));
+
+// Pass the query string (e.g. ?limit=) through to the ML service
+const queryString = (req) => {
+  const index = req.originalUrl.indexOf('?');
+  return index === -1 ? '' : req.originalUrl.slice(index);
+};
+
+app.get('/api/jobs', authenticateToken, proxyMlJob('GET', (req) => `/jobs${queryString(req)}`));
+app.get('/api/jobs/:id', authenticateToken, proxyMlJob('GET', (req) => `/jobs/${encodeURIComponent(req.params.id)}`));
+app.get('/api/jobs/:id/result', authenticateToken,
+  proxyMlJob('GET', (req) => `/jobs/${encodeURIComponent(req.params.id)}/result`));
+app.post('/api/jobs/:id/cancel', authenticateToken, authorize('admin'),
+  proxyMlJob('POST', (req) => `/jobs/${encodeURIComponent(req.params.id)}/cancel`));
+
 // Public prediction endpoint (for demo purposes)
 app.post('/api/public/predict', async (req, res) => {
   try {
@@ -174,5 +243,14 @@ app.listen(PORT, () => {
 process.on('unhandledRejection', (err, promise) => {
   console.log(`Error: ${err.message}`);
   // Close server & exit process
+  predictionPool.stop();
   process.exit(1);
 });
+
+// Stop the Python workers together with the server
+['SIGINT', 'SIGTERM'].forEach((signal) => {
+  process.on(signal, () => {
+    predictionPool.stop();
+    process.exit(0);
+  });
+});
@@ -0,0 +1,38 @@
+const http = require('http');
+const https = require('https');
+
+// Client for the background job endpoints of the Python ML API (/jobs).
+// Jobs run in the ML service, so a retrain or a large scoring run never
+// occupies the prediction worker pool.
+const mlJobRequest = (method, path, body) => {
+  const url = new URL(path, process.env.ML_API_URL || 'http://localhost:5001');
+  const payload = body === undefined ? null : JSON.stringify(body);
+  const headers = { Accept: 'application/json' };
+  if (payload !== null) {
+    headers['Content-Type'] = 'application/json';
+    headers['Content-Length'] = Buffer.byteLength(payload);
+  }
+  if (process.env.ML_ADMIN_TOKEN) {
+    headers['X-Admin-Token'] = process.env.ML_ADMIN_TOKEN;
+  }
+
+  return new Promise((resolve, reject) => {
+    const client = url.protocol === 'https:' ? https : http;
+    const req = client.request(url, { method, headers }, (res) => {
+      const chunks = [];
+      res.on('data', (chunk) => chunks.push(chunk));
+      res.on('end', () => {
+        try {
+          resolve({ status: res.statusCode, body: JSON.parse(Buffer.concat(chunks).toString() || '{}') });
+        } catch (error) {
+          reject(new Error(`Invalid response from the ML API (${res.statusCode})`));
+        }
+      });
+    });
+    req.on('error', reject);
+    if (payload !== null) req.write(payload);
+    req.end();
+  });
+};
+
+module.exports = { mlJobRequest };
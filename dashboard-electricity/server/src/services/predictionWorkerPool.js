@@ -0,0 +1,191 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const readline = require('readline');
+
+const DEFAULT_SCRIPT = path.join(__dirname, '..', '..', '..', 'ml', 'api_bridge.py');
+
+// A long-lived `api_bridge.py --worker` process. Requests are written as
+// NDJSON lines tagged with an id and resolved when the matching response
+// line comes back, so several requests can be in flight at once.
+class PredictionWorker {
+  constructor(pool, index) {
+    this.pool = pool;
+    this.index = index;
+    this.pending = new Map();
+    this.ready = false;
+    this.readyWaiters = [];
+    this.exited = false;
+    this.start();
+  }
+
+  start() {
+    const { pythonPath, scriptPath, threads } = this.pool.options;
+    this.process = spawn(pythonPath, [scriptPath, '--worker', '--threads', String(threads)], {
+      stdio: ['pipe', 'pipe', 'pipe']
+    });
+
+    readline.createInterface({ input: this.process.stdout }).on('line', (line) => this.onLine(line));
+
+    this.process.stderr.on('data', (data) => {
+      console.error(`[ML worker ${this.index}] ${data.toString().trim()}`);
+    });
+
+    this.process.on('error', (error) => {
+      console.error(`[ML worker ${this.index}] failed to start:`, error.message);
+    });
+
+    // A write to a worker that died (EPIPE) must fail its requests, not crash the server
+    this.process.stdin.on('error', (error) => {
+      console.error(`[ML worker ${this.index}] stdin error:`, error.message);
+      this.fail(new Error(`Python worker stdin failed: ${error.message}`));
+      // 'close' follows once the process is gone and restarts the worker
+      this.process.kill();
+    });
+
+    this.process.on('close', (code) => {
+      this.fail(new Error(`Python worker exited with code ${code}`));
+      this.pool.onWorkerExit(this, code);
+    });
+  }
+
+  // Stop taking requests and reject everything waiting on this worker
+  fail(error) {
+    this.exited = true;
+    this.ready = false;
+    this.readyWaiters.forEach(({ reject }) => reject(error));
+    this.readyWaiters = [];
+    this.pending.forEach(({ reject, timer }) => {
+      clearTimeout(timer);
+      reject(error);
+    });
+    this.pending.clear();
+  }
+
+  onLine(line) {
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch (e) {
+      console.error(`[ML worker ${this.index}] unparseable output:`, line);
+      return;
+    }
+
+    if (message.ready) {
+      this.ready = true;
+      this.readyWaiters.forEach(({ resolve }) => resolve());
+      this.readyWaiters = [];
+      return;
+    }
+
+    const entry = this.pending.get(message.id);
+    if (!entry) {
+      return;
+    }
+    clearTimeout(entry.timer);
+    this.pending.delete(message.id);
+    entry.resolve(message.result);
+  }
+
+  waitUntilReady() {
+    if (this.ready) {
+      return Promise.resolve();
+    }
+    return new Promise((resolve, reject) => this.readyWaiters.push({ resolve, reject }));
+  }
+
+  async send(op, data) {
+    await this.waitUntilReady();
+    if (this.exited) {
+      throw new Error('Python worker is restarting');
+    }
+
+    return new Promise((resolve, reject) => {
+      const id = String(this.pool.nextId++);
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`Prediction timed out after ${this.pool.options.timeoutMs}ms`));
+      }, this.pool.options.timeoutMs);
+
+      this.pending.set(id, { resolve, reject, timer });
+      this.process.stdin.write(JSON.stringify({ id, op, data }) + '\n');
+    });
+  }
+
+  stop() {
+    this.exited = true;
+    this.process.stdin.end();
+    this.process.kill();
+  }
+}
+
+// Small pool of prediction workers. Each request goes to the worker with the
+// fewest requests in flight; crashed workers are restarted automatically.
+class PredictionWorkerPool {
+  constructor(options = {}) {
+    this.options = {
+      size: Number(process.env.ML_WORKERS) || 2,
+      threads: Number(process.env.ML_WORKER_THREADS) || 4,
+      timeoutMs: Number(process.env.ML_WORKER_TIMEOUT_MS) || 30000,
+      pythonPath: process.env.PYTHON_PATH || 'python',
+      scriptPath: process.env.ML_BRIDGE_PATH || DEFAULT_SCRIPT,
+      ...options
+    };
+    this.nextId = 1;
+    this.workers = [];
+    this.stopped = false;
+  }
+
+  start() {
+    for (let i = 0; i < this.options.size; i++) {
+      this.workers.push(new PredictionWorker(this, i));
+    }
+    return this;
+  }
+
+  onWorkerExit(worker, code) {
+    if (this.stopped) {
+      return;
+    }
+    console.error(`[ML worker ${worker.index}] exited with code ${code}, restarting...`);
+    setTimeout(() => {
+      if (!this.stopped) {
+        this.workers[worker.index] = new PredictionWorker(this, worker.index);
+      }
+    }, 1000);
+  }
+
+  pickWorker() {
+    const alive = this.workers.filter((worker) => !worker.exited);
+    if (alive.length === 0) {
+      throw new Error('No prediction workers available');
+    }
+    return alive.reduce((best, worker) => (worker.pending.size < best.pending.size ? worker : best));
+  }
+
+  request(op, data) {
+    try {
+      return this.pickWorker().send(op, data);
+    } catch (error) {
+      return Promise.reject(error);
+    }
+  }
+
+  predict(data) {
+    return this.request('predict', data);
+  }
+
+  predictBatch(records) {
+    return this.request('predict_batch', records);
+  }
+
+  forecast(params) {
+    return this.request('forecast', params);
+  }
+
+  stop() {
+    this.stopped = true;
+    this.workers.forEach((worker) => worker.stop());
+  }
+}
+
+module.exports = { PredictionWorkerPool };
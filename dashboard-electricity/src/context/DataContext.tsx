@@ -141,30 +141,42 @@ export const DataProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
         hvacUsage: Math.random() > 0.5 ? 1 : 0,
         lightingUsage: Math.random() > 0.5 ? 1 : 0,
         renewableEnergy: Math.random() * 30,
-        dayOfWeek: Math.floor(Math.random() * 7),
-        holiday: Math.random() > 0.8 ? 1 : 0,
+        isHoliday: Math.random() > 0.8,
       };
 
-      const prediction = await makeApiCall(`${ML_API_BASE_URL}/predict`, {
+      // One request scores every hour of the horizon
+      const now = new Date();
+      now.setMinutes(0, 0, 0);
+      // Local wall-clock time without an offset, so the hourly features use the user's hours
+      const pad = (value: number) => String(value).padStart(2, '0');
+      const start = `${now.getFullYear()}-${pad(now.getMonth() + 1)}-${pad(now.getDate())}T${pad(now.getHours())}:00`;
+      const forecast = await makeApiCall(`${ML_API_BASE_URL}/forecast`, {
         method: 'POST',
-        body: JSON.stringify(predictionData),
+        body: JSON.stringify({
+          ...predictionData,
+          start,
+          horizon: days * 24,
+        }),
       });
 
-      // Generate forecast based on the prediction
-      const now = new Date();
+      // Summarize the hourly series per day
       const newForecast: ForecastData[] = [];
+      const mean = (values: number[]) => values.reduce((sum, value) => sum + value, 0) / values.length;
       
-      for (let i = 1; i <= days; i++) {
+      for (let i = 0; i < days; i++) {
+        const day = (series: number[]) => series.slice(i * 24, (i + 1) * 24);
+        const hours: number[] = day(forecast.values);
         const date = new Date(now);
         date.setDate(date.getDate() + i);
         
         newForecast.push({
-          id: `forecast-${i}`,
+          id: `forecast-${i + 1}`,
           timestamp: date.toISOString(),
-          predictedValue: prediction.prediction + (Math.random() - 0.5) * 10,
-          confidence: Math.random() * 20 + 80,
-          lowerBound: Math.random() * 30 + 30,
-          upperBound: Math.random() * 50 + 50,
+          predictedValue: mean(hours),
+          confidence: forecast.confidence ? mean(day(forecast.confidence)) : forecast.model_accuracy,
+          // Calibrated prediction intervals when the model has them, else the daily range
+          lowerBound: forecast.lower ? mean(day(forecast.lower)) : Math.min(...hours),
+          upperBound: forecast.upper ? mean(day(forecast.upper)) : Math.max(...hours),
           source: 'residential',
           region: 'Default'
         });
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Test the benchmark suite's statistics and regression check (not the timings themselves)
+"""
+
+import sys
+import os
+
+# Add the benchmarks directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml', 'benchmarks'))
+
+from bench_suite import measure, compare, benchmarks
+
+def test_measure_reports_latency_and_throughput():
+    result = measure(lambda: sum(range(1000)), items=10, min_time=0.05)
+    assert result['calls'] >= 5
+    assert 0 < result['p50_ms'] <= result['p99_ms']
+    assert result['throughput'] > 0
+
+def test_compare_flags_slower_benchmarks():
+    baseline = {'results': {'predict': {'p50_ms': 1.0}, 'model_load': {'p50_ms': 2.0}}}
+    results = {'predict': {'p50_ms': 1.5}, 'model_load': {'p50_ms': 2.1}, 'new_case': {'p50_ms': 9.0}}
+    assert compare(results, baseline, threshold=1.25) == ['predict']
+
+def test_every_requested_size_gets_a_feature_benchmark():
+    names = benchmarks([1000, 10_000_000])
+    assert {'train_features_1000', 'train_features_10000000', 'predict_batch', 'bridge_worker'} <= set(names)
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
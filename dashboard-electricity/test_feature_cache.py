@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test that cached feature columns match freshly computed features and that
+only missing or changed columns are recomputed
+"""
+
+import sys
+import os
+import shutil
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from ingest import build_features, build_lean_features, read_sorted_csv
+import feature_cache
+from feature_cache import load_features, column_file
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), 'data', 'Energy_consumption.csv')
+
+def assert_same_frame(df, expected):
+    assert list(df.columns) == list(expected.columns)
+    assert df['Timestamp'].equals(expected['Timestamp'])
+    numeric = [c for c in expected.columns if c != 'Timestamp']
+    assert np.array_equal(df[numeric].to_numpy(np.float64).view(np.int64),
+                          expected[numeric].to_numpy(np.float64).view(np.int64))
+
+def test_cache_matches_create_features_and_reuses_columns(tmp_path, monkeypatch):
+    """Cold and warm loads both equal create_features on the CSV"""
+    expected = build_features(read_sorted_csv(CSV_PATH)).ffill().bfill()
+    cache_dir = str(tmp_path / 'cache')
+
+    cold, stats = load_features(CSV_PATH, cache_dir)
+    assert stats['hits'] == 0 and stats['computed'] == len(expected.columns)
+    assert_same_frame(cold, expected)
+
+    warm, stats = load_features(CSV_PATH, cache_dir)
+    assert stats['computed'] == 0
+    assert_same_frame(warm, expected)
+
+    # A column whose definition changed has a new file name, so only it is recomputed
+    old_file = os.path.join(stats['directory'], column_file('UsageIntensity'))
+    other_files = {name: column_file(name) for name in expected.columns if name != 'UsageIntensity'}
+    np.save(old_file, np.zeros(len(expected)))
+    definition = feature_cache.column_definition
+    monkeypatch.setattr(feature_cache, 'column_definition',
+                        lambda name: definition(name) + (' (edited)' if name == 'UsageIntensity' else ''))
+
+    assert os.path.join(stats['directory'], column_file('UsageIntensity')) != old_file
+    assert {name: column_file(name) for name in other_files} == other_files
+    partial, stats = load_features(CSV_PATH, cache_dir)
+    assert stats['computed'] == 1 and os.path.exists(old_file)
+    # The zeroed file under the old name is ignored
+    assert_same_frame(partial, expected)
+
+def test_lean_load_equals_lean_features(tmp_path):
+    """A lean load reads only the needed columns, in the dtypes build_lean_features gives them"""
+    cache_dir = str(tmp_path / 'cache')
+    load_features(CSV_PATH, cache_dir)
+
+    lean, stats = load_features(CSV_PATH, cache_dir, lean=True, history=False)
+    expected = build_lean_features(read_sorted_csv(CSV_PATH), history=False)
+    assert stats['computed'] == 0 and stats['hits'] < len(build_features(read_sorted_csv(CSV_PATH)).columns)
+    assert list(lean.columns) == list(expected.columns)
+    assert (lean.dtypes == expected.dtypes).all()
+    assert_same_frame(lean, expected)
+
+def test_new_source_data_gets_its_own_entry(tmp_path):
+    """Editing the CSV changes the cache key; old sources beyond ``keep`` are pruned"""
+    cache_dir = str(tmp_path / 'cache')
+    csv_copy = str(tmp_path / 'energy.csv')
+    shutil.copy(CSV_PATH, csv_copy)
+
+    _, first = load_features(csv_copy, cache_dir, keep=1)
+    with open(csv_copy, 'a') as f:
+        f.write('2022-02-11 16:00:00,25.0,50.0,1500.0,5,On,Off,10.0,Friday,No,80.0\n')
+    df, second = load_features(csv_copy, cache_dir, keep=1)
+
+    assert second['directory'] != first['directory'] and second['hits'] == 0
+    assert len(df) == 1001
+    assert os.listdir(cache_dir) == [os.path.basename(second['directory'])]
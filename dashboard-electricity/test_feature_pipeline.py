@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test that the shared feature spec gives bit-identical results on the
+single-row and vectorized paths
+"""
+
+import sys
+import os
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from features import (INPUT_COLUMNS, FEATURE_NAMES, CALENDAR_DOMAINS, TABULATED_FEATURES,
+                      compile_row_evaluator, compile_column_evaluator)
+
+ALL_COLUMNS = INPUT_COLUMNS + FEATURE_NAMES
+
+def random_inputs(n, seed=0):
+    """Random input columns covering the whole calendar domain"""
+    rng = np.random.default_rng(seed)
+    return {
+        'Hour': rng.integers(0, 24, n),
+        'DayOfWeek': rng.integers(0, 7, n),
+        'Month': rng.integers(1, 13, n),
+        'DayOfYear': rng.integers(1, 367, n),
+        'WeekOfYear': rng.integers(1, 54, n),
+        'DayOfMonth': rng.integers(1, 32, n),
+        'Temperature': rng.uniform(-20, 45, n),
+        'Humidity': rng.uniform(0, 100, n),
+        'SquareFootage': rng.uniform(0, 5000, n),
+        'Occupancy': rng.integers(0, 50, n).astype(float),
+        'HVACUsage': rng.integers(0, 2, n),
+        'LightingUsage': rng.integers(0, 2, n),
+        'Holiday': rng.integers(0, 2, n),
+        'RenewableEnergy': rng.uniform(0, 30, n),
+        'EnergyConsumption': rng.uniform(0, 120, n),
+    }
+
+def test_row_and_column_evaluators_are_bit_identical():
+    """Every feature must match exactly between the two evaluators"""
+    columns = random_inputs(5000)
+    X = compile_column_evaluator(ALL_COLUMNS)(columns)
+
+    evaluate_row = compile_row_evaluator(ALL_COLUMNS)
+    rows = np.array([
+        evaluate_row(*[columns[name][i].item() for name in INPUT_COLUMNS])
+        for i in range(len(X))
+    ], dtype=np.float64)
+
+    assert X.shape == (5000, len(ALL_COLUMNS))
+    assert np.array_equal(X.view(np.int64), rows.view(np.int64))
+
+def test_unknown_columns_default_to_zero():
+    """Columns the spec does not know about are filled with 0.0"""
+    cols = ['Temperature', 'NotAFeature', 'TempSquared']
+    row = compile_row_evaluator(cols)(*[3.0] * len(INPUT_COLUMNS))
+    assert row == (3.0, 0.0, 9.0)
+
+def test_calendar_tables_reject_values_outside_their_domain():
+    """Calendar inputs are table indices, so they must be in-range integers"""
+    assert sum(len(names) for names in TABULATED_FEATURES.values()) == 16
+
+    evaluate = compile_column_evaluator(['Hour_sin'])
+    columns = random_inputs(3)
+    for bad in ([1.5, 2, 3], [0, CALENDAR_DOMAINS['Hour'], 1]):
+        columns['Hour'] = np.array(bad, dtype=np.float64)
+        try:
+            evaluate(columns)
+        except ValueError:
+            continue
+        raise AssertionError(f'Hour={bad} should be rejected')
+
+def test_predictor_single_and_batch_features_match():
+    """EnergyPredictor builds the same features for predict and predict_many"""
+    from predict import EnergyPredictor
+
+    predictor = EnergyPredictor()
+    records = [
+        {'temperature': 18.5 + i, 'humidity': 40 + i, 'hour': i % 24, 'dayOfWeek': i % 7,
+         'month': 1 + i % 12, 'hvacUsage': i % 2 == 0, 'occupancy': i % 9,
+         'dayOfYear': 1 + i * 7, 'weekOfYear': 1 + i, 'dayOfMonth': 1 + i % 28}
+        for i in range(48)
+    ]
+
+    single = np.vstack([predictor.create_feature_row(r) for r in records])
+    batch = predictor.create_feature_matrix(records)
+    assert np.array_equal(single, batch)
+
+def test_forecast_matches_batch_predictions():
+    """/forecast builds the same calendar grid and features as explicit records"""
+    import pandas as pd
+    from predict import EnergyPredictor
+
+    predictor = EnergyPredictor()
+    temperatures = [10.0 + i / 4 for i in range(72)]
+    result = predictor.forecast({'start': '2026-12-30T22:00:00', 'horizon': 72,
+                                 'temperature': temperatures, 'hvacUsage': True})
+
+    times = pd.date_range('2026-12-30 22:00', periods=72, freq='h')
+    records = [
+        {'hour': t.hour, 'dayOfWeek': t.dayofweek, 'month': t.month, 'dayOfYear': t.dayofyear,
+         'weekOfYear': t.isocalendar()[1], 'dayOfMonth': t.day,
+         'temperature': temperatures[i], 'hvacUsage': True}
+        for i, t in enumerate(times)
+    ]
+    assert result['success'] and result['start'] == '2026-12-30T22:00:00'
+    assert result['values'] == predictor.predict_many(records)['predictions']
+
+def test_forecast_converts_offset_start_to_local_time():
+    """A start with 'Z' or an offset is scored at the service's wall-clock hours"""
+    import time
+    from predict import EnergyPredictor
+
+    predictor = EnergyPredictor()
+    previous = os.environ.get('TZ')
+    os.environ['TZ'] = 'UTC-3'  # POSIX notation for UTC+3
+    time.tzset()
+    try:
+        local = predictor.forecast({'start': '2026-03-02T09:00', 'horizon': 24})
+        utc = predictor.forecast({'start': '2026-03-02T06:00:00Z', 'horizon': 24})
+        offset = predictor.forecast({'start': '2026-03-02T04:00:00-02:00', 'horizon': 24})
+    finally:
+        if previous is None:
+            os.environ.pop('TZ')
+        else:
+            os.environ['TZ'] = previous
+        time.tzset()
+
+    assert local['start'] == utc['start'] == offset['start'] == '2026-03-02T09:00:00'
+    assert local['values'] == utc['values'] == offset['values']
+
+if __name__ == "__main__":
+    test_row_and_column_evaluators_are_bit_identical()
+    test_unknown_columns_default_to_zero()
+    test_calendar_tables_reject_values_outside_their_domain()
+    test_predictor_single_and_batch_features_match()
+    test_forecast_matches_batch_predictions()
+    test_forecast_converts_offset_start_to_local_time()
+    print("✅ Feature pipeline paths are bit-identical!")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test that incremental lag/rolling features equal the batch pandas features
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from ingest import add_history_features
+from features import HISTORY_SPEC, HISTORY_ROWS
+from history_engine import HistoryEngine, HISTORY_NAMES
+
+def readings(n, seed=0):
+    """Random readings with gaps, constant runs and negative temperatures"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'EnergyConsumption': rng.normal(75, 10, n),
+        'Temperature': rng.normal(5, 8, n),
+        'Humidity': rng.uniform(20, 80, n),
+    })
+    df.loc[rng.choice(n, n // 50), 'Temperature'] = np.nan
+    df.loc[100:140, 'Humidity'] = 55.5
+    df.loc[300:330, 'EnergyConsumption'] = np.nan
+    return df
+
+def test_updates_match_pandas_bit_for_bit():
+    """Every update equals the pandas rolling/shift value for that row"""
+    df = readings(3000)
+    expected = add_history_features(df)[list(HISTORY_NAMES)].to_numpy()
+
+    engine = HistoryEngine()
+    updates = [engine.update('b1', r) for r in df.to_dict('records')]
+    actual = np.array([[u[name] for name in HISTORY_NAMES] for u in updates])
+
+    assert np.array_equal(actual, expected, equal_nan=True)
+
+def test_buildings_are_independent():
+    """Interleaved readings for two buildings give each its own history"""
+    a, b = readings(200, seed=1), readings(200, seed=2)
+    engine = HistoryEngine()
+    for ra, rb in zip(a.to_dict('records'), b.to_dict('records')):
+        engine.update('a', ra)
+        engine.update('b', rb)
+
+    for building, df in (('a', a), ('b', b)):
+        expected = add_history_features(df)[list(HISTORY_NAMES)].iloc[-1]
+        latest = engine.latest(building, filled=False)
+        assert np.array_equal([latest[n] for n in HISTORY_NAMES], expected.to_numpy(), equal_nan=True)
+    assert engine.readings('a') == 200 and engine.latest('missing') is None
+
+def test_filled_values_match_create_features_fill():
+    """Serving values equal ffill/bfill of the batch features (after the first reading)"""
+    df = readings(500, seed=3)
+    expected = add_history_features(df)[list(HISTORY_NAMES)].ffill().bfill().to_numpy()
+
+    engine = HistoryEngine()
+    filled = []
+    for r in df.to_dict('records'):
+        engine.update('b1', r)
+        latest = engine.latest('b1')
+        filled.append([latest[n] for n in HISTORY_NAMES])
+
+    assert np.array_equal(np.array(filled)[1:], expected[1:])
+
+def test_next_hour_shifts_lags_and_keeps_windows():
+    """next_hour() lags are those of the row after the last reading; windows end at that reading"""
+    df = readings(200, seed=4).fillna(50.0)
+    features = add_history_features(df)
+    lags = [name for name, _, statistic, _ in HISTORY_SPEC if statistic == 'lag']
+    windows = [name for name, _, statistic, _ in HISTORY_SPEC if statistic != 'lag']
+
+    engine = HistoryEngine()
+    for i, r in enumerate(df.to_dict('records')[:-1]):
+        engine.update('b1', r)
+        upcoming = engine.next_hour('b1')
+        if i >= HISTORY_ROWS:
+            assert [upcoming[n] for n in lags] == features[lags].iloc[i + 1].tolist()
+            assert [upcoming[n] for n in windows] == features[windows].iloc[i].tolist()
+
+    # Before enough history, lags fall back to the first reading like create_features' back fill
+    engine.reset()
+    engine.update('b1', {'EnergyConsumption': 70.0, 'Temperature': 20.0, 'Humidity': 50.0})
+    assert engine.next_hour('b1')['Energy_Lag_1'] == 70.0 and engine.next_hour('b1')['Energy_Lag_2'] == 70.0
+
+def test_predictor_uses_live_history():
+    """Models with lag features read them from the building's history"""
+    from predict import EnergyPredictor
+
+    engine = HistoryEngine()
+    predictor = EnergyPredictor(history=engine)
+    predictor.feature_cols = ['Temperature', 'Energy_Lag_1', 'Energy_Rolling_Mean_3']
+    predictor._compile_features()
+
+    for energy in (70.0, 80.0, 90.0):
+        engine.update(7, {'EnergyConsumption': energy, 'Temperature': 20.0, 'Humidity': 50.0})
+
+    # The request is for the next hour: its Energy_Lag_1 is the last reading
+    request = {'temperature': 21.0, 'hour': 10, 'buildingId': 7}
+    assert predictor.create_feature_row(request).tolist() == [[21.0, 90.0, 80.0]]
+    assert predictor.create_feature_matrix([request, {'temperature': 1.0}]).tolist() == [[21.0, 90.0, 80.0],
+                                                                                          [1.0, 0.0, 0.0]]
+
+def test_bundle_with_history_columns_serves_live_history(tmp_path):
+    """A bundle trained with lag/rolling columns loads, and its predictions use the building's history"""
+    from sklearn.linear_model import Ridge
+    from sklearn.preprocessing import StandardScaler
+    from model_bundle import write_bundle
+    from predict import EnergyPredictor
+
+    feature_cols = ['Temperature', 'Energy_Lag_1', 'Energy_Rolling_Mean_3']
+    rng = np.random.default_rng(0)
+    X = rng.normal([20.0, 75.0, 75.0], [5.0, 10.0, 5.0], size=(300, 3))
+    y = X @ np.array([0.5, 0.8, 0.3]) + 2.0 + rng.normal(size=300)
+    scaler_X, scaler_y = StandardScaler(), StandardScaler()
+    model = Ridge().fit(scaler_X.fit_transform(X), scaler_y.fit_transform(y.reshape(-1, 1)).ravel())
+    write_bundle(str(tmp_path), model, scaler_X, scaler_y, feature_cols, 'Ridge Regression')
+
+    engine = HistoryEngine()
+    predictor = EnergyPredictor(history=engine, models_path=str(tmp_path))
+    assert predictor.is_loaded and predictor.feature_cols == feature_cols
+
+    for energy in (70.0, 80.0, 90.0):
+        engine.update(7, {'EnergyConsumption': energy, 'Temperature': 20.0, 'Humidity': 50.0})
+
+    row = [[21.0, 90.0, 80.0]]
+    expected = scaler_y.inverse_transform(model.predict(scaler_X.transform(row)).reshape(-1, 1))[0, 0]
+    result = predictor.predict({'temperature': 21.0, 'hour': 10, 'buildingId': 7})
+    assert result['success'] and result['prediction'] == round(float(expected), 2)
+
+def test_forecast_rolls_history_forward():
+    """Each forecast hour sees the predicted consumption of the hours before it"""
+    from predict import EnergyPredictor
+
+    engine = HistoryEngine()
+    predictor = EnergyPredictor(history=engine)
+    predictor.feature_cols = ['Temperature', 'Energy_Lag_1', 'Energy_Rolling_Mean_3']
+    predictor._compile_features()
+    predictor.linear_kernel = (np.array([0.0, 1.0, 1.0]), 0.0)
+
+    for energy in (70.0, 80.0, 90.0):
+        engine.update(7, {'EnergyConsumption': energy, 'Temperature': 20.0, 'Humidity': 50.0})
+
+    result = predictor.forecast({'start': '2026-03-02T09:00', 'horizon': 3, 'buildingId': 7})
+    # Hour 0: lag 90, mean 80. Hour 1: lag 170, mean (80 + 90 + 170) / 3.
+    # Hour 2: lag 170 + 340 / 3, mean (90 + 170 + 170 + 340 / 3) / 3
+    hour1 = 170.0 + 340.0 / 3
+    hour2 = hour1 + (90.0 + 170.0 + hour1) / 3
+    assert result['success'] and result['values'] == [170.0, round(hour1, 2), round(hour2, 2)]
+    # The live history is left as it was
+    assert engine.readings(7) == 3 and engine.next_hour(7)['Energy_Lag_1'] == 90.0
+
+
+def test_telemetry_is_refused_when_history_would_be_split(monkeypatch):
+    """Several serving processes would each see part of the readings"""
+    import predict
+    client = predict.app.test_client()
+    reading = {'buildingId': 'telemetry-test', 'energyConsumption': 70.0, 'temperature': 20.0, 'humidity': 50.0}
+    try:
+        assert client.post('/telemetry', json=reading).status_code == 200
+        monkeypatch.setenv('ML_SERVING_PROCESSES', '2')
+        assert client.post('/telemetry', json=reading).status_code == 409
+        assert predict.history_engine.readings('telemetry-test') == 1
+    finally:
+        predict.history_engine.reset('telemetry-test')
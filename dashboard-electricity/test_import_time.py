@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test the serving import budget: the inference core and the Node bridge must
+start without Flask, pandas, sklearn or TensorFlow, within IMPORT_BUDGET_MS
+"""
+
+import os
+import sys
+import subprocess
+
+ML_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ml')
+
+# Measured at ~55 ms (numpy ~30 ms of it, model load included); generous for slow CI machines
+IMPORT_BUDGET_MS = 300
+
+HEAVY_MODULES = ('flask', 'pandas', 'sklearn', 'scipy', 'tensorflow', 'matplotlib')
+
+def import_times(module):
+    """{module name: cumulative import microseconds} from python -X importtime"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ML_DIR, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+def test_serving_imports_skip_heavy_modules():
+    for module in ('inference', 'api_bridge'):
+        times = import_times(module)
+        heavy = sorted({name.split('.')[0] for name in times} & set(HEAVY_MODULES))
+        assert not heavy, f'{module} imports {heavy}'
+
+def test_bridge_import_within_budget():
+    # Best of three, to ignore a cold disk cache
+    elapsed_ms = min(import_times('api_bridge')['api_bridge'] for _ in range(3)) / 1000
+    assert elapsed_ms < IMPORT_BUDGET_MS, f'api_bridge took {elapsed_ms:.0f} ms to import'
+
+if __name__ == "__main__":
+    for module in ('inference', 'api_bridge'):
+        print(f"{module}: {import_times(module)[module] / 1000:.1f} ms")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Test background jobs: scoring in a child process, job state in SQLite, the
+job endpoints and recovery from a dead service process
+"""
+
+import sys
+import os
+import time
+import json
+import subprocess
+import pytest
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from jobs import JobStore, JobRunner, report_progress
+
+RECORD = {'temperature': 28.0, 'humidity': 50.0, 'occupancy': 3, 'hour': 9, 'dayOfWeek': 1, 'month': 3,
+          'dayOfYear': 70, 'weekOfYear': 10, 'dayOfMonth': 11}
+
+def wait_for(store, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = store.get(job_id)
+        if job['status'] in ('succeeded', 'failed', 'cancelled'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} did not finish: {store.get(job_id)}')
+
+@pytest.fixture
+def runner(tmp_path):
+    finished = []
+    runner = JobRunner(JobStore(str(tmp_path / 'jobs.db')), on_finished=finished.append)
+    runner.finished = finished
+    return runner
+
+def test_score_job_matches_batch_prediction(runner):
+    from inference import get_predictor
+    records = [dict(RECORD, hour=h % 24, temperature=15 + h % 20) for h in range(250)]
+    job = runner.submit('score', {'records': records, 'chunkSize': 100})
+    assert job['status'] == 'queued' and job['params'] == {'chunkSize': 100, 'count': 250}
+
+    job = wait_for(runner.store, job['id'])
+    assert job['status'] == 'succeeded', job['error']
+    assert job['progress'] == 1.0 and job['result']['count'] == 250
+    with open(runner.store.file(job['id'], 'result')) as f:
+        result = json.load(f)
+    assert result['predictions'] == get_predictor().predict_many(records)['predictions']
+    assert not os.path.exists(runner.store.file(job['id'], 'input'))
+    # The runner's callback follows once the child has exited
+    deadline = time.time() + 10
+    while not runner.finished and time.time() < deadline:
+        time.sleep(0.05)
+    assert [j['id'] for j in runner.finished] == [job['id']]
+
+def test_bad_jobs_are_rejected_and_queued_jobs_cancelled(runner):
+    with pytest.raises(ValueError):
+        runner.submit('score', {'records': []})
+    with pytest.raises(ValueError):
+        runner.submit('train', {'epochs': 3})
+    with pytest.raises(ValueError):
+        runner.submit('deploy')
+    for chunk in ('abc', 0, -5, 2.5, True, 10 ** 9):
+        with pytest.raises(ValueError):
+            runner.submit('score', {'records': [RECORD], 'chunkSize': chunk})
+
+    first = runner.submit('score', {'records': [RECORD]})
+    second = runner.submit('score', {'records': [RECORD]})
+    assert runner.cancel(second['id'])
+    assert wait_for(runner.store, first['id'])['status'] == 'succeeded'
+    assert runner.store.get(second['id'])['status'] == 'cancelled'
+    assert not runner.cancel(first['id'])
+
+class ForkingRunner(JobRunner):
+    """Runs a child that starts a long-lived grandchild, like train.py's fit pools"""
+
+    def __init__(self, store, pid_file):
+        super().__init__(store)
+        self.pid_file = pid_file
+
+    def _command(self, job_id):
+        code = ("import subprocess, sys, time; "
+                "p = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); "
+                f"open({self.pid_file!r}, 'w').write(str(p.pid)); time.sleep(60)")
+        return [sys.executable, '-c', code]
+
+def running(pid):
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+def test_cancel_stops_the_processes_a_job_started(tmp_path):
+    pid_file = str(tmp_path / 'grandchild.pid')
+    runner = ForkingRunner(JobStore(str(tmp_path / 'jobs.db')), pid_file)
+    job = runner.submit('train')
+    deadline = time.time() + 30
+    while not (os.path.exists(pid_file) and open(pid_file).read()) and time.time() < deadline:
+        time.sleep(0.05)
+    grandchild = int(open(pid_file).read())
+    assert running(grandchild)
+
+    assert runner.cancel(job['id'])
+    assert wait_for(runner.store, job['id'])['status'] == 'cancelled'
+    deadline = time.time() + 10
+    while running(grandchild) and time.time() < deadline:
+        time.sleep(0.05)
+    assert not running(grandchild)
+
+def test_jobs_of_a_dead_process_are_failed(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    job = store.create('train', {})
+    store.update(job['id'], status='running', owner_pid=dead.pid)
+    live = store.create('train', {})
+
+    # The job's child process reports progress through the environment
+    monkeypatch.setenv('ML_JOB_ID', live['id'])
+    monkeypatch.setenv('ML_JOBS_DB', store.path)
+    report_progress(0.5, 'Halfway')
+    assert store.get(live['id'])['progress'] == 0.5
+
+    assert store.fail_orphans() == [job['id']]
+    assert store.get(job['id'])['status'] == 'failed'
+    assert store.get(live['id'])['status'] == 'queued'
+
+class SleepingRunner(JobRunner):
+    """Runs a child that only sleeps, so a job holds its slot until cancelled"""
+
+    def _command(self, job_id):
+        return [sys.executable, '-c', 'import time; time.sleep(60)']
+
+def wait_for_status(store, job_id, status, timeout=30):
+    deadline = time.time() + timeout
+    while store.get(job_id)['status'] != status and time.time() < deadline:
+        time.sleep(0.05)
+    return store.get(job_id)['status'] == status
+
+def test_runners_sharing_a_database_share_the_slots(tmp_path):
+    """Runners of different processes respect one ML_JOB_WORKERS limit, and train jobs run one at a time"""
+    path = str(tmp_path / 'jobs.db')
+    first, second = SleepingRunner(JobStore(path), workers=2), SleepingRunner(JobStore(path), workers=2)
+    train = first.submit('train')
+    assert wait_for_status(first.store, train['id'], 'running')
+
+    other_train = second.submit('train')
+    score = second.submit('score', {'records': [RECORD]})
+    assert wait_for_status(second.store, score['id'], 'running')
+    # Both slots are taken, and a second train job waits for the first in any case
+    third_score = first.submit('score', {'records': [RECORD]})
+    time.sleep(1.5)
+    assert second.store.get(other_train['id'])['status'] == 'queued'
+    assert first.store.get(third_score['id'])['status'] == 'queued'
+
+    assert second.cancel(score['id'])
+    assert wait_for_status(first.store, third_score['id'], 'running')
+    assert second.store.get(other_train['id'])['status'] == 'queued'
+
+    assert first.cancel(train['id'])
+    assert wait_for_status(second.store, other_train['id'], 'running')
+
+    for job_runner, job in ((second, other_train), (first, third_score)):
+        job_runner.cancel(job['id'])
+    for job in (train, score, other_train, third_score):
+        assert wait_for(first.store, job['id'])['status'] == 'cancelled'
+
+def test_job_endpoints(runner, monkeypatch):
+    import predict
+    monkeypatch.setattr(predict, '_job_runner', runner)
+    client = predict.app.test_client()
+
+    response = client.post('/jobs', json={'type': 'score', 'records': [RECORD, RECORD]})
+    assert response.status_code == 202
+    job_id = response.get_json()['job']['id']
+    wait_for(runner.store, job_id)
+
+    assert client.get(f'/jobs/{job_id}').get_json()['job']['status'] == 'succeeded'
+    result = client.get(f'/jobs/{job_id}/result').get_json()
+    assert result['success'] and len(result['predictions']) == 2
+    assert client.get('/jobs').get_json()['jobs'][0]['id'] == job_id
+
+    assert client.get('/jobs/nope').status_code == 404
+    for limit in ('abc', '0', '-1', '100000'):
+        assert client.get(f'/jobs?limit={limit}').status_code == 400
+    assert client.post('/jobs', json={'type': 'score'}).status_code == 400
+    assert client.post('/jobs', json={'type': 'score', 'records': [RECORD], 'chunkSize': 0}).status_code == 400
+    monkeypatch.setenv('ML_ADMIN_TOKEN', 'secret')
+    assert client.post('/jobs', json={'type': 'train'}).status_code == 403
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
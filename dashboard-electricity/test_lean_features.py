@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test the lean training features: the same values as the full feature frame
+in float32/int8 columns, without duplicate or unused columns
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from ingest import build_features, build_lean_features, compact_features, compact_dtype, fill_gaps, duplicate_columns
+from features import HISTORY_SPEC
+from synthetic import synthetic_frame
+
+def raw_frame(rows=2000):
+    """Raw rows as read_csv returns them, with some gaps"""
+    df = synthetic_frame(rows)
+    for col in ('HVACUsage', 'LightingUsage', 'DayOfWeek', 'Holiday'):
+        df[col] = df[col].astype(str)
+    df = df.astype({col: np.float64 for col in df.columns if df[col].dtype == np.float32})
+    df.loc[[0, 1, 500, 501, 1999], 'Temperature'] = np.nan
+    df.loc[[3, 900], 'EnergyConsumption'] = np.nan
+    return df
+
+def test_lean_features_equal_the_full_features():
+    raw = raw_frame()
+    full = build_features(raw).ffill().bfill()
+    lean = build_lean_features(raw, block_rows=300)
+
+    # OccupancyDensity is an exact copy of Occupancy_SqFt
+    assert set(full.columns) - set(lean.columns) == {'OccupancyDensity'}
+    assert list(lean.columns) == [c for c in full.columns if c != 'OccupancyDensity']
+    assert lean['Timestamp'].equals(full['Timestamp'])
+    for col in lean.columns.drop('Timestamp'):
+        assert lean[col].dtype in (np.float32, np.int8, np.int16), col
+        expected = full[col].to_numpy(dtype=np.float32)
+        assert np.array_equal(lean[col].to_numpy(dtype=np.float32), expected), col
+    assert lean['HVACUsage'].dtype == np.int8 and lean['Temperature'].dtype == np.float32
+    assert lean.memory_usage().sum() < full.memory_usage().sum() / 2
+
+    # Cached or stored full frames compact to the same columns
+    assert compact_features(full).equals(lean)
+
+def test_history_features_are_skipped_for_tabular_models():
+    from train import create_features
+    lean = create_features(raw_frame(), lean=True, families=('tabular',))
+    assert not {name for name, *_ in HISTORY_SPEC} & set(lean.columns)
+    assert not lean.isna().values.any()
+
+def test_fill_gaps_matches_pandas():
+    values = np.array([np.nan, np.nan, 1.0, np.nan, 3.0, np.nan, np.nan], dtype=np.float32)
+    expected = pd.Series(values).ffill().bfill().to_numpy()
+    assert np.array_equal(fill_gaps(values), expected) and np.array_equal(values, expected)
+    assert np.isnan(fill_gaps(np.full(3, np.nan))).all()
+
+def test_compact_dtype_and_duplicates():
+    assert compact_dtype(np.array([0.0, 1.0, -3.0])) == np.int8
+    assert compact_dtype(np.array([0.0, 366.0])) == np.int16
+    assert compact_dtype(np.array([0.0, 0.5])) == np.float32
+    assert compact_dtype(np.array([1.0, np.nan])) == np.float32
+    columns = {'a': np.arange(200.0), 'b': np.arange(200.0), 'c': np.arange(200.0) + 1, 'd': np.arange(200)}
+    assert duplicate_columns(columns) == ['b']
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
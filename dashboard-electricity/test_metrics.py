@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test the runtime metrics: Prometheus text rendering, and the request and
+stage metrics the prediction API exposes on /metrics
+"""
+
+import sys
+import os
+import pytest
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from metrics import Registry
+
+def sample(text, line_start):
+    """Value of the first sample line starting with ``line_start``"""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f'no sample {line_start} in:\n{text}')
+
+def test_render_counters_gauges_and_histograms():
+    registry = Registry()
+    requests = registry.counter('requests_total', 'Requests', ['endpoint'])
+    memory = registry.gauge('memory_bytes', 'Memory')
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+
+    requests.labels('/predict').inc()
+    requests.labels(endpoint='/predict').inc(2)
+    requests.labels('say "hi"\n').inc()
+    memory.set(1024)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert '# TYPE requests_total counter' in text
+    assert sample(text, 'requests_total{endpoint="/predict"}') == 3
+    assert 'requests_total{endpoint="say \\"hi\\"\\n"} 1' in text
+    assert sample(text, 'memory_bytes') == 1024
+    # Buckets are cumulative and include values equal to the bound
+    assert sample(text, 'latency_seconds_bucket{le="0.1"}') == 2
+    assert sample(text, 'latency_seconds_bucket{le="1"}') == 3
+    assert sample(text, 'latency_seconds_bucket{le="+Inf"}') == 4
+    assert sample(text, 'latency_seconds_count') == 4
+    assert sample(text, 'latency_seconds_sum') == pytest.approx(3.65)
+
+    with pytest.raises(ValueError):
+        requests.labels('/predict').inc(-1)
+    with pytest.raises(AttributeError):
+        requests.inc()
+    with pytest.raises(ValueError):
+        registry.counter('requests_total', 'Again')
+
+def test_collectors_run_at_render_time():
+    registry, state = Registry(), {'entries': 1}
+    registry.add_collector(lambda: [('entries', 'gauge', 'Entries', [({'cache': 'a'}, state['entries'])])])
+    state['entries'] = 5
+    assert sample(registry.render(), 'entries{cache="a"}') == 5
+
+def test_api_exposes_request_and_stage_metrics():
+    from predict import app
+    client = app.test_client()
+    record = {'temperature': 28.0, 'humidity': 50.0, 'occupancy': 3, 'hour': 9, 'dayOfWeek': 1, 'month': 3,
+              'dayOfYear': 70, 'weekOfYear': 10, 'dayOfMonth': 11}
+
+    before = client.get('/metrics').get_data(as_text=True)
+    assert client.post('/predict/batch', json=[record, record]).status_code == 200
+    assert client.post('/predict', json={}).status_code == 400
+
+    response = client.get('/metrics')
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+
+    def grew(line_start, by):
+        old = sample(before, line_start) if line_start in before else 0
+        assert sample(text, line_start) - old == by, line_start
+
+    grew('energy_http_requests_total{endpoint="/predict/batch",method="POST",status="200"}', 1)
+    grew('energy_http_request_errors_total{endpoint="/predict"}', 1)
+    grew('energy_http_request_duration_seconds_count{endpoint="/predict/batch"}', 1)
+    grew('energy_prediction_stage_seconds_count{stage="features"}', 1)
+    grew('energy_prediction_stage_seconds_count{stage="inference"}', 1)
+    grew('energy_predictions_total{method="predict_many"}', 2)
+    assert sample(text, 'energy_model_loaded') == 1
+    assert sample(text, 'energy_model_load_seconds') > 0
+    assert sample(text, 'process_resident_memory_bytes') > 0
+
+def test_model_info_reports_recorded_metrics():
+    from predict import app, get_predictor
+    performance = app.test_client().get('/model-info').get_json()['model_performance']
+    metrics = get_predictor().test_metrics
+    if 'accuracy' not in metrics:
+        assert performance is None
+    else:
+        assert performance['accuracy'] == f"{metrics['accuracy']:.1f}%"
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test that folded linear kernels predict exactly what the model and its
+scalers predict, and that bundles never ship a kernel that does not
+"""
+
+import sys
+import os
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.preprocessing import StandardScaler, RobustScaler, MinMaxScaler
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+import features
+import model_bundle
+from model_bundle import BundleError, fold_linear_kernel, kernel_matches, write_bundle, read_manifest, load_bundle
+
+def fitted(scaler_X, scaler_y, rows=200, n=4, alpha=1.0):
+    rng = np.random.default_rng(1)
+    X = rng.normal(10, 3, size=(rows, n))
+    y = X @ np.array([1.5, -2.0, 0.5, 3.0]) + 40 + rng.normal(size=rows)
+    model = Ridge(alpha=alpha).fit(scaler_X.fit_transform(X), scaler_y.fit_transform(y.reshape(-1, 1)).ravel())
+    return model, X
+
+@pytest.mark.parametrize('scaler_X', [
+    StandardScaler(), StandardScaler(with_mean=False), StandardScaler(with_std=False),
+    RobustScaler(with_centering=False), RobustScaler(with_scaling=False),
+])
+def test_kernel_honors_disabled_scaler_steps(scaler_X):
+    scaler_y = StandardScaler(with_mean=False)
+    model, X = fitted(scaler_X, scaler_y)
+    weights, bias = fold_linear_kernel(model, scaler_X, scaler_y, X.shape[1])
+
+    expected = scaler_y.inverse_transform(model.predict(scaler_X.transform(X[:5])).reshape(-1, 1)).ravel()
+    assert np.allclose(X[:5] @ weights + bias, expected)
+    assert kernel_matches((weights, bias), model, scaler_X, scaler_y, X.shape[1])
+
+def test_bundle_drops_a_kernel_that_does_not_match(tmp_path, monkeypatch):
+    scaler_X, scaler_y = StandardScaler(with_mean=False), StandardScaler()
+    model, X = fitted(scaler_X, scaler_y)
+    feature_cols = ['Temperature', 'Humidity', 'Occupancy', 'Hour']
+
+    good = read_manifest(write_bundle(str(tmp_path), model, scaler_X, scaler_y, feature_cols, 'Ridge Regression'))
+    assert good['kernel'] is not None
+
+    # A kernel that is off by one, for another model (a new bundle id)
+    model, X = fitted(scaler_X, scaler_y, alpha=2.0)
+    weights, bias = fold_linear_kernel(model, scaler_X, scaler_y, X.shape[1])
+    monkeypatch.setattr(model_bundle, 'fold_linear_kernel', lambda *args: (weights, bias + 1.0))
+    bad = read_manifest(write_bundle(str(tmp_path), model, scaler_X, scaler_y, feature_cols, 'Ridge Regression'))
+    assert bad['kernel'] is None
+
+def test_bundle_refuses_a_changed_helper_feature(tmp_path, monkeypatch):
+    """Redefining a feature the model only uses indirectly invalidates the bundle"""
+    scaler_X, scaler_y = StandardScaler(), StandardScaler()
+    model, X = fitted(scaler_X, scaler_y)
+    feature_cols = ['Temperature', 'Humidity', 'Occupancy', 'UsageIntensity']
+    bundle_dir = write_bundle(str(tmp_path), model, scaler_X, scaler_y, feature_cols, 'Ridge Regression')
+    load_bundle(bundle_dir)
+
+    # UsageIntensity = TotalUsage * Occupancy; only TotalUsage changes
+    expressions = {**features._EXPRESSIONS, 'TotalUsage': 'HVACUsage + 2 * LightingUsage'}
+    monkeypatch.setattr(features, '_EXPRESSIONS', expressions)
+    assert 'TotalUsage' not in feature_cols
+    with pytest.raises(BundleError, match='Feature definitions changed'):
+        load_bundle(bundle_dir)
+
+@pytest.mark.parametrize('scaler_X, stored', [(RobustScaler(), True), (MinMaxScaler(), False)])
+def test_generic_models_are_scaled_from_stored_arrays(tmp_path, scaler_X, stored):
+    """Without a kernel, serving scales with the bundle's arrays and matches the sklearn pipeline"""
+    from inference import EnergyPredictor
+
+    scaler_y = StandardScaler()
+    rng = np.random.default_rng(2)
+    X = rng.normal([25.0, 60.0, 5.0, 12.0], [5.0, 10.0, 2.0, 6.0], size=(200, 4))
+    y = X @ np.array([1.5, -0.5, 2.0, 0.3]) + 40 + rng.normal(size=200)
+    model = KNeighborsRegressor().fit(scaler_X.fit_transform(X), scaler_y.fit_transform(y.reshape(-1, 1)).ravel())
+    feature_cols = ['Temperature', 'Humidity', 'Occupancy', 'Hour']
+    manifest = read_manifest(write_bundle(str(tmp_path), model, scaler_X, scaler_y, feature_cols, 'KNN'))
+    assert manifest['kernel'] is None
+    assert (manifest['scalers'] is not None) == stored
+
+    predictor = EnergyPredictor(models_path=str(tmp_path))
+    assert predictor.is_loaded and predictor.linear_kernel is None
+    assert (predictor._bundle.scaler_params is not None) == stored
+    expected = scaler_y.inverse_transform(model.predict(scaler_X.transform(X)).reshape(-1, 1)).ravel()
+    assert np.array_equal(predictor._predict_matrix(X), expected)
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test that parallel training fits the same models as a plain sequential loop
+and stays within its core budget
+"""
+
+import sys
+import os
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from parallel_training import plan_cores, fit_models
+
+def candidate_models():
+    return {
+        'Random Forest': RandomForestRegressor(n_estimators=20, max_depth=5, random_state=42),
+        'Ridge Regression': Ridge(alpha=1.0),
+    }
+
+def test_plan_never_exceeds_core_budget():
+    """Workers times threads per model stays within the budget"""
+    for n_models in (1, 3, 7):
+        for cores in (1, 2, 4, 8, 32):
+            workers, threads = plan_cores(n_models, cores)
+            assert 1 <= workers <= n_models
+            assert workers * threads <= max(cores, 1)
+    assert plan_cores(7, 32) == (7, 4)
+
+def test_parallel_fit_matches_sequential():
+    """Models fitted in the pool predict exactly like models fitted in a loop"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 6))
+    y = X @ rng.normal(size=6) + rng.normal(scale=0.1, size=300)
+
+    fitted = fit_models(candidate_models(), X, y, cores=2)
+    assert list(fitted) == ['Random Forest', 'Ridge Regression']
+
+    for name, model in candidate_models().items():
+        expected = model.fit(X, y).predict(X)
+        parallel_model, seconds = fitted[name]
+        assert seconds >= 0
+        assert np.array_equal(parallel_model.predict(X), expected)
+
+    # n_jobs is only raised for the fit; the saved model keeps its original setting
+    assert fitted['Random Forest'][0].n_jobs is None
+
+if __name__ == "__main__":
+    test_plan_never_exceeds_core_budget()
+    test_parallel_fit_matches_sequential()
+    print("✅ Parallel training matches sequential training!")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test the prediction cache: LRU/TTL behaviour, counters, and that repeated
+requests skip feature building and the model
+"""
+
+import sys
+import os
+import time
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from prediction_cache import PredictionCache
+
+def test_lru_eviction_and_counters():
+    cache = PredictionCache(maxsize=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1          # 'a' is now most recently used
+    cache.put('c', 3)                   # evicts 'b'
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['size']) == (2, 1, 1, 2)
+
+def test_entries_expire_after_ttl():
+    cache = PredictionCache(maxsize=10, ttl=0.01)
+    cache.put('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+def test_repeated_requests_skip_the_model():
+    """Equal canonical inputs are answered from the cache with identical results"""
+    from predict import EnergyPredictor
+
+    predictor = EnergyPredictor()
+    calls = []
+    score = predictor._predict_matrix
+    predictor._predict_matrix = lambda X: calls.append(X) or score(X)
+
+    request = {'temperature': 21.5, 'humidity': 48.0, 'hour': 9, 'dayOfWeek': 2, 'month': 3,
+               'dayOfYear': 70, 'weekOfYear': 10, 'dayOfMonth': 11}
+    first = predictor.predict(dict(request))
+    second = predictor.predict({**request, 'temperature': 21.5000001})
+
+    assert len(calls) == 1
+    assert {k: v for k, v in first.items() if k != 'timestamp'} == \
+           {k: v for k, v in second.items() if k != 'timestamp'}
+    assert predictor.cache.stats()['hits'] == 1
+
+    # A reloaded model starts with its own empty cache
+    assert EnergyPredictor().cache.stats()['size'] == 0
+
+if __name__ == "__main__":
+    test_lru_eviction_and_counters()
+    test_entries_expire_after_ttl()
+    test_repeated_requests_skip_the_model()
+    print("✅ Prediction cache works!")
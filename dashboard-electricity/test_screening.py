@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test candidate screening: time-stratified subsamples, learning curve
+extrapolation and the choice of models to train in full
+"""
+
+import sys
+import os
+import time
+import numpy as np
+import pytest
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.dummy import DummyRegressor
+from sklearn.linear_model import Ridge
+from screening import time_subsample, subsample_sizes, extrapolate, screen_models
+
+class QuadraticTimeRidge(BaseEstimator, RegressorMixin):
+    """Ridge that sleeps quadratically in the number of rows, like SVR"""
+
+    def fit(self, X, y):
+        time.sleep((len(X) / 4000) ** 2)
+        self.model_ = Ridge(alpha=1e-3).fit(X, y)
+        return self
+
+    def predict(self, X):
+        return self.model_.predict(X)
+
+def test_subsamples_cover_every_stratum():
+    rows = time_subsample(1000, 10, np.random.default_rng(0))
+    assert len(rows) == 10 and np.all(np.diff(rows) > 0)
+    assert np.array_equal(rows // 100, np.arange(10))
+    assert subsample_sizes(100_000) == [1562, 3125, 6250]
+    assert subsample_sizes(10_000_000) == [5000, 10000, 20000]
+    assert subsample_sizes(500) == [100]
+
+def test_power_law_extrapolation():
+    sizes = [100, 200, 400]
+    assert extrapolate(sizes, [s ** 2 for s in sizes], 1600) == pytest.approx(1600 ** 2)
+    assert extrapolate(sizes, [1 / np.sqrt(s) for s in sizes], 10_000) == pytest.approx(0.01)
+    assert extrapolate([100], [3.0], 10_000) == 3.0
+
+def test_screening_keeps_the_accurate_models_and_can_trade_for_time():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(4000, 5))
+    y = X @ np.array([3.0, -2.0, 1.0, 0.0, 0.5]) + rng.normal(scale=0.1, size=4000)
+    models = {'Mean': DummyRegressor(), 'Ridge': Ridge(alpha=1.0), 'Slow Ridge': QuadraticTimeRidge()}
+
+    report = screen_models(models, X[:3000], y[:3000], X[3000:], y[3000:], top_k=2, max_fraction=0.25, cores=1)
+    assert set(report['selected']) == {'Ridge', 'Slow Ridge'}
+    assert report['models']['Slow Ridge']['predicted_seconds'] > report['models']['Ridge']['predicted_seconds']
+    assert report['models']['Mean']['predicted_rmse'] > 10 * report['models']['Ridge']['predicted_rmse']
+
+    report = screen_models(models, X[:3000], y[:3000], X[3000:], y[3000:], top_k=1, time_weight=1.0,
+                           max_fraction=0.25, cores=1)
+    assert report['selected'] == ['Ridge']
+    assert report['saved_seconds'] > 0
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Test the production server settings: command line and environment
+"""
+
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+import serve
+
+def test_defaults(monkeypatch):
+    for name in ('SERVE_BIND', 'SERVE_WORKERS', 'SERVE_THREADS', 'SERVE_TIMEOUT', 'SERVE_KEEPALIVE'):
+        monkeypatch.delenv(name, raising=False)
+    args = serve.parse_args([])
+    assert args.bind == '0.0.0.0:5001'
+    assert args.workers == serve._default_workers() >= 1
+    assert (args.threads, args.timeout, args.keepalive) == (4, 30, 5)
+
+def test_environment_and_command_line(monkeypatch):
+    monkeypatch.setenv('SERVE_WORKERS', '3')
+    monkeypatch.setenv('SERVE_KEEPALIVE', '2')
+    args = serve.parse_args(['--workers', '5', '--bind', '127.0.0.1:6000'])
+    assert args.workers == 5              # the command line wins
+    assert args.keepalive == 2
+    assert args.bind == '127.0.0.1:6000'
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
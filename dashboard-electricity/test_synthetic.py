@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test the synthetic data generator: schema, reproducibility, seasonality and
+the fast CSV writer
+"""
+
+import io
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from synthetic import (COLUMNS, CSV_DECIMALS, generate, chunk_csv, csv_header, synthetic_frame,
+                       write_csv, write_store, hours_in_years, _number_field)
+
+def rendered(field):
+    chars, starts = field
+    return [bytes(row[start:]).decode() for row, start in zip(chars, starts)]
+
+def test_numbers_render_like_format():
+    values = np.array([0.0, -0.004, -0.006, 5.5, -12.3449, 99.999, -99.999, 123.456])
+    assert rendered(_number_field(values, 2, 3)) == [f'{v:.2f}'.replace('-0.00', '0.00') for v in values]
+    assert rendered(_number_field(np.array([0, 7, 12]), 0, 2)) == ['0', '7', '12']
+    with pytest.raises(ValueError):
+        _number_field(np.array([1000.0]), 1, 3)
+
+def test_csv_matches_the_generated_columns():
+    chunk = next(generate(buildings=3, hours=72))
+    df = pd.read_csv(io.BytesIO(csv_header() + chunk_csv(chunk)))
+    assert tuple(df.columns) == COLUMNS and len(df) == 3 * 72
+    for col, (decimals, _) in CSV_DECIMALS.items():
+        assert np.allclose(df[col], np.round(chunk[col], decimals)), col
+
+    timestamps = pd.to_datetime(df['Timestamp'])
+    assert timestamps.is_monotonic_increasing
+    assert (timestamps.dt.day_name() == df['DayOfWeek']).all()
+    assert set(df['HVACUsage']) <= {'On', 'Off'} and set(df['Holiday']) <= {'Yes', 'No'}
+
+def test_output_is_reproducible_and_independent_of_workers(tmp_path):
+    paths = [tmp_path / 'one.csv', tmp_path / 'two.csv']
+    write_csv(paths[0], buildings=4, hours=24 * 10, seed=3, chunk_rows=200)
+    write_csv(paths[1], buildings=4, hours=24 * 10, seed=3, chunk_rows=200, workers=2)
+    assert paths[0].read_bytes() == paths[1].read_bytes()
+
+    with_ids = pd.read_csv(io.BytesIO(csv_header(True) + chunk_csv(next(generate(4, 24)), building_id=True)))
+    assert with_ids['BuildingId'].tolist() == [0, 1, 2, 3] * 24
+
+def test_data_is_seasonal():
+    df = synthetic_frame(hours_in_years('2022-01-01', 1), buildings=1)
+    assert len(df) == 8760
+    monthly = df.groupby(df['Timestamp'].dt.month)['Temperature'].mean()
+    assert monthly[7] - monthly[1] > 8
+    business = df['Timestamp'].dt.hour.between(9, 16) & (df['Timestamp'].dt.dayofweek < 5)
+    assert df.loc[business, 'Occupancy'].mean() > 2 * df.loc[~business, 'Occupancy'].mean()
+    assert df.loc[df['Timestamp'].dt.hour == 0, 'RenewableEnergy'].max() < 2
+
+def test_store_has_every_feature(tmp_path):
+    from ingest import open_column_store
+    manifest = write_store(str(tmp_path / 'store'), buildings=2, hours=24 * 30, chunk_rows=24 * 8)
+    columns = open_column_store(str(tmp_path / 'store'))
+    assert manifest['rows'] == 2 * 24 * 30
+    assert 'Energy_Rolling_Mean_24' in columns
+    assert not np.isnan(columns['Energy_Lag_24']).any()
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test the training report: compact JSON without fitted objects, and plots
+rendered from the report alone
+"""
+
+import sys
+import os
+import json
+import subprocess
+import numpy as np
+import pytest
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from training_report import REPORT_FILE, build_report, write_report, render_plots
+
+class FakeHistory:
+    history = {'loss': [np.float32(0.5), np.float32(0.25)], 'val_loss': [0.6, 0.4],
+               'mae': [0.4, 0.2], 'val_mae': [0.5, 0.3], 'lr': [0.001, 0.001]}
+
+def metrics(accuracy):
+    return {'rmse': np.float64(1.7), 'mae': 1.2, 'r2': 0.95, 'accuracy': accuracy, 'within_10_percent': 100.0,
+            'mean_percentage_error': 1.6}
+
+def results():
+    return {
+        'Ridge Regression': {**metrics(98.4), 'model': object(), 'model_name': 'Ridge Regression'},
+        'Enhanced LSTM': {**metrics(91.0), 'model': object(), 'history': FakeHistory()},
+    }
+
+def test_report_is_small_plain_json(tmp_path):
+    report = build_report(results(), 'Ridge Regression', bundle_id='b1', screening=None)
+    path = write_report(str(tmp_path), report)
+    assert os.path.basename(path) == REPORT_FILE
+
+    with open(path) as f:
+        loaded = json.load(f)
+    assert loaded['best_model'] == 'Ridge Regression' and loaded['bundle_id'] == 'b1'
+    assert set(loaded['models']['Ridge Regression']) == set(metrics(0))
+    assert loaded['lstm_history'] == {'loss': [0.5, 0.25], 'val_loss': [0.6, 0.4], 'mae': [0.4, 0.2],
+                                      'val_mae': [0.5, 0.3]}
+    assert os.path.getsize(path) < 4096
+
+def test_plots_render_from_the_report(tmp_path):
+    report = json.loads(json.dumps(build_report(results(), 'Ridge Regression')))
+    paths = render_plots(report, str(tmp_path), dpi=30)
+    assert [os.path.basename(p) for p in paths] == ['enhanced_model_analysis.png', 'enhanced_training_history.png']
+    assert all(os.path.getsize(p) > 0 for p in paths)
+
+def test_matplotlib_is_only_imported_for_plots():
+    code = "import sys, training_report; print('matplotlib' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=os.path.join(os.path.dirname(__file__), 'ml'),
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == 'False'
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
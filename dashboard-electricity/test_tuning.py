@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test the hyperparameter search: walk-forward folds, successive halving and
+the wall-clock budget
+"""
+
+import sys
+import os
+import time
+import numpy as np
+import pytest
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.linear_model import Ridge
+from tuning import time_series_folds, rung_folds, tune_models
+
+class SlowRegressor(BaseEstimator, RegressorMixin):
+    """Predicts the training mean after sleeping ``delay`` seconds"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def fit(self, X, y):
+        time.sleep(self.delay)
+        self.mean_ = float(np.mean(y))
+        return self
+
+    def predict(self, X):
+        return np.full(len(X), self.mean_)
+
+def data(rows=400):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(rows, 5))
+    y = X @ np.array([3.0, -2.0, 1.0, 0.0, 0.5]) + rng.normal(scale=0.1, size=rows)
+    return X, y
+
+def test_folds_walk_forward():
+    folds = time_series_folds(100, 4)
+    assert len(folds) == 4
+    for train, val in folds:
+        assert train.max() < val.min()
+    assert [len(train) for train, _ in folds] == sorted(len(train) for train, _ in folds)
+    assert rung_folds(5) == [1, 3, 5] and rung_folds(9, 3) == [1, 3, 9] and rung_folds(1) == [1]
+
+@pytest.mark.parametrize('cores', [1, 2])
+def test_halving_finds_the_best_config_with_fewer_fits(cores):
+    X, y = data()
+    spaces = {'Ridge': {'alpha': [0.01, 1.0, 1e3, 1e4, 1e5, 1e6]}}
+    results, summary = tune_models({'Ridge': Ridge()}, spaces, X, y, n_splits=5, cores=cores)
+
+    assert results['Ridge']['params'] in ({'alpha': 0.01}, {'alpha': 1.0})
+    assert results['Ridge']['configs'] == 6
+    # 6 configs on fold 1, the best 2 on folds 2-3, the last one needs no more folds
+    assert summary['fits'] == 6 + 2 * 2 < 6 * 5
+    assert not summary['timed_out']
+
+def test_budget_stops_the_search():
+    X, y = data()
+    spaces = {'Slow': {'delay': [0.0, 0.3, 0.31, 0.32]}}
+    started = time.perf_counter()
+    results, summary = tune_models({'Slow': SlowRegressor()}, spaces, X, y, n_splits=5, budget_seconds=0.2, cores=1)
+    assert time.perf_counter() - started < 1.0
+    assert summary['timed_out']
+    assert results['Slow']['params'] == {'delay': 0.0} and results['Slow']['folds'] == 1
+
+    results, summary = tune_models({'Slow': SlowRegressor()}, {'Slow': {'delay': [2.0, 2.1]}}, X, y,
+                                   budget_seconds=0.2, cores=2)
+    assert summary['timed_out'] and results['Slow']['params'] == {} and results['Slow']['cv_rmse'] is None
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
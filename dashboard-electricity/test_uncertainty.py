@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test conformal prediction intervals: calibration, coverage, and the bounds
+and confidence the predictor returns
+"""
+
+import sys
+import os
+import numpy as np
+import pytest
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from uncertainty import fit_intervals, validate_intervals, half_widths, empirical_coverage, conformal_quantile
+
+def noisy_predictions(n, seed=0):
+    """Targets, predictions and hours where the error is larger in the afternoon"""
+    rng = np.random.default_rng(seed)
+    hours = rng.integers(0, 24, n)
+    scale = np.where((hours >= 12) & (hours < 18), 4.0, 1.0)
+    y_pred = rng.uniform(40, 90, n)
+    return y_pred + rng.normal(0, 1, n) * scale, y_pred, hours
+
+def test_intervals_cover_new_data():
+    intervals = fit_intervals(*noisy_predictions(2000), coverage=0.9)
+    validate_intervals(intervals)
+    # The noisy afternoon bucket gets a wider interval
+    assert intervals['half_widths'][2] > 2 * intervals['half_widths'][0]
+    assert 0.88 <= empirical_coverage(intervals, *noisy_predictions(5000, seed=1)) <= 0.93
+
+def test_small_buckets_use_the_global_width():
+    y_true, y_pred, hours = noisy_predictions(40)
+    intervals = fit_intervals(y_true, y_pred, hours, coverage=0.9, min_samples=20)
+    assert intervals['half_widths'] == [intervals['global_half_width']] * 4
+    assert np.all(half_widths(intervals, None, 3) == intervals['global_half_width'])
+
+def test_too_few_rows_for_the_coverage():
+    assert conformal_quantile(np.ones(5), 0.9) == np.inf
+    with pytest.raises(ValueError):
+        fit_intervals([1.0] * 5, [1.0] * 5, [0] * 5, coverage=0.9)
+    with pytest.raises(ValueError):
+        validate_intervals({'coverage': 0.9, 'bucket_hours': 6, 'half_widths': [1.0], 'global_half_width': 1.0})
+
+def test_predictor_returns_deterministic_bounds():
+    from inference import EnergyPredictor
+    predictor = EnergyPredictor()
+    if predictor.intervals is None:
+        pytest.skip('current bundle has no interval calibration')
+    predictor.cache = None
+
+    record = {'temperature': 30.0, 'humidity': 55.0, 'occupancy': 7, 'hvacUsage': True,
+              'hour': 14, 'dayOfWeek': 2, 'month': 7, 'dayOfYear': 190, 'weekOfYear': 27, 'dayOfMonth': 9}
+    first, second = predictor.predict(record), predictor.predict(record)
+    assert first['lower'] <= first['prediction'] <= first['upper']
+    assert (first['confidence'], first['lower'], first['upper']) == (second['confidence'], second['lower'], second['upper'])
+    assert first['interval_coverage'] == predictor.intervals['coverage']
+
+    batch = predictor.predict_many([record, {**record, 'hour': 3}])
+    assert batch['lower'][0] == first['lower'] and batch['upper'][0] == first['upper']
+    assert batch['confidence'][0] == first['confidence']
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
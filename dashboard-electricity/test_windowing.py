@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test that strided LSTM windows match the windows train.py used to copy out
+"""
+
+import sys
+import os
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ml'))
+
+from windowing import sliding_windows, window_targets, iter_window_batches
+
+def copied_windows(X, length):
+    """The original list-comprehension construction"""
+    return np.array([X[i:i + length] for i in range(len(X) - length)])
+
+def test_windows_are_views_matching_copies():
+    """Every window equals the copied slice and shares memory with X"""
+    X = np.random.default_rng(0).normal(size=(200, 5))
+    windows = sliding_windows(X, 24)
+
+    assert windows.shape == (176, 24, 5)
+    assert np.array_equal(windows, copied_windows(X, 24))
+    assert np.shares_memory(windows, X)
+    assert np.array_equal(window_targets(np.arange(200), 24), np.arange(24, 200))
+
+def test_short_series_has_no_windows():
+    assert sliding_windows(np.zeros((10, 3)), 24).shape == (0, 24, 3)
+
+def test_batches_cover_every_window_once():
+    """Batches (shuffled or not) together contain each window and its target exactly once"""
+    X = np.arange(300, dtype=np.float64).reshape(100, 3)
+    y = np.arange(100, dtype=np.float64)
+    expected = copied_windows(X, 10)
+
+    ordered = list(iter_window_batches(X, y, 10, batch_size=16))
+    assert np.array_equal(np.concatenate([b for b, _ in ordered]), expected)
+
+    shuffled = list(iter_window_batches(X, y, 10, batch_size=16, shuffle=True, rng=np.random.default_rng(1)))
+    windows = np.concatenate([b for b, _ in shuffled])
+    targets = np.concatenate([t for _, t in shuffled])
+    order = np.argsort(targets)
+    assert np.array_equal(targets[order], y[10:])
+    assert np.array_equal(windows[order], expected)
+
+if __name__ == "__main__":
+    test_windows_are_views_matching_copies()
+    test_short_series_has_no_windows()
+    test_batches_cover_every_window_once()
+    print("✅ Sliding windows match copied windows!")